@@ -0,0 +1,66 @@
+"""
+Configuración de gunicorn para producción, usada por el Procfile y
+render.yaml (`gunicorn --config gunicorn.conf.py wsgi --chdir ./src/`).
+La ruta se resuelve desde la raíz del repo, antes del --chdir.
+
+Variables (todas opcionales):
+    WEB_CONCURRENCY               workers (default 2 * CPUs + 1, máximo 4)
+    GUNICORN_WORKER_CLASS         gthread (default), gevent o sync
+    GUNICORN_THREADS              hilos por worker en gthread (default 4)
+    GUNICORN_WORKER_CONNECTIONS   requests concurrentes por worker en gevent (default 100)
+    GUNICORN_PRELOAD              1/0, carga la app en el master antes del fork (default 1)
+    GUNICORN_TIMEOUT              segundos antes de reiniciar un worker colgado (default 30)
+    GUNICORN_MAX_REQUESTS         reinicia cada worker tras N requests, 0 desactiva (default 1000)
+
+gthread atiende varias requests por worker con hilos, suficiente para la
+ruta de la UF (espera I/O de la API externa). Con threads > pool de la base
+(DB_POOL_SIZE + DB_MAX_OVERFLOW) los hilos esperan conexión; ver api/db_pool.py.
+gevent requiere instalar gevent (y psycogreen para que psycopg2 no bloquee).
+"""
+import multiprocessing
+import os
+
+
+def _env_int(name, default):
+    return int(os.getenv(name, default))
+
+
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+
+if worker_class == "gevent":
+    # Debe parchear antes de que preload_app importe la app
+    from gevent import monkey
+
+    monkey.patch_all()
+    try:
+        from psycogreen.gevent import patch_psycopg
+
+        patch_psycopg()
+    except ImportError:
+        pass
+
+workers = _env_int("WEB_CONCURRENCY", min(multiprocessing.cpu_count() * 2 + 1, 4))
+threads = _env_int("GUNICORN_THREADS", 4) if worker_class == "gthread" else 1
+worker_connections = _env_int("GUNICORN_WORKER_CONNECTIONS", 100)
+
+preload_app = os.getenv("GUNICORN_PRELOAD", "1").lower() in ("1", "true", "yes")
+timeout = _env_int("GUNICORN_TIMEOUT", 30)
+graceful_timeout = 30
+keepalive = 5
+
+# Reciclar workers acota el crecimiento de memoria; el jitter evita que
+# todos se reinicien a la vez
+max_requests = _env_int("GUNICORN_MAX_REQUESTS", 1000)
+max_requests_jitter = max_requests // 10
+
+accesslog = "-"
+errorlog = "-"
+
+
+def post_fork(server, worker):
+    from app import app
+    from api.warmup import reset_after_fork, warm_caches
+
+    reset_after_fork(app)
+    for path, status_code, seconds in warm_caches(app):
+        server.log.info("Worker %s warmup %s -> %s en %.0fms", worker.pid, path, status_code, seconds * 1000)
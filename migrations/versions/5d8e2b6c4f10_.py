@@ -0,0 +1,39 @@
+"""expenses and users secondary indexes
+
+Revision ID: 5d8e2b6c4f10
+Revises: a3f1c9d2e7b4
+Create Date: 2026-10-18 11:02:17.604331
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d8e2b6c4f10'
+down_revision = 'a3f1c9d2e7b4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('expenses', schema=None) as batch_op:
+        batch_op.create_index('ix_expenses_condominium_date', ['condominium_id', 'expense_date', 'id'], unique=False)
+        batch_op.create_index('ix_expenses_expense_status_id', ['expense_status_id'], unique=False)
+        batch_op.create_index('ix_expenses_provider_id', ['provider_id'], unique=False)
+        batch_op.create_index('ix_expenses_category_id', ['category_id'], unique=False)
+
+    # users.email ya está indexado por su restricción UNIQUE
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_users_condominio_id'), ['condominio_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_users_condominio_id'))
+
+    with op.batch_alter_table('expenses', schema=None) as batch_op:
+        batch_op.drop_index('ix_expenses_category_id')
+        batch_op.drop_index('ix_expenses_provider_id')
+        batch_op.drop_index('ix_expenses_expense_status_id')
+        batch_op.drop_index('ix_expenses_condominium_date')
@@ -0,0 +1,28 @@
+"""table versions for http caching
+
+Revision ID: 7c2d94e1ab38
+Revises: e41b7a90c3d5
+Create Date: 2026-10-18 13:40:08.277915
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c2d94e1ab38'
+down_revision = 'e41b7a90c3d5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('table_versions',
+    sa.Column('name', sa.String(length=64), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade():
+    op.drop_table('table_versions')
@@ -0,0 +1,39 @@
+"""expense monthly rollups
+
+Revision ID: a3f1c9d2e7b4
+Revises: 69412147940a
+Create Date: 2026-10-18 10:12:40.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3f1c9d2e7b4'
+down_revision = '69412147940a'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('expense_monthly_rollups',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('condominium_id', sa.Integer(), nullable=False),
+    sa.Column('year', sa.Integer(), nullable=False),
+    sa.Column('month', sa.Integer(), nullable=False),
+    sa.Column('category_id', sa.Integer(), nullable=False),
+    sa.Column('expense_status_id', sa.Integer(), nullable=True),
+    sa.Column('total_amount', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.Column('expense_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['category_id'], ['expense_categories.id'], ),
+    sa.ForeignKeyConstraint(['condominium_id'], ['condominios.id'], ),
+    sa.ForeignKeyConstraint(['expense_status_id'], ['expense_statuses.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('condominium_id', 'year', 'month', 'category_id', 'expense_status_id', name='uq_expense_monthly_rollup_key')
+    )
+    # Run `flask rollup-expenses` after upgrading to backfill existing expenses.
+
+
+def downgrade():
+    op.drop_table('expense_monthly_rollups')
@@ -0,0 +1,26 @@
+"""expense row version
+
+Revision ID: b9e05d3f71a2
+Revises: 7c2d94e1ab38
+Create Date: 2026-10-18 14:58:33.530126
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b9e05d3f71a2'
+down_revision = '7c2d94e1ab38'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('expenses', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('expenses', schema=None) as batch_op:
+        batch_op.drop_column('version')
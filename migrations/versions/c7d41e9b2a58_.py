@@ -0,0 +1,74 @@
+"""expense monthly rollups unique key with null status
+
+Revision ID: c7d41e9b2a58
+Revises: a8e3f61c2d75
+Create Date: 2026-10-18 21:04:17.552310
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7d41e9b2a58'
+down_revision = 'a8e3f61c2d75'
+branch_labels = None
+depends_on = None
+
+# Misma clave "sin estado" (NULL) que compara el nuevo índice único
+SAME_NULL_STATUS_KEY = """
+    r2.condominium_id = expense_monthly_rollups.condominium_id
+    AND r2.year = expense_monthly_rollups.year
+    AND r2.month = expense_monthly_rollups.month
+    AND r2.category_id = expense_monthly_rollups.category_id
+    AND r2.expense_status_id IS NULL
+"""
+
+
+def upgrade():
+    # El UniqueConstraint anterior no impedía filas repetidas con estado NULL:
+    # se suman en la de menor id antes de crear el índice
+    op.execute(f"""
+        UPDATE expense_monthly_rollups
+        SET total_amount = (
+                SELECT SUM(r2.total_amount) FROM expense_monthly_rollups r2
+                WHERE {SAME_NULL_STATUS_KEY}
+            ),
+            expense_count = (
+                SELECT SUM(r2.expense_count) FROM expense_monthly_rollups r2
+                WHERE {SAME_NULL_STATUS_KEY}
+            )
+        WHERE expense_status_id IS NULL
+        AND id = (
+            SELECT MIN(r2.id) FROM expense_monthly_rollups r2
+            WHERE {SAME_NULL_STATUS_KEY}
+        )
+    """)
+    op.execute(f"""
+        DELETE FROM expense_monthly_rollups
+        WHERE expense_status_id IS NULL
+        AND id > (
+            SELECT MIN(r2.id) FROM expense_monthly_rollups r2
+            WHERE {SAME_NULL_STATUS_KEY}
+        )
+    """)
+
+    with op.batch_alter_table('expense_monthly_rollups', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_expense_monthly_rollup_key', type_='unique')
+
+    op.create_index(
+        'uq_expense_monthly_rollup_key',
+        'expense_monthly_rollups',
+        ['condominium_id', 'year', 'month', 'category_id', sa.text('coalesce(expense_status_id, 0)')],
+        unique=True
+    )
+
+
+def downgrade():
+    op.drop_index('uq_expense_monthly_rollup_key', table_name='expense_monthly_rollups')
+
+    with op.batch_alter_table('expense_monthly_rollups', schema=None) as batch_op:
+        batch_op.create_unique_constraint(
+            'uq_expense_monthly_rollup_key',
+            ['condominium_id', 'year', 'month', 'category_id', 'expense_status_id']
+        )
@@ -0,0 +1,31 @@
+"""uf values history
+
+Revision ID: e41b7a90c3d5
+Revises: 5d8e2b6c4f10
+Create Date: 2026-10-18 12:25:51.903472
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e41b7a90c3d5'
+down_revision = '5d8e2b6c4f10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('uf_values',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('value', sa.Numeric(precision=12, scale=2), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('date')
+    )
+
+
+def downgrade():
+    op.drop_table('uf_values')
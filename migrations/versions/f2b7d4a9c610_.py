@@ -0,0 +1,40 @@
+"""expense document blobs and previews
+
+Revision ID: f2b7d4a9c610
+Revises: d5a2c8e1f934
+Create Date: 2026-10-18 19:05:41.227390
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2b7d4a9c610'
+down_revision = 'd5a2c8e1f934'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('expense_documents', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('original_name', sa.String(length=255), nullable=True))
+        batch_op.add_column(sa.Column('content_type', sa.String(length=100), nullable=True))
+        batch_op.add_column(sa.Column('size', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('sha256', sa.String(length=64), nullable=True))
+        batch_op.add_column(sa.Column('thumbnail_path', sa.String(length=255), nullable=True))
+        batch_op.add_column(sa.Column('preview_status', sa.String(length=20), server_default='pending', nullable=False))
+        batch_op.create_index(batch_op.f('ix_expense_documents_expense_id'), ['expense_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_expense_documents_sha256'), ['sha256'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('expense_documents', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_expense_documents_sha256'))
+        batch_op.drop_index(batch_op.f('ix_expense_documents_expense_id'))
+        batch_op.drop_column('preview_status')
+        batch_op.drop_column('thumbnail_path')
+        batch_op.drop_column('sha256')
+        batch_op.drop_column('size')
+        batch_op.drop_column('content_type')
+        batch_op.drop_column('original_name')
@@ -7,4 +7,7 @@ npm run build
 
 pipenv install
 
+# Versiones .gz / .br de dist/ para servirlas sin comprimir en cada request
+pipenv run flask precompress-static
+
 pipenv run upgrade
@@ -1,18 +1,81 @@
+"""
+Panel de administración (Flask-Admin) en /admin.
+
+Flask-Admin y sus vistas (una por modelo, con sus reglas de URL) se
+construyen recién con el primer request a /admin, no al importar app.py:
+así el arranque en frío del servidor no paga por un panel que casi nunca
+se usa. Como Flask no permite registrar rutas después del primer request,
+el panel vive en una app Flask aparte, con la misma configuración, que un
+middleware WSGI atiende solo para /admin.
+
+La app del admin no registra Flask-SQLAlchemy (eso crearía un segundo
+engine y pool por worker): sus vistas usan una sesión propia ligada al
+engine de la app principal, el mismo que miden /api/_pool y que
+api/warmup.py descarta después del fork.
+"""
 import os
 import inspect
-from flask_admin import Admin
+import threading
+from flask import Flask
+from sqlalchemy.orm import scoped_session, sessionmaker
 from . import models
 from .models import db
-from flask_admin.contrib.sqla import ModelView
-from flask_admin.theme import Bootstrap4Theme
 
+ADMIN_URL = "/admin"
 
-def setup_admin(app):
-    app.secret_key = os.environ.get('FLASK_APP_KEY', 'sample key')
-    admin = Admin(app, name='4Geeks Admin', theme=Bootstrap4Theme(swatch='cerulean'))
+
+def create_admin_app(app):
+    from flask_admin import Admin
+    from flask_admin.contrib.sqla import ModelView
+    from flask_admin.theme import Bootstrap4Theme
+
+    admin_app = Flask(__name__)
+    admin_app.config.update(app.config)
+    admin_app.secret_key = app.secret_key
+
+    with app.app_context():
+        engine = db.engine
+    session = scoped_session(sessionmaker(bind=engine))
+
+    @admin_app.teardown_appcontext
+    def remove_session(exception=None):
+        session.remove()
+
+    admin = Admin(admin_app, name='4Geeks Admin', url=ADMIN_URL, theme=Bootstrap4Theme(swatch='cerulean'))
 
     # Dynamically add all models to the admin interface
     for name, obj in inspect.getmembers(models):
-        # Verify that the object is a SQLAlchemy model before adding it to the admin. 
+        # Verify that the object is a SQLAlchemy model before adding it to the admin.
         if inspect.isclass(obj) and issubclass(obj, db.Model):
-            admin.add_view(ModelView(obj, db.session))
\ No newline at end of file
+            admin.add_view(ModelView(obj, session))
+
+    return admin_app
+
+
+class LazyAdminMiddleware:
+    """Deriva /admin a la app del admin, que se crea en el primer uso."""
+
+    def __init__(self, app, wsgi_app):
+        self.app = app
+        self.wsgi_app = wsgi_app
+        self.admin_app = None
+        self._lock = threading.Lock()
+
+    def get_admin_app(self):
+        if self.admin_app is None:
+            with self._lock:
+                if self.admin_app is None:
+                    self.admin_app = create_admin_app(self.app)
+        return self.admin_app
+
+    def __call__(self, environ, start_response):
+        path = environ.get("PATH_INFO", "")
+        if path == ADMIN_URL or path.startswith(ADMIN_URL + "/"):
+            return self.get_admin_app()(environ, start_response)
+        return self.wsgi_app(environ, start_response)
+
+
+def setup_admin(app):
+    # La secret key también firma los JWT (flask_jwt_extended usa SECRET_KEY)
+    app.secret_key = os.environ.get('FLASK_APP_KEY', 'sample key')
+    app.wsgi_app = LazyAdminMiddleware(app, app.wsgi_app)
@@ -0,0 +1,244 @@
+"""
+Autorización a partir de los claims del JWT, sin consultar la base.
+
+login firma en el token los roles y el condominio del usuario (additional
+claims) y claims_required() autoriza solo con ellos:
+
+    @expenses_bp.route("/expenses/condominium", methods=["GET"])
+    @claims_required("ADMIN", "SUPERADMIN", condominium_arg="condominium_id")
+    def get_expenses_by_condominium(): ...
+
+Como los claims quedan fijos hasta que el token expira, cambiar los roles
+o el condominio de un usuario, desactivarlo o borrarlo revoca sus tokens
+anteriores (revoke_user_tokens), y logout revoca el token actual
+(revoke_token). Las revocaciones se guardan en revoked_tokens y cada
+worker mantiene una copia en memoria que recarga cada
+REVOCATION_REFRESH_SECONDS: una consulta por worker cada ese intervalo,
+no una por request. El worker que revoca la aplica de inmediato; los
+demás, en el siguiente refresco.
+
+El corte de revocación se compara en microsegundos contra el claim iat_us
+que agrega issue_token(): el iat estándar del JWT es en segundos enteros y
+no distingue un token emitido antes del cambio en el mismo segundo.
+"""
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from functools import wraps
+from flask import current_app, jsonify, request
+from flask_jwt_extended import create_access_token, get_jwt, verify_jwt_in_request
+from sqlalchemy import delete, event, select
+from sqlalchemy.orm import Session
+from api.models import db, RevokedToken
+
+SUPERADMIN = "SUPERADMIN"
+REVOCATION_REFRESH_SECONDS = float(os.getenv("REVOCATION_REFRESH_SECONDS", 30))
+# Plazo para purgar revocaciones cuando los tokens no expiran
+MAX_TOKEN_LIFETIME = timedelta(days=30)
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+# ============================
+# EMISIÓN
+# ============================
+def user_claims(user):
+    return {
+        "roles": [r.name for r in user.roles],
+        "condominio_id": user.condominio_id,
+    }
+
+
+def _epoch_microseconds(value):
+    # SQLite devuelve las fechas sin zona horaria; se guardan en UTC
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return (value - EPOCH) // timedelta(microseconds=1)
+
+
+def issue_token(user):
+    claims = user_claims(user)
+    claims["iat_us"] = _epoch_microseconds(datetime.now(timezone.utc))
+    return create_access_token(identity=str(user.id), additional_claims=claims)
+
+
+# ============================
+# REVOCACIÓN
+# ============================
+def _issued_at(payload):
+    """Emisión del token en microsegundos; los tokens sin iat_us usan iat."""
+    if "iat_us" in payload:
+        return payload["iat_us"]
+    return payload.get("iat", 0) * 1_000_000
+
+
+class RevocationCache:
+    """Tokens y usuarios revocados, recargados desde la base cada tanto."""
+
+    def __init__(self, refresh_seconds=REVOCATION_REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self.jtis = frozenset()
+        # user_id (el "sub" del token) -> corte en microsegundos
+        self.users = {}
+        self.loaded_at = None
+        self._lock = threading.Lock()
+
+    def is_revoked(self, payload):
+        if self.loaded_at is None or time.monotonic() - self.loaded_at >= self.refresh_seconds:
+            self.refresh()
+
+        if payload.get("jti") in self.jtis:
+            return True
+        cutoff = self.users.get(payload.get("sub"))
+        return cutoff is not None and _issued_at(payload) <= cutoff
+
+    def refresh(self):
+        # Si otro thread ya está recargando, se usa la copia actual
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            rows = db.session.execute(
+                select(RevokedToken.jti, RevokedToken.user_id, RevokedToken.revoked_before)
+                .where(RevokedToken.expires_at > datetime.now(timezone.utc))
+            ).all()
+
+            jtis = set()
+            users = {}
+            for jti, user_id, revoked_before in rows:
+                if jti:
+                    jtis.add(jti)
+                if user_id is not None and revoked_before is not None:
+                    key = str(user_id)
+                    users[key] = max(users.get(key, 0), _epoch_microseconds(revoked_before))
+
+            self.jtis = frozenset(jtis)
+            self.users = users
+            self.loaded_at = time.monotonic()
+        finally:
+            self._lock.release()
+
+    def add_jti(self, jti):
+        self.jtis = self.jtis | {jti}
+
+    def add_user(self, user_id, cutoff):
+        users = dict(self.users)
+        users[str(user_id)] = max(users.get(str(user_id), 0), cutoff)
+        self.users = users
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_pending_revocations(session):
+    # La copia en memoria cambia solo si la revocación quedó guardada
+    for user_id, cutoff in session.info.pop("revoked_users", ()):
+        revocations.add_user(user_id, cutoff)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_revocations(session):
+    session.info.pop("revoked_users", None)
+
+
+revocations = RevocationCache()
+
+
+def _token_lifetime():
+    expires = current_app.config.get("JWT_ACCESS_TOKEN_EXPIRES", timedelta(minutes=15))
+    if not expires:
+        return MAX_TOKEN_LIFETIME
+    return expires if isinstance(expires, timedelta) else timedelta(seconds=expires)
+
+
+def _purge_expired():
+    db.session.execute(
+        delete(RevokedToken).where(RevokedToken.expires_at <= datetime.now(timezone.utc))
+    )
+
+
+def revoke_token(payload):
+    """Revoca un token (logout) hasta que expire. Hace commit."""
+    expires_at = (
+        datetime.fromtimestamp(payload["exp"], timezone.utc)
+        if "exp" in payload
+        else datetime.now(timezone.utc) + MAX_TOKEN_LIFETIME
+    )
+    _purge_expired()
+    db.session.add(RevokedToken(jti=payload["jti"], expires_at=expires_at))
+    db.session.commit()
+    revocations.add_jti(payload["jti"])
+
+
+def revoke_user_tokens(user_id):
+    """
+    Revoca los tokens emitidos hasta ahora para user_id. Se agrega a la
+    sesión actual: el commit lo hace la ruta junto con el cambio del
+    usuario, y recién entonces se aplica en este worker.
+    """
+    now = datetime.now(timezone.utc)
+    _purge_expired()
+    db.session.add(RevokedToken(
+        user_id=user_id,
+        revoked_before=now,
+        expires_at=now + _token_lifetime(),
+    ))
+    db.session.info.setdefault("revoked_users", []).append((user_id, _epoch_microseconds(now)))
+
+
+# ============================
+# AUTORIZACIÓN
+# ============================
+def _requested_condominium(arg, kwargs):
+    if arg in kwargs:
+        return kwargs[arg]
+    if arg in request.args:
+        return request.args[arg]
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        return data.get(arg)
+    return None
+
+
+def claims_allow(claims, roles=(), condominium_id=None, scoped=False):
+    """
+    True si los claims tienen alguno de roles y acceso a condominium_id.
+    Con scoped el recurso es de un condominio: sin condominium_id (todos
+    los condominios) solo SUPERADMIN tiene acceso.
+    """
+    token_roles = set(claims.get("roles", ()))
+    if roles and token_roles.isdisjoint(roles):
+        return False
+    if SUPERADMIN in token_roles or (condominium_id is None and not scoped):
+        return True
+    return condominium_id is not None and str(condominium_id) == str(claims.get("condominio_id"))
+
+
+def claims_required(*roles, condominium_arg=None):
+    """
+    Exige un JWT válido y, si se indican, alguno de los roles. Con
+    condominium_arg, el condominio pedido (argumento de la ruta, query
+    string o JSON) debe ser el del token, salvo para SUPERADMIN; si no
+    viene, se rechaza.
+    Todo se resuelve con los claims, sin consultar usuarios ni roles.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            verify_jwt_in_request()
+            claims = get_jwt()
+
+            if not claims_allow(claims, roles):
+                return jsonify({"message": "No autorizado para este recurso"}), 403
+
+            if condominium_arg:
+                requested = _requested_condominium(condominium_arg, kwargs)
+                if not claims_allow(claims, condominium_id=requested, scoped=True):
+                    return jsonify({"message": "No autorizado para este condominio"}), 403
+
+            return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def setup_auth(jwt):
+    @jwt.token_in_blocklist_loader
+    def is_token_revoked(jwt_header, jwt_payload):
+        return revocations.is_revoked(jwt_payload)
@@ -0,0 +1,291 @@
+"""
+Microbenchmarks de los endpoints de gastos, usuarios, condominios y
+proveedores sobre datasets sintéticos crecientes.
+
+Usa la app de src/app.py con el test client de Flask contra la base
+configurada en DATABASE_URL (SQLite o PostgreSQL local). Por cada ruta
+reporta latencia p50/p99, memoria asignada (pico de tracemalloc) y tamaño
+del payload, en un JSON comparable entre commits. Se usa desde
+`flask benchmark-endpoints`.
+"""
+import json
+import math
+import platform
+import subprocess
+import time
+import tracemalloc
+import uuid
+from datetime import date
+from api.models import db, Condominio, Expense, Provider
+from api.expense_rollups import backfill_rollups
+from api.synthetic_data import generate_expenses, insert_expenses, seed_reference_data
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    index = max(math.ceil(p / 100 * len(ordered)) - 1, 0)
+    return ordered[index]
+
+
+class EndpointTimer:
+    """Ejecuta requests con el test client y acumula las muestras por ruta."""
+
+    def __init__(self, client):
+        self.client = client
+        self.samples = {}
+        self.trace_allocations = False
+
+    def request(self, label, method, url, **kwargs):
+        if self.trace_allocations:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+
+        start = time.perf_counter()
+        response = self.client.open(url, method=method, **kwargs)
+        body = response.get_data()
+        elapsed = time.perf_counter() - start
+
+        sample = self.samples.setdefault(label, {
+            "method": method,
+            "times": [],
+            "status": set(),
+            "payload_bytes": 0,
+            "peak_alloc_kb": None,
+        })
+        if self.trace_allocations:
+            peak = tracemalloc.get_traced_memory()[1] - before
+            sample["peak_alloc_kb"] = round(peak / 1024, 1)
+        else:
+            sample["times"].append(elapsed)
+        sample["status"].add(response.status_code)
+        sample["payload_bytes"] = len(body)
+        return response
+
+    def summary(self):
+        results = []
+        for label, sample in self.samples.items():
+            times = sample["times"]
+            results.append({
+                "route": label,
+                "method": sample["method"],
+                "runs": len(times),
+                "p50_ms": round(percentile(times, 50) * 1000, 3),
+                "p99_ms": round(percentile(times, 99) * 1000, 3),
+                "mean_ms": round(sum(times) / len(times) * 1000, 3),
+                "status": sorted(sample["status"]),
+                "payload_bytes": sample["payload_bytes"],
+                "peak_alloc_kb": sample["peak_alloc_kb"],
+            })
+        return results
+
+
+# ============================
+# ESCENARIOS
+# ============================
+def _read_routes(timer, condominium_id):
+    today = date.today()
+    month = f"{today.year}-{today.month:02d}"
+    last_year = f"{today.year - 1}-{today.month:02d}"
+
+    for label, url in (
+        ("GET /api/expenses", "/api/expenses"),
+        ("GET /api/expenses/category", "/api/expenses/category"),
+        ("GET /api/expenses/status", "/api/expenses/status"),
+        ("GET /api/expenses/monthly", f"/api/expenses/monthly?condominium_id={condominium_id}"),
+        (
+            "GET /api/expenses/aggregate",
+            f"/api/expenses/aggregate?condominium_id={condominium_id}"
+            f"&start_month={last_year}&end_month={month}&group_by=month,category",
+        ),
+        ("GET /api/condominios/<id>/dashboard", f"/api/condominios/{condominium_id}/dashboard"),
+        ("GET /api/expenses/condominium", f"/api/expenses/condominium?condominium_id={condominium_id}"),
+        (
+            "GET /api/expenses/condominium/export",
+            f"/api/expenses/condominium/export?condominium_id={condominium_id}",
+        ),
+        ("GET /api/users", "/api/users"),
+        ("GET /api/condominios", "/api/condominios"),
+        ("GET /api/providers", "/api/providers"),
+    ):
+        timer.request(label, "GET", url)
+
+    # Segunda página del listado por cursor
+    first_page = timer.client.get(
+        f"/api/expenses/condominium?condominium_id={condominium_id}&include_total=0"
+    ).get_json()
+    if first_page.get("next_cursor"):
+        timer.request(
+            "GET /api/expenses/condominium (cursor)",
+            "GET",
+            f"/api/expenses/condominium?condominium_id={condominium_id}"
+            f"&include_total=0&cursor={first_page['next_cursor']}",
+        )
+
+
+def _expense_lifecycle(timer, reference, condominium_id):
+    response = timer.request("POST /api/expenses", "POST", "/api/expenses", data={
+        "provider_id": reference["provider_ids"][0],
+        "category_id": reference["category_ids"][0],
+        "condominium_id": condominium_id,
+        "expense_status_id": reference["status_ids"][0],
+        "expense_date": date.today().isoformat(),
+        "observation": "benchmark",
+        "amount": "12345",
+        "document_number": "BENCH",
+    })
+    expense_id = response.get_json()["id"]
+
+    timer.request("PUT /api/expenses/<id>", "PUT", f"/api/expenses/{expense_id}", json={
+        "amount": "23456",
+        "expense_status_id": reference["status_ids"][1],
+    })
+    timer.request("PATCH /api/expenses/batch", "PATCH", "/api/expenses/batch", json={
+        "condominium_id": condominium_id,
+        "updates": [{"id": expense_id, "expense_status_id": reference["status_ids"][0]}],
+    })
+    timer.request("DELETE /api/expenses/<id>", "DELETE", f"/api/expenses/{expense_id}")
+
+
+def _provider_lifecycle(timer):
+    name = f"bench-{uuid.uuid4().hex[:12]}"
+    timer.request("POST /api/providers", "POST", "/api/providers", json={
+        "name": name,
+        "service_type": "benchmark",
+    })
+    provider_id = db.session.query(Provider.id).filter_by(name=name).scalar()
+    timer.request("PUT /api/providers/<id>", "PUT", f"/api/providers/{provider_id}", json={"phone": "123"})
+    timer.request("DELETE /api/providers/<id>", "DELETE", f"/api/providers/{provider_id}")
+
+
+def _user_and_condominio_lifecycle(timer):
+    suffix = uuid.uuid4().hex[:12]
+    response = timer.request("POST /api/users", "POST", "/api/users", json={
+        "first_name": "Bench",
+        "last_name": suffix,
+        "email": f"bench-{suffix}@example.com",
+        "password": "bench1234",
+        "roles": ["ADMIN"],
+    })
+    user_id = response.get_json()["id"]
+    timer.request("PUT /api/users/<id>", "PUT", f"/api/users/{user_id}", json={"last_name": "Updated"})
+
+    nombre = f"Bench {suffix}"
+    timer.request("POST /api/condominios", "POST", "/api/condominios", json={
+        "nombre": nombre,
+        "comuna": "Santiago",
+        "direccion": "Benchmark 123",
+        "total_unidades": 10,
+        "administrador_id": user_id,
+    })
+    condominio_id = db.session.query(Condominio.id).filter_by(nombre=nombre).scalar()
+    timer.request("PUT /api/condominios/<id>", "PUT", f"/api/condominios/{condominio_id}", json={"comuna": "Ñuñoa"})
+    timer.request("DELETE /api/condominios/<id>", "DELETE", f"/api/condominios/{condominio_id}")
+    timer.request("DELETE /api/users/<id>", "DELETE", f"/api/users/{user_id}")
+
+
+def _run_scenarios(timer, reference, condominium_id):
+    _read_routes(timer, condominium_id)
+    _expense_lifecycle(timer, reference, condominium_id)
+    _provider_lifecycle(timer)
+    _user_and_condominio_lifecycle(timer)
+    db.session.remove()
+
+
+# ============================
+# EJECUCIÓN
+# ============================
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmark(app, sizes, condominiums=50, repeat=20, seed=42, log=print):
+    """
+    Siembra la base hasta cada tamaño de sizes (incremental) y mide todas
+    las rutas. La base debe partir sin gastos.
+    """
+    if db.session.query(Expense.id).first() is not None:
+        raise RuntimeError(
+            "La base ya tiene gastos; usa una base vacía (DATABASE_URL) para el benchmark"
+        )
+
+    reference = seed_reference_data(condominiums=condominiums, seed=seed)
+    condominium_id = reference["condominium_ids"][0]
+    client = app.test_client()
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "dialect": db.engine.dialect.name,
+            "python": platform.python_version(),
+            "repeat": repeat,
+            "condominiums": condominiums,
+            "seed": seed,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "datasets": [],
+    }
+
+    loaded = 0
+    for size in sorted(sizes):
+        log(f"Sembrando hasta {size} gastos...")
+        start = time.perf_counter()
+        loaded += insert_expenses(
+            generate_expenses(size - loaded, reference, seed=seed, start_index=loaded)
+        )
+        backfill_rollups()
+        seed_seconds = round(time.perf_counter() - start, 2)
+
+        timer = EndpointTimer(client)
+        _run_scenarios(timer, reference, condominium_id)  # calentamiento
+        timer.samples.clear()
+
+        for _ in range(repeat):
+            _run_scenarios(timer, reference, condominium_id)
+
+        tracemalloc.start()
+        timer.trace_allocations = True
+        try:
+            _run_scenarios(timer, reference, condominium_id)
+        finally:
+            tracemalloc.stop()
+
+        report["datasets"].append({
+            "expenses": loaded,
+            "seed_seconds": seed_seconds,
+            "results": timer.summary(),
+        })
+        log(f"  {size} gastos: {len(timer.samples)} rutas medidas")
+
+    return report
+
+
+def compare_reports(baseline, current):
+    """Filas (expenses, ruta, p50 antes, p50 ahora, razón) para rutas comunes."""
+    rows = []
+    base_index = {
+        (d["expenses"], r["route"]): r
+        for d in baseline["datasets"] for r in d["results"]
+    }
+    for dataset in current["datasets"]:
+        for result in dataset["results"]:
+            before = base_index.get((dataset["expenses"], result["route"]))
+            if before and before["p50_ms"]:
+                rows.append((
+                    dataset["expenses"],
+                    result["route"],
+                    before["p50_ms"],
+                    result["p50_ms"],
+                    round(result["p50_ms"] / before["p50_ms"], 2),
+                ))
+    return rows
+
+
+def write_report(report, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
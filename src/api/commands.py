@@ -1,4 +1,5 @@
 
+import os
 import click
 from api.models import db, User
 
@@ -15,20 +16,373 @@ def setup_commands(app):
     Note: 5 is the number of users to add
     """
     @app.cli.command("insert-test-users") # name of our command
-    @click.argument("count") # argument of out command
+    @click.argument("count", type=int) # argument of out command
     def insert_test_users(count):
+        from werkzeug.security import generate_password_hash
+        from api.models import Role
+
         print("Creating test users")
-        for x in range(1, int(count) + 1):
-            user = User()
-            user.email = "test_user" + str(x) + "@test.com"
-            user.password = "123456"
-            user.is_active = True
-            db.session.add(user)
-            db.session.commit()
-            print("User: ", user.email, " created.")
+        role = Role.query.filter_by(name="USER").first()
+        if role is None:
+            role = Role(name="USER")
+            db.session.add(role)
+
+        emails = ["test_user" + str(x) + "@test.com" for x in range(1, count + 1)]
+        existing = {
+            email for (email,) in db.session.query(User.email).filter(User.email.in_(emails))
+        }
+
+        password = generate_password_hash("123456")
+        users = []
+        for x, email in enumerate(emails, start=1):
+            if email in existing:
+                print("User: ", email, " already exists, skipped.")
+                continue
+            users.append(User(
+                first_name="Test",
+                last_name="User " + str(x),
+                email=email,
+                password=password,
+                is_active=True,
+                roles=[role],
+            ))
 
-        print("All test users created")
+        db.session.add_all(users)
+        db.session.commit()
+        print(len(users), "test users created (password: 123456)")
 
+    """
+    Carga datos sintéticos realistas y reproducibles: condominios con su
+    administrador, residentes, proveedores, categorías, estados y gastos.
+    En PostgreSQL los gastos se cargan con COPY; en SQLite con inserts por lotes.
+    $ flask insert-test-data --expenses 1000000 --condominiums 50 --seed 7
+    Los usuarios creados usan la contraseña demo1234.
+    """
     @app.cli.command("insert-test-data")
-    def insert_test_data():
-        pass
\ No newline at end of file
+    @click.option("--expenses", default=10000, type=int, help="Cantidad de gastos")
+    @click.option("--condominiums", default=10, type=int)
+    @click.option("--providers", default=50, type=int)
+    @click.option("--residents", default=20, type=int, help="Usuarios USER por condominio")
+    @click.option("--days", default=5 * 365, type=int, help="Antigüedad máxima de los gastos en días")
+    @click.option("--seed", default=42, type=int, help="Mismo seed, mismos datos")
+    @click.option("--batch-size", default=10000, type=int)
+    @click.option("--copy/--no-copy", "use_copy", default=None, help="Forzar o desactivar COPY (default: solo PostgreSQL)")
+    @click.option("--skip-rollups", is_flag=True, help="No recalcular expense_monthly_rollups al final")
+    def insert_test_data(expenses, condominiums, providers, residents, days, seed, batch_size, use_copy, skip_rollups):
+        import time
+        from sqlalchemy.exc import IntegrityError
+        from api.expense_rollups import backfill_rollups
+        from api.synthetic_data import generate_expenses, insert_expenses, seed_reference_data
+
+        if condominiums < 1 or providers < 1:
+            raise click.BadParameter("se necesita al menos un condominio y un proveedor")
+
+        start = time.perf_counter()
+        try:
+            reference = seed_reference_data(
+                condominiums=condominiums,
+                providers=providers,
+                residents_per_condominium=residents,
+                seed=seed,
+            )
+        except IntegrityError:
+            db.session.rollback()
+            raise click.ClickException(f"Ya existen datos con el seed {seed}; usa otro --seed")
+        print(
+            f"{condominiums} condominios, {providers} proveedores y "
+            f"{len(reference['user_ids'])} usuarios en {time.perf_counter() - start:.1f}s"
+        )
+
+        start = time.perf_counter()
+        inserted = insert_expenses(
+            generate_expenses(expenses, reference, seed=seed, days=days),
+            batch_size=batch_size,
+            use_copy=use_copy,
+        )
+        elapsed = time.perf_counter() - start
+        print(f"{inserted} gastos en {elapsed:.1f}s ({inserted / max(elapsed, 1e-9):,.0f} filas/s)")
+
+        if not skip_rollups:
+            start = time.perf_counter()
+            backfill_rollups()
+            print(f"Rollups mensuales recalculados en {time.perf_counter() - start:.1f}s")
+
+    """
+    Reconstruye y/o verifica la tabla expense_monthly_rollups por lotes de condominios.
+    $ flask rollup-expenses               -> backfill + verificación
+    $ flask rollup-expenses --verify-only -> solo reporta diferencias
+    """
+    @app.cli.command("rollup-expenses")
+    @click.option("--chunk-size", default=500, show_default=True, help="Condominios por lote")
+    @click.option("--verify-only", is_flag=True, help="No escribe, solo compara")
+    def rollup_expenses(chunk_size, verify_only):
+        from api.expense_rollups import backfill_rollups, verify_rollups
+
+        if not verify_only:
+            print("Reconstruyendo rollups mensuales...")
+            written = backfill_rollups(chunk_size)
+            print("Filas de rollup escritas:", written)
+
+        mismatches = verify_rollups(chunk_size)
+        for key, expected, stored in mismatches[:20]:
+            print("Diferencia en", key, "esperado:", expected, "almacenado:", stored)
+
+        if mismatches:
+            raise click.ClickException(f"{len(mismatches)} rollups no coinciden")
+        print("Rollups verificados correctamente")
+
+    """
+    Ejecuta EXPLAIN sobre las consultas calientes de la API en la base configurada
+    (SQLite o PostgreSQL) y falla si alguna recorre completa una tabla grande.
+    $ flask check-query-plans
+    """
+    @app.cli.command("check-query-plans")
+    @click.option("--verbose", is_flag=True, help="Muestra el plan completo de cada consulta")
+    def check_query_plans_command(verbose):
+        from api.query_plans import check_query_plans
+
+        results = check_query_plans(app)
+        failures = [r for r in results if r["scans"]]
+
+        for result in results:
+            print("FAIL" if result["scans"] else "OK  ", result["name"])
+            if verbose or result["scans"]:
+                print("       SQL:", " ".join(result["sql"].split())[:300])
+            for line in (result["plan"] if verbose else result["scans"]):
+                print("      ", line)
+
+        if failures:
+            raise click.ClickException(f"{len(failures)} consultas usan scan secuencial")
+        print("Todos los planes usan índices")
+
+    """
+    Carga el histórico diario de la UF en la tabla uf_values.
+    $ flask import-uf --file uf_2025.csv
+    $ flask import-uf --year 2024 --year 2025   (desde la API de indicadores)
+    """
+    @app.cli.command("import-uf")
+    @click.option("--file", "path", type=click.Path(exists=True, dir_okay=False), help="CSV o JSON con fecha,valor")
+    @click.option("--year", "years", type=int, multiple=True, help="Año a descargar desde la API")
+    def import_uf(path, years):
+        from api.uf_history import _parse_uf_row, import_uf_values, read_uf_file
+        from api.uf_service import uf_service
+
+        if not path and not years:
+            raise click.UsageError("Indica --file o al menos un --year")
+
+        values = []
+        if path:
+            values.extend(read_uf_file(path))
+        for year in years:
+            print("Descargando UF", year)
+            values.extend(_parse_uf_row(row) for row in uf_service.fetcher.history(year))
+
+        saved = import_uf_values(values)
+        print("Valores UF guardados:", saved)
+
+    """
+    Importa gastos históricos desde un CSV o XLSX, por lotes.
+    $ flask import-expenses gastos_2023.csv --condominium-id 3
+    """
+    @app.cli.command("import-expenses")
+    @click.argument("path", type=click.Path(exists=True, dir_okay=False))
+    @click.option("--condominium-id", type=int, required=True)
+    @click.option("--batch-size", default=2000, show_default=True)
+    def import_expenses_command(path, condominium_id, batch_size):
+        from api.expense_import import ImportFileError, import_expenses, iter_rows
+
+        with open(path, "rb") as f:
+            try:
+                report = import_expenses(iter_rows(f, path), condominium_id, batch_size)
+            except ImportFileError as e:
+                raise click.ClickException(str(e))
+
+        print("Filas procesadas:", report["processed"])
+        print("Gastos insertados:", report["inserted"])
+        print("Filas con error:", report["failed"])
+        for error in report["errors"][:50]:
+            print("  fila", error["row"], "->", "; ".join(error["errors"]))
+
+    """
+    Verifica que cada endpoint de listado ejecute una cantidad fija de sentencias SQL
+    (detecta N+1). No deja datos: todo corre en una transacción que se revierte.
+    $ flask check-query-budgets
+    """
+    @app.cli.command("check-query-budgets")
+    def check_query_budgets_command():
+        from api.query_budget import check_query_budgets
+
+        failures = 0
+        for url, count, budget, status_code in check_query_budgets(app):
+            ok = count <= budget and status_code == 200
+            failures += not ok
+            print("OK  " if ok else "FAIL", f"{count}/{budget} sentencias", status_code, url)
+
+        if failures:
+            raise click.ClickException(f"{failures} endpoints superan su presupuesto de SQL")
+        print("Todos los endpoints dentro del presupuesto")
+
+    """
+    Microbenchmark de los endpoints (p50/p99, memoria y tamaño de payload)
+    sobre una base vacía que se siembra con datos sintéticos. Usar una base
+    dedicada, por ejemplo:
+    $ DATABASE_URL=sqlite:////tmp/bench.db flask benchmark-endpoints --sizes 1000,100000 --output bench.json
+    $ flask benchmark-endpoints --sizes 1000,100000 --baseline bench.json
+    """
+    @app.cli.command("benchmark-endpoints")
+    @click.option("--sizes", default="1000,100000,1000000", help="Cantidades de gastos, separadas por coma")
+    @click.option("--repeat", default=20, type=int, help="Mediciones por ruta y tamaño")
+    @click.option("--condominiums", default=50, type=int)
+    @click.option("--seed", default=42, type=int)
+    @click.option("--output", type=click.Path(dir_okay=False), help="Archivo JSON de resultados")
+    @click.option("--baseline", type=click.Path(exists=True, dir_okay=False), help="JSON previo para comparar")
+    def benchmark_endpoints(sizes, repeat, condominiums, seed, output, baseline):
+        import json
+        from api.benchmark import compare_reports, run_benchmark, write_report
+
+        try:
+            sizes = [int(s) for s in sizes.split(",") if s.strip()]
+        except ValueError:
+            raise click.BadParameter("debe ser una lista de enteros", param_hint="--sizes")
+
+        try:
+            report = run_benchmark(app, sizes, condominiums=condominiums, repeat=repeat, seed=seed)
+        except RuntimeError as e:
+            raise click.ClickException(str(e))
+
+        for dataset in report["datasets"]:
+            print(f"\n{dataset['expenses']} gastos (siembra {dataset['seed_seconds']}s)")
+            for r in dataset["results"]:
+                print(
+                    f"  {r['route']:<42} p50 {r['p50_ms']:>9.2f}ms  p99 {r['p99_ms']:>9.2f}ms"
+                    f"  {r['payload_bytes']:>10}B  {r['peak_alloc_kb']}KB  {r['status']}"
+                )
+
+        if output:
+            write_report(report, output)
+            print(f"\nResultados en {output}")
+
+        if baseline:
+            with open(baseline, encoding="utf-8") as f:
+                rows = compare_reports(json.load(f), report)
+            print("\nComparación p50 (actual / baseline)")
+            for expenses, route, before, after, ratio in rows:
+                print(f"  {expenses:>8} {route:<42} {before:>9.2f} -> {after:>9.2f}ms  x{ratio}")
+
+    """
+    Genera las versiones .gz (y .br si está instalado brotli) de los
+    estáticos de dist/ para que se sirvan sin comprimir en cada request.
+    Se ejecuta en el build, después de `npm run build`.
+    $ flask precompress-static
+    """
+    @app.cli.command("precompress-static")
+    @click.option(
+        "--directory",
+        default=os.path.join(os.path.dirname(os.path.realpath(__file__)), "../../dist"),
+        type=click.Path(exists=True, file_okay=False),
+    )
+    def precompress_static_command(directory):
+        from api.compression import precompress_static
+
+        results = precompress_static(directory)
+        for path, size, sizes in results:
+            compressed = "  ".join(f"{encoding} {value}B" for encoding, value in sizes.items())
+            print(f"{path}: {size}B  {compressed or 'sin ganancia, omitido'}")
+        print(f"{len(results)} archivos procesados en {os.path.abspath(directory)}")
+
+    """
+    Perfil del import de app.py en un intérprete nuevo (lo que paga cada
+    arranque en frío) y control de presupuesto: falla si la mediana del
+    import supera --budget-ms (o STARTUP_BUDGET_MS).
+    $ flask profile-startup
+    $ flask profile-startup --runs 10 --budget-ms 700
+    """
+    @app.cli.command("profile-startup")
+    @click.option("--runs", default=5, type=int, help="Imports medidos (se usa la mediana)")
+    @click.option("--budget-ms", type=float, help="Máximo para el import de app.py")
+    @click.option("--top", default=15, type=int, help="Filas por tabla")
+    def profile_startup_command(runs, budget_ms, top):
+        from api.startup_profile import DEFAULT_BUDGET_MS, profile_startup
+
+        try:
+            profile = profile_startup(runs=runs, top=top)
+        except RuntimeError as e:
+            raise click.ClickException(str(e))
+
+        print("Imports de app.py (acumulado, ms)")
+        for name, ms in profile["direct_imports"]:
+            print(f"  {name:<40} {ms:>8.1f}")
+        print("Paquetes con más tiempo propio (ms)")
+        for name, ms in profile["packages"]:
+            print(f"  {name:<40} {ms:>8.1f}")
+
+        budget_ms = budget_ms or DEFAULT_BUDGET_MS
+        print(
+            f"\nimport app: {profile['import_ms']}ms, proceso completo: {profile['wall_ms']}ms "
+            f"(mediana de {profile['runs']}), presupuesto {budget_ms:g}ms"
+        )
+        if profile["import_ms"] > budget_ms:
+            raise click.ClickException(
+                f"El import de app.py ({profile['import_ms']}ms) supera el presupuesto de {budget_ms:g}ms"
+            )
+
+    """
+    Genera las miniaturas de documentos pendientes, por ejemplo los que
+    quedaron en la cola en memoria al reiniciar el servidor.
+    $ flask generate-previews
+    $ flask generate-previews --retry-failed
+    """
+    @app.cli.command("generate-previews")
+    @click.option("--retry-failed", is_flag=True, help="Reintenta también los fallidos")
+    def generate_previews_command(retry_failed):
+        from api.expense_documents import FAILED, PENDING, generate_pending_previews
+
+        statuses = (PENDING, FAILED) if retry_failed else (PENDING,)
+        results = generate_pending_previews(statuses=statuses)
+        for document_id, status in results:
+            print(f"Documento {document_id}: {status}")
+        print(f"{len(results)} documentos procesados")
+
+    """
+    Worker de jobs en segundo plano (cola en la tabla jobs, ver api/jobs.py).
+    Corre aparte de gunicorn; se puede levantar más de uno.
+    $ flask run-jobs --concurrency 2
+    $ flask run-jobs --once        (procesa lo pendiente y termina, para cron)
+    """
+    @app.cli.command("run-jobs")
+    @click.option("--concurrency", default=None, type=int, help="Jobs simultáneos (default JOB_CONCURRENCY)")
+    @click.option("--poll", default=1.0, type=float, help="Segundos entre consultas a la cola")
+    @click.option("--once", is_flag=True, help="Termina cuando la cola queda vacía")
+    def run_jobs_command(concurrency, poll, once):
+        import signal
+        from api.jobs import JOB_CONCURRENCY, JobWorker, queue_summary
+
+        worker = JobWorker(app, concurrency=concurrency or JOB_CONCURRENCY, poll_interval=poll)
+        # SIGTERM (deploy / reinicio): deja de tomar jobs y espera los que corren
+        signal.signal(signal.SIGTERM, lambda *_: worker.stop())
+
+        print(f"Worker {worker.worker_id}: concurrencia {worker.concurrency}, cola {queue_summary()}")
+        try:
+            worker.run(once=once)
+        except KeyboardInterrupt:
+            worker.stop()
+        print(f"Worker detenido, cola {queue_summary()}")
+
+    """
+    Encola un job desde la línea de comandos (por ejemplo desde un cron).
+    $ flask enqueue-job backfill_rollups
+    $ flask enqueue-job export_expenses --params '{"condominium_id": 1, "format": "xlsx"}'
+    """
+    @app.cli.command("enqueue-job")
+    @click.argument("kind")
+    @click.option("--params", default="{}", help="Parámetros del job en JSON")
+    def enqueue_job_command(kind, params):
+        import json
+        from api.jobs import JobError, enqueue
+
+        try:
+            params = json.loads(params)
+            job = enqueue(kind, params, condominium_id=params.get("condominium_id"))
+        except (JobError, ValueError, AttributeError) as e:
+            raise click.ClickException(str(e))
+        print(f"Job {job.id} ({job.kind}) encolado")
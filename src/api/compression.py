@@ -0,0 +1,136 @@
+"""
+Compresión de respuestas.
+
+- API: las respuestas JSON/texto de al menos COMPRESS_MIN_SIZE bytes se
+  comprimen con brotli o gzip según el Accept-Encoding del cliente.
+  Las respuestas en streaming (export) no se tocan.
+- Estáticos: `flask precompress-static` genera junto a cada archivo de
+  dist/ sus versiones .gz y .br en el build, y serve_any_other_file las
+  envía tal cual (ver api/static_files.py), sin comprimir en cada request.
+
+brotli es opcional: si no está instalado solo se usa gzip.
+
+Variables:
+    COMPRESS_MIN_SIZE  bytes mínimos para comprimir (default 1024)
+    COMPRESS_LEVEL     nivel de gzip para la API (default 6)
+"""
+import gzip
+import os
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # dependencia opcional
+    brotli = None
+
+COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", 1024))
+COMPRESS_LEVEL = int(os.getenv("COMPRESS_LEVEL", 6))
+COMPRESSIBLE_TYPES = ("application/json", "text/")
+
+# Extensiones de dist/ que vale la pena precomprimir
+STATIC_EXTENSIONS = (".js", ".css", ".html", ".svg", ".json", ".map", ".txt", ".ico", ".xml", ".webmanifest")
+STATIC_MIN_SIZE = 256
+
+# encoding -> extensión del archivo precomprimido
+STATIC_ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+def available_encodings():
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate_encoding(accept_encodings, available=None):
+    """
+    Mejor encoding que acepta el cliente (werkzeug MIMEAccept) entre los
+    disponibles, prefiriendo br. None si no acepta ninguno.
+    """
+    for encoding in available or available_encodings():
+        if accept_encodings[encoding] > 0:
+            return encoding
+    return None
+
+
+def compress(data, encoding, level=COMPRESS_LEVEL):
+    if encoding == "br":
+        return brotli.compress(data, quality=min(level, 11))
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+# ============================
+# RESPUESTAS DE LA API
+# ============================
+def _is_compressible(response):
+    return (
+        response.status_code == 200
+        and not response.direct_passthrough
+        and not response.is_streamed
+        and "Content-Encoding" not in response.headers
+        and response.mimetype is not None
+        and response.mimetype.startswith(COMPRESSIBLE_TYPES)
+        and (response.content_length or 0) >= COMPRESS_MIN_SIZE
+    )
+
+
+def _compress_response(response):
+    if not request.path.startswith("/api/") or not _is_compressible(response):
+        return response
+
+    response.vary.add("Accept-Encoding")
+    encoding = negotiate_encoding(request.accept_encodings)
+    if encoding is None:
+        return response
+
+    response.set_data(compress(response.get_data(), encoding))
+    response.headers["Content-Encoding"] = encoding
+
+    # El ETag identifica el contenido, no los bytes comprimidos: pasa a débil
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+
+    return response
+
+
+def setup_compression(app):
+    app.after_request(_compress_response)
+
+
+# ============================
+# ESTÁTICOS PRECOMPRIMIDOS
+# ============================
+def precompress_static(directory, min_size=STATIC_MIN_SIZE):
+    """
+    Escribe path.gz (y path.br si hay brotli) para cada archivo comprimible
+    de directory. Se saltan los que no se achican. Retorna
+    [(ruta relativa, tamaño original, {encoding: tamaño})].
+    """
+    encodings = [(e, ext) for e, ext in STATIC_ENCODINGS if e in available_encodings()]
+    results = []
+
+    for root, _, files in os.walk(directory):
+        for name in files:
+            if not name.endswith(STATIC_EXTENSIONS):
+                continue
+
+            path = os.path.join(root, name)
+            with open(path, "rb") as f:
+                data = f.read()
+            if len(data) < min_size:
+                continue
+
+            sizes = {}
+            for encoding, extension in encodings:
+                compressed = compress(data, encoding, level=11 if encoding == "br" else 9)
+                if len(compressed) >= len(data):
+                    continue
+                with open(path + extension, "wb") as f:
+                    f.write(compressed)
+                # Mismo mtime que el original para que ambos se invaliden juntos
+                stat = os.stat(path)
+                os.utime(path + extension, (stat.st_atime, stat.st_mtime))
+                sizes[encoding] = len(compressed)
+
+            results.append((os.path.relpath(path, directory), len(data), sizes))
+
+    return results
+
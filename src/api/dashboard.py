@@ -0,0 +1,253 @@
+"""
+Indicadores del dashboard de un condominio en una sola respuesta.
+
+condominium_dashboard() arma GET /api/condominios/<id>/dashboard con tres
+consultas agrupadas:
+
+1. expense_monthly_rollups del mes actual y el anterior (totales, por
+   categoría y por estado), sin recorrer los gastos.
+2. aggregate_expenses() por proveedor del mes actual (top N por monto).
+3. Gastos pendientes (estado distinto de Pagado/Anulado) agrupados por
+   estado, de todos los meses.
+
+El resultado se guarda en memoria por condominio durante
+DASHBOARD_CACHE_SECONDS. Al hacer commit de cambios en gastos se
+descarta la entrada de ese condominio en el worker que hizo el cambio;
+los demás workers la renuevan cuando vence. Las escrituras masivas que no
+pasan por objetos del ORM (expense_batch, expense_import) llaman a
+dashboard_cache.invalidate() después de su commit.
+
+Variables:
+    DASHBOARD_CACHE_SECONDS   vigencia de la caché (default 30, 0 la desactiva)
+"""
+import os
+import threading
+import time
+from datetime import date, datetime, timezone
+from sqlalchemy import and_, event, func, inspect, or_
+from sqlalchemy.orm import Session
+from api.models import db, Expense, ExpenseCategory, ExpenseMonthlyRollup, ExpenseStatus
+from api.expense_aggregates import aggregate_expenses, month_bounds
+
+DASHBOARD_CACHE_SECONDS = float(os.getenv("DASHBOARD_CACHE_SECONDS", 30))
+DASHBOARD_CACHE_MAX_ENTRIES = 1000
+DEFAULT_TOP_PROVIDERS = 5
+MAX_TOP_PROVIDERS = 20
+
+# Estados que cierran un gasto; el resto (o sin estado) cuenta como pendiente
+FINAL_STATUSES = ("Pagado", "Anulado")
+
+
+# ============================
+# CACHÉ
+# ============================
+class DashboardCache:
+    """Respuestas por (condominio, parámetros) con vencimiento, por worker."""
+
+    def __init__(self, ttl=DASHBOARD_CACHE_SECONDS, max_entries=DASHBOARD_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None or time.monotonic() >= entry[0]:
+            return None
+        return entry[1]
+
+    def set(self, key, value):
+        if self.ttl <= 0:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._entries = {k: e for k, e in self._entries.items() if e[0] > now}
+                if len(self._entries) >= self.max_entries:
+                    self._entries.clear()
+            self._entries[key] = (now + self.ttl, value)
+
+    def invalidate(self, condominium_ids):
+        with self._lock:
+            self._entries = {
+                k: e for k, e in self._entries.items() if k[0] not in condominium_ids
+            }
+
+
+dashboard_cache = DashboardCache()
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changed_condominiums(session, flush_context):
+    changed = set()
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, Expense):
+            changed.add(obj.condominium_id)
+            # Un gasto movido de condominio cambia también los KPIs del anterior
+            changed.update(inspect(obj).attrs.condominium_id.history.deleted)
+    if changed:
+        session.info.setdefault("dashboard_condominiums", set()).update(changed)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_condominiums(session):
+    # Después del commit: una lectura concurrente no puede volver a cachear lo anterior
+    changed = session.info.pop("dashboard_condominiums", None)
+    if changed:
+        dashboard_cache.invalidate({int(c) for c in changed if c is not None})
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changed_condominiums(session):
+    session.info.pop("dashboard_condominiums", None)
+
+
+# ============================
+# CONSULTAS
+# ============================
+def previous_month(year, month):
+    return (year - 1, 12) if month == 1 else (year, month - 1)
+
+
+def _month_rollups(condominium_id, months):
+    """Filas del rollup de los meses pedidos, con nombre de categoría y estado."""
+    return (
+        db.session.query(
+            ExpenseMonthlyRollup.year,
+            ExpenseMonthlyRollup.month,
+            ExpenseMonthlyRollup.category_id,
+            ExpenseCategory.name,
+            ExpenseMonthlyRollup.expense_status_id,
+            ExpenseStatus.name,
+            ExpenseMonthlyRollup.total_amount,
+            ExpenseMonthlyRollup.expense_count,
+        )
+        .outerjoin(ExpenseCategory, ExpenseCategory.id == ExpenseMonthlyRollup.category_id)
+        .outerjoin(ExpenseStatus, ExpenseStatus.id == ExpenseMonthlyRollup.expense_status_id)
+        .filter(
+            ExpenseMonthlyRollup.condominium_id == condominium_id,
+            ExpenseMonthlyRollup.expense_count != 0,
+            or_(*(
+                and_(ExpenseMonthlyRollup.year == y, ExpenseMonthlyRollup.month == m)
+                for y, m in months
+            )),
+        )
+        .all()
+    )
+
+
+def _pending_by_status(condominium_id):
+    rows = (
+        db.session.query(
+            Expense.expense_status_id,
+            ExpenseStatus.name,
+            func.coalesce(func.sum(Expense.amount), 0),
+            func.count(Expense.id),
+        )
+        .outerjoin(ExpenseStatus, ExpenseStatus.id == Expense.expense_status_id)
+        .filter(
+            Expense.condominium_id == condominium_id,
+            or_(ExpenseStatus.id.is_(None), ExpenseStatus.name.notin_(FINAL_STATUSES)),
+        )
+        .group_by(Expense.expense_status_id, ExpenseStatus.name)
+        .order_by(Expense.expense_status_id)
+        .all()
+    )
+    return [
+        {
+            "expense_status_id": status_id,
+            "status_name": name,
+            "total_amount": float(total),
+            "count": count,
+        }
+        for status_id, name, total, count in rows
+    ]
+
+
+def _sorted_by_amount(groups):
+    return sorted(groups.values(), key=lambda g: g["total_amount"], reverse=True)
+
+
+def _change(current, previous):
+    difference = current - previous
+    return {
+        "amount": round(difference, 2),
+        "percent": round(difference * 100 / previous, 1) if previous else None,
+    }
+
+
+def condominium_dashboard(condominium_id, top=DEFAULT_TOP_PROVIDERS, today=None):
+    """KPIs del mes actual vs el anterior para el condominio (ver docstring del módulo)."""
+    today = today or date.today()
+    current = (today.year, today.month)
+    previous = previous_month(*current)
+
+    months = {
+        key: {"year": key[0], "month": key[1], "total_amount": 0.0, "count": 0}
+        for key in (current, previous)
+    }
+    categories = {}
+    statuses = {}
+
+    for year, month, category_id, category_name, status_id, status_name, total, count in (
+        _month_rollups(condominium_id, (current, previous))
+    ):
+        total = float(total)
+        summary = months[(year, month)]
+        summary["total_amount"] += total
+        summary["count"] += count
+
+        category = categories.setdefault(category_id, {
+            "category_id": category_id,
+            "category_name": category_name,
+            "total_amount": 0.0,
+            "count": 0,
+            "previous_total_amount": 0.0,
+        })
+        if (year, month) == current:
+            category["total_amount"] += total
+            category["count"] += count
+
+            status = statuses.setdefault(status_id, {
+                "expense_status_id": status_id,
+                "status_name": status_name,
+                "total_amount": 0.0,
+                "count": 0,
+            })
+            status["total_amount"] += total
+            status["count"] += count
+        else:
+            category["previous_total_amount"] += total
+
+    start, end = month_bounds(*current)
+    providers = aggregate_expenses(condominium_id, start, end, ("provider",))
+    providers.sort(key=lambda p: p["total_amount"], reverse=True)
+
+    pending = _pending_by_status(condominium_id)
+
+    return {
+        "condominium_id": condominium_id,
+        "generated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "currency": "CLP",
+        "current_month": months[current],
+        "previous_month": months[previous],
+        "change": _change(months[current]["total_amount"], months[previous]["total_amount"]),
+        "by_category": _sorted_by_amount(categories),
+        "by_status": _sorted_by_amount(statuses),
+        "top_providers": providers[:top],
+        "pending": {
+            "total_amount": sum(p["total_amount"] for p in pending),
+            "count": sum(p["count"] for p in pending),
+            "by_status": pending,
+        },
+    }
+
+
+def cached_condominium_dashboard(condominium_id, top=DEFAULT_TOP_PROVIDERS):
+    """condominium_dashboard() desde la caché si la entrada sigue vigente."""
+    key = (condominium_id, top, date.today())
+    payload = dashboard_cache.get(key)
+    if payload is None:
+        payload = condominium_dashboard(condominium_id, top, today=key[2])
+        dashboard_cache.set(key, payload)
+    return payload
@@ -0,0 +1,111 @@
+"""
+Configuración del pool de conexiones de SQLAlchemy desde variables de entorno
+y métricas del pool (espera de checkout, conexiones en uso / libres).
+
+Variables:
+    DB_POOL_SIZE       conexiones persistentes por worker (default 5)
+    DB_MAX_OVERFLOW    conexiones extra temporales (default 5)
+    DB_POOL_TIMEOUT    segundos máximos esperando una conexión (default 10)
+    DB_POOL_RECYCLE    segundos antes de reciclar una conexión (default 1800)
+    DB_POOL_PRE_PING   1/0, valida la conexión antes de usarla (default 1)
+    DB_PGBOUNCER       1 si se conecta a PgBouncer en modo transaction pooling:
+                       se desactiva el pool local (NullPool) y PgBouncer es
+                       quien reutiliza las conexiones.
+"""
+import os
+import threading
+import time
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import NullPool, QueuePool
+
+
+def _env_int(name, default):
+    return int(os.getenv(name, default))
+
+
+def _env_flag(name, default):
+    return os.getenv(name, default).lower() in ("1", "true", "yes")
+
+
+class PoolMetrics:
+    """Contadores del proceso actual; cada worker de gunicorn tiene los suyos."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.timeouts = 0
+            self.wait_seconds_total = 0.0
+            self.wait_seconds_max = 0.0
+
+    def observe_wait(self, seconds, timed_out=False):
+        with self._lock:
+            self.checkouts += 1
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+            if timed_out:
+                self.timeouts += 1
+
+
+pool_metrics = PoolMetrics()
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool que mide cuánto espera cada checkout por una conexión libre."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            pool_metrics.observe_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        pool_metrics.observe_wait(time.perf_counter() - start)
+        return connection
+
+
+def engine_options_from_env(database_uri):
+    """Opciones para SQLALCHEMY_ENGINE_OPTIONS según la base y el entorno."""
+    if database_uri.startswith("sqlite"):
+        # SQLite local: el pool por defecto de SQLAlchemy es suficiente
+        return {}
+
+    if _env_flag("DB_PGBOUNCER", "0"):
+        return {"poolclass": NullPool}
+
+    return {
+        "poolclass": TimedQueuePool,
+        "pool_size": _env_int("DB_POOL_SIZE", 5),
+        "max_overflow": _env_int("DB_MAX_OVERFLOW", 5),
+        "pool_timeout": _env_int("DB_POOL_TIMEOUT", 10),
+        "pool_recycle": _env_int("DB_POOL_RECYCLE", 1800),
+        "pool_pre_ping": _env_flag("DB_POOL_PRE_PING", "1"),
+    }
+
+
+def pool_status(engine):
+    """Estado actual del pool del engine más las métricas acumuladas."""
+    pool = engine.pool
+    status = {"pool_class": type(pool).__name__}
+
+    if isinstance(pool, QueuePool):
+        status.update({
+            "size": pool.size(),
+            "in_use": pool.checkedout(),
+            "idle": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": pool._max_overflow,
+        })
+
+    with pool_metrics._lock:
+        status.update({
+            "checkouts": pool_metrics.checkouts,
+            "checkout_timeouts": pool_metrics.timeouts,
+            "checkout_wait_seconds_total": round(pool_metrics.wait_seconds_total, 6),
+            "checkout_wait_seconds_max": round(pool_metrics.wait_seconds_max, 6),
+        })
+
+    return status
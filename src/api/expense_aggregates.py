@@ -0,0 +1,152 @@
+"""
+Agregaciones de gastos resueltas en la base de datos (SUM / COUNT / GROUP BY)
+para que los totales del dashboard no dependan de la cantidad de filas.
+"""
+from datetime import date
+from sqlalchemy import extract, func
+from api.models import db, Expense, ExpenseCategory, ExpenseStatus, Provider
+from api.uf_history import UFConverter
+
+# dimension -> (columnas a agrupar, entidad de nombre, condición de join)
+GROUP_DIMENSIONS = {
+    "month": (
+        [
+            extract("year", Expense.expense_date).label("year"),
+            extract("month", Expense.expense_date).label("month"),
+        ],
+        None,
+        None,
+    ),
+    "category": (
+        [
+            Expense.category_id.label("category_id"),
+            ExpenseCategory.name.label("category_name"),
+        ],
+        ExpenseCategory,
+        ExpenseCategory.id == Expense.category_id,
+    ),
+    "provider": (
+        [
+            Expense.provider_id.label("provider_id"),
+            Provider.name.label("provider_name"),
+        ],
+        Provider,
+        Provider.id == Expense.provider_id,
+    ),
+    "status": (
+        [
+            Expense.expense_status_id.label("expense_status_id"),
+            ExpenseStatus.name.label("status_name"),
+        ],
+        ExpenseStatus,
+        ExpenseStatus.id == Expense.expense_status_id,
+    ),
+}
+
+
+def month_bounds(year, month):
+    """Devuelve (inicio, fin) del mes, con fin exclusivo."""
+    start = date(year, month, 1)
+    if month == 12:
+        end = date(year + 1, 1, 1)
+    else:
+        end = date(year, month + 1, 1)
+    return start, end
+
+
+def parse_month(value):
+    """Convierte 'YYYY-MM' en (year, month). Lanza ValueError si no es válido."""
+    try:
+        year, month = (int(part) for part in value.split("-"))
+        date(year, month, 1)
+    except (ValueError, TypeError, AttributeError):
+        raise ValueError("El mes debe tener formato YYYY-MM")
+    return year, month
+
+
+def aggregate_expenses(condominium_id, start, end, group_by=(), filters=(), currency="CLP"):
+    """
+    Suma y cuenta los gastos de un condominio con expense_date en [start, end),
+    agrupando por las dimensiones pedidas en una sola consulta.
+
+    Retorna una lista de dicts con las columnas de agrupación más
+    total_amount (float) y count. Con currency="UF" agrega total_amount_uf,
+    convirtiendo cada día con su UF vigente.
+    """
+    unknown = [g for g in group_by if g not in GROUP_DIMENSIONS]
+    if unknown:
+        raise ValueError(
+            f"group_by inválido: {', '.join(unknown)}. "
+            f"Opciones: {', '.join(GROUP_DIMENSIONS)}"
+        )
+
+    group_columns = []
+    joins = []
+    for dimension in group_by:
+        columns, entity, on_clause = GROUP_DIMENSIONS[dimension]
+        group_columns.extend(columns)
+        if entity is not None:
+            joins.append((entity, on_clause))
+
+    select_columns = list(group_columns)
+    if currency == "UF":
+        # Se agrupa además por día para convertir con la UF de cada fecha
+        select_columns.append(Expense.expense_date.label("expense_date"))
+
+    query = db.session.query(
+        *select_columns,
+        func.coalesce(func.sum(Expense.amount), 0).label("total_amount"),
+        func.count(Expense.id).label("count"),
+    ).select_from(Expense)
+
+    for entity, on_clause in joins:
+        query = query.outerjoin(entity, on_clause)
+
+    query = query.filter(
+        Expense.condominium_id == condominium_id,
+        Expense.expense_date >= start,
+        Expense.expense_date < end,
+        *filters
+    )
+
+    if select_columns:
+        query = query.group_by(*select_columns).order_by(*select_columns)
+
+    rows = [row._asdict() for row in query.all()]
+
+    if currency == "UF":
+        rows = _fold_uf_rows(rows, start, end)
+
+    for item in rows:
+        item["total_amount"] = float(item["total_amount"] or 0)
+        for key in ("year", "month"):
+            if item.get(key) is not None:
+                item[key] = int(item[key])
+
+    return rows
+
+
+def _fold_uf_rows(rows, start, end):
+    """Convierte las sumas diarias a UF y las reagrupa sin la columna de fecha."""
+    converter = UFConverter.for_range(start, end)
+    converted = converter.convert(
+        [r["total_amount"] for r in rows],
+        [r["expense_date"] for r in rows],
+    )
+
+    folded = {}
+    for row, amount_uf in zip(rows, converted):
+        row.pop("expense_date")
+        key = tuple(v for k, v in row.items() if k not in ("total_amount", "count"))
+        item = folded.get(key)
+        if item is None:
+            item = folded[key] = dict(row, total_amount=0, count=0, total_amount_uf=0.0)
+        item["total_amount"] += row["total_amount"]
+        item["count"] += row["count"]
+        if amount_uf is None or item["total_amount_uf"] is None:
+            # Falta la UF de algún día: el total en UF no es confiable
+            item["total_amount_uf"] = None
+        else:
+            item["total_amount_uf"] = round(item["total_amount_uf"] + amount_uf, 4)
+
+    return list(folded.values())
@@ -0,0 +1,229 @@
+"""
+Actualización masiva de gastos en una sola transacción.
+
+Las filas que reciben los mismos cambios (y esperan la misma versión) se
+actualizan con un único UPDATE ... WHERE id IN (...) AND version = ?; las
+que el UPDATE no alcanza porque otra escritura cambió su versión se
+informan como conflicto. Las filas se bloquean (SELECT ... FOR UPDATE)
+antes de leer los totales, así el rollup mensual se ajusta comparando los
+totales agrupados de las filas afectadas antes y después del UPDATE.
+"""
+from collections import defaultdict
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from sqlalchemy import select, update
+from api.models import db, Expense, ExpenseCategory, ExpenseStatus, Provider
+from api.expense_rollups import apply_rollup_difference, grouped_expense_totals
+from api.expense_import import MAX_AMOUNT
+from api.dashboard import dashboard_cache
+
+MAX_BATCH_ROWS = 5000
+
+
+class BatchUpdateError(Exception):
+    """El body del batch no es válido; no se aplicó ningún cambio."""
+
+
+def _to_int(value):
+    return int(value)
+
+
+def _to_date(value):
+    return datetime.strptime(str(value).split("T")[0], "%Y-%m-%d").date()
+
+
+def _to_amount(value):
+    amount = Decimal(str(value)).quantize(Decimal("0.01"))
+    if amount < 0 or amount > MAX_AMOUNT:
+        raise ValueError("monto fuera de rango")
+    return amount
+
+
+def _to_text(value):
+    return None if value is None else str(value)
+
+
+# Campos editables por batch y su conversión
+BATCH_FIELDS = {
+    "expense_status_id": _to_int,
+    "category_id": _to_int,
+    "provider_id": _to_int,
+    "expense_date": _to_date,
+    "amount": _to_amount,
+    "document_number": _to_text,
+    "observation": _to_text,
+}
+
+
+# Campos que referencian otra tabla: deben existir (SQLite no valida las FK)
+REFERENCE_FIELDS = {
+    "expense_status_id": ExpenseStatus,
+    "category_id": ExpenseCategory,
+    "provider_id": Provider,
+}
+
+
+def parse_changes(data, context="changes"):
+    """Valida y convierte los campos a modificar. Ignora id y version."""
+    changes = {}
+    for field, value in data.items():
+        if field in ("id", "version"):
+            continue
+        if field not in BATCH_FIELDS:
+            raise BatchUpdateError(f"{context}: campo no editable '{field}'")
+        try:
+            changes[field] = BATCH_FIELDS[field](value)
+        except (TypeError, ValueError, InvalidOperation):
+            raise BatchUpdateError(f"{context}: valor inválido para '{field}'")
+    if not changes:
+        raise BatchUpdateError(f"{context}: no hay campos para actualizar")
+    return changes
+
+
+def validate_references(changes_list):
+    """Una consulta por tabla referenciada; falla si algún id no existe."""
+    for field, model in REFERENCE_FIELDS.items():
+        wanted = {changes[field] for changes in changes_list if field in changes}
+        if not wanted:
+            continue
+        found = set(db.session.execute(select(model.id).where(model.id.in_(wanted))).scalars())
+        missing = sorted(wanted - found)
+        if missing:
+            raise BatchUpdateError(f"{field} no existe: {', '.join(map(str, missing))}")
+
+
+def _update_group(changes, version, group_ids):
+    """UPDATE de un grupo; retorna el set de ids efectivamente modificados."""
+    expenses = Expense.__table__
+    values = dict(changes, version=expenses.c.version + 1)
+    criteria = [] if version is None else [expenses.c.version == version]
+
+    if db.engine.dialect.update_returning:
+        return set(db.session.execute(
+            update(expenses)
+            .where(expenses.c.id.in_(group_ids), *criteria)
+            .values(**values)
+            .returning(expenses.c.id)
+        ).scalars())
+
+    # Sin RETURNING: una sentencia por id para saber cuáles cambiaron
+    changed = set()
+    for expense_id in group_ids:
+        result = db.session.execute(
+            update(expenses).where(expenses.c.id == expense_id, *criteria).values(**values)
+        )
+        if result.rowcount:
+            changed.add(expense_id)
+    return changed
+
+
+def _apply_groups(groups):
+    """
+    groups: {(tupla de cambios, versión esperada o None): [ids]}. Ejecuta un
+    UPDATE por grupo, ajusta el rollup y hace commit. Retorna
+    ([{id, version}] de las filas cambiadas, [ids en conflicto]).
+    """
+    ids = [expense_id for group_ids in groups.values() for expense_id in group_ids]
+    if not ids:
+        return [], []
+
+    changed = set()
+    try:
+        # Bloquea las filas: los totales de antes y después quedan consistentes
+        db.session.execute(select(Expense.id).where(Expense.id.in_(ids)).with_for_update())
+        before = grouped_expense_totals(Expense.id.in_(ids))
+        for (change_key, version), group_ids in groups.items():
+            changed |= _update_group(dict(change_key), version, group_ids)
+        after = grouped_expense_totals(Expense.id.in_(ids))
+        apply_rollup_difference(before, after)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    # UPDATE de Core: el dashboard no lo ve en los eventos de la sesión
+    dashboard_cache.invalidate({key[0] for key in before})
+
+    updated = [
+        {"id": expense_id, "version": version}
+        for expense_id, version in (
+            db.session.query(Expense.id, Expense.version)
+            .filter(Expense.id.in_(changed))
+            .order_by(Expense.id)
+        )
+    ] if changed else []
+    return updated, sorted(set(ids) - changed)
+
+
+def apply_batch_updates(condominium_id, updates):
+    """
+    updates: [{"id", "version"?, campos...}]. Si viene version y no coincide
+    con la actual, la fila se omite y se informa como conflicto.
+    """
+    if not isinstance(updates, list) or not updates:
+        raise BatchUpdateError("updates debe ser una lista no vacía")
+    if len(updates) > MAX_BATCH_ROWS:
+        raise BatchUpdateError(f"Máximo {MAX_BATCH_ROWS} filas por batch")
+
+    parsed = []
+    for i, item in enumerate(updates):
+        if not isinstance(item, dict) or not str(item.get("id", "")).isdigit():
+            raise BatchUpdateError(f"updates[{i}]: id requerido")
+        version = item.get("version")
+        if version is not None and not str(version).isdigit():
+            raise BatchUpdateError(f"updates[{i}]: version inválida")
+        parsed.append((
+            int(item["id"]),
+            int(version) if version is not None else None,
+            parse_changes(item, f"updates[{i}]"),
+        ))
+
+    ids = [expense_id for expense_id, _, _ in parsed]
+    if len(set(ids)) != len(ids):
+        raise BatchUpdateError("updates tiene ids repetidos")
+    validate_references([changes for _, _, changes in parsed])
+
+    current = set(
+        db.session.execute(
+            select(Expense.id).where(Expense.id.in_(ids), Expense.condominium_id == condominium_id)
+        ).scalars()
+    )
+
+    not_found = []
+    groups = defaultdict(list)
+    for expense_id, version, changes in parsed:
+        if expense_id not in current:
+            not_found.append(expense_id)
+        else:
+            # La versión va en el WHERE del UPDATE: si no coincide, es conflicto
+            groups[(tuple(sorted(changes.items())), version)].append(expense_id)
+
+    updated, conflicts = _apply_groups(groups)
+    return {
+        "updated": updated,
+        "conflicts": conflicts,
+        "not_found": not_found,
+    }
+
+
+def apply_filter_update(filters, changes):
+    """Aplica los mismos cambios a todos los gastos que cumplen filters."""
+    changes = parse_changes(changes)
+    validate_references([changes])
+
+    ids = [
+        row[0]
+        for row in db.session.query(Expense.id)
+        .filter(*filters)
+        .limit(MAX_BATCH_ROWS + 1)
+    ]
+    if len(ids) > MAX_BATCH_ROWS:
+        raise BatchUpdateError(
+            f"El filtro afecta más de {MAX_BATCH_ROWS} gastos; acótalo"
+        )
+
+    updated, conflicts = _apply_groups({(tuple(sorted(changes.items())), None): ids})
+    return {
+        "updated": updated,
+        "conflicts": conflicts,
+        "not_found": [],
+    }
@@ -0,0 +1,349 @@
+"""
+Documentos adjuntos de gastos (facturas, boletas, cotizaciones).
+
+Subida: el parser multipart de werkzeug escribe cada archivo por chunks
+en un temporal dentro de UPLOAD_DIR (DocumentUploadRequest), calculando
+el sha256 y el tamaño mientras escribe; el archivo nunca queda completo
+en memoria. Al guardar, el temporal se enlaza como blobs/<ab>/<sha256>:
+el contenido se guarda una sola vez aunque la misma factura se suba de
+nuevo, y cada ExpenseDocument apunta a su blob.
+
+Miniaturas: se generan fuera del request, en un pool de threads
+(PreviewWorker), y quedan en thumbs/<ab>/<sha256>.jpg, también una por
+contenido. Imágenes con Pillow y PDFs (primera página) con pdftoppm de
+poppler-utils; ambos son opcionales: sin ellos el documento queda como
+"unsupported" y se sirve solo el original. `flask generate-previews`
+procesa los pendientes (por ejemplo, los que quedaron en cola al
+reiniciar).
+
+Variables:
+    UPLOAD_DIR           carpeta de documentos (default ../uploads desde src/)
+    MAX_DOCUMENT_MB      tamaño máximo por archivo (default 20)
+    PREVIEW_WORKERS      threads que generan miniaturas (default 1)
+
+En Render el disco del servicio es efímero: UPLOAD_DIR debe apuntar a un
+disco persistente.
+"""
+import hashlib
+import io
+import mimetypes
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import suppress
+from flask import Request
+from werkzeug.exceptions import RequestEntityTooLarge
+from api.models import db, Expense, ExpenseDocument
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # dependencia opcional
+    Image = None
+
+UPLOAD_DIR = os.path.realpath(os.getenv(
+    "UPLOAD_DIR",
+    os.path.join(os.path.dirname(os.path.realpath(__file__)), "../../uploads"),
+))
+MAX_DOCUMENT_SIZE = int(float(os.getenv("MAX_DOCUMENT_MB", 20)) * 1024 * 1024)
+MAX_DOCUMENTS_PER_REQUEST = 10
+PREVIEW_WORKERS = int(os.getenv("PREVIEW_WORKERS", 1))
+
+DOCUMENT_TYPES = ("invoice", "receipt", "quote")
+THUMBNAIL_SIZE = 320
+CHUNK_SIZE = 64 * 1024
+
+# Endpoints cuyos archivos se escriben directo al área de subidas -> tamaño máximo
+UPLOAD_ENDPOINTS = {
+    "expenses_bp.create_expense": MAX_DOCUMENT_SIZE,
+    "expense_documents_bp.upload_expense_documents": MAX_DOCUMENT_SIZE,
+    # Archivos de import_expenses (ver api/jobs.py), sin límite como /expenses/import
+    "jobs_bp.create_job": None,
+}
+
+# preview_status
+PENDING = "pending"
+READY = "ready"
+UNSUPPORTED = "unsupported"
+FAILED = "failed"
+
+
+class DocumentError(ValueError):
+    pass
+
+
+def _ensure_dir(path):
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _sharded(kind, sha256, suffix=""):
+    """Ruta relativa a UPLOAD_DIR: blobs/ab/abcdef... o thumbs/ab/abcdef....jpg"""
+    return f"{kind}/{sha256[:2]}/{sha256}{suffix}"
+
+
+def absolute_path(relative_path):
+    return os.path.join(UPLOAD_DIR, relative_path)
+
+
+# ============================
+# SUBIDA EN STREAMING
+# ============================
+class UploadFile(io.BufferedRandom):
+    """Temporal en disco que calcula sha256 y tamaño mientras se escribe."""
+
+    def __init__(self, limit=None):
+        fd, self.path = tempfile.mkstemp(prefix="upload-", dir=_ensure_dir(absolute_path("tmp")))
+        super().__init__(io.FileIO(fd, "r+"))
+        self.hash = hashlib.sha256()
+        self.size = 0
+        self.limit = limit
+
+    def write(self, data):
+        self.size += len(data)
+        if self.limit is not None and self.size > self.limit:
+            raise RequestEntityTooLarge(
+                f"Cada documento puede pesar hasta {self.limit // (1024 * 1024)} MB"
+            )
+        self.hash.update(data)
+        return super().write(data)
+
+    def close(self):
+        try:
+            super().close()
+        finally:
+            # El blob definitivo es un hard link: borrar el temporal no lo afecta
+            with suppress(FileNotFoundError):
+                os.unlink(self.path)
+
+
+class DocumentUploadRequest(Request):
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if self.endpoint in UPLOAD_ENDPOINTS:
+            return UploadFile(limit=UPLOAD_ENDPOINTS[self.endpoint])
+        return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+
+
+def _as_upload_file(stream):
+    """El stream ya hasheado, o una copia por chunks si vino de otro lado."""
+    if isinstance(stream, UploadFile):
+        stream.flush()
+        return stream, False
+
+    upload = UploadFile()
+    for chunk in iter(lambda: stream.read(CHUNK_SIZE), b""):
+        upload.write(chunk)
+    upload.flush()
+    return upload, True
+
+
+def store_blob(stream):
+    """
+    Guarda el contenido en blobs/ si no existía. Retorna
+    (sha256, tamaño, ruta relativa).
+    """
+    upload, owned = _as_upload_file(stream)
+    try:
+        sha256 = upload.hash.hexdigest()
+        relative_path = _sharded("blobs", sha256)
+        target = absolute_path(relative_path)
+
+        if not os.path.exists(target):
+            _ensure_dir(os.path.dirname(target))
+            try:
+                os.link(upload.path, target)
+            except FileExistsError:
+                pass  # otro request subió el mismo contenido
+            except OSError:
+                # Sin hard links (otro filesystem): copia y rename atómico
+                partial = f"{target}.{os.getpid()}.{threading.get_ident()}.part"
+                shutil.copyfile(upload.path, partial)
+                os.replace(partial, target)
+
+        return sha256, upload.size, relative_path
+    finally:
+        if owned:
+            upload.close()
+
+
+def release_blob(relative_path):
+    """
+    Borra un blob que ningún ExpenseDocument usa (por ejemplo, el archivo
+    de un import ya procesado). Los blobs se comparten por contenido: si
+    la misma factura está adjunta a un gasto, se conserva. Retorna True si
+    lo borró.
+    """
+    if not relative_path.startswith("blobs/"):
+        return False
+    in_use = db.session.query(ExpenseDocument.id).filter(
+        ExpenseDocument.file_path == relative_path
+    ).first()
+    if in_use:
+        return False
+    with suppress(FileNotFoundError):
+        os.unlink(absolute_path(relative_path))
+    return True
+
+
+def _content_type(upload):
+    guessed = mimetypes.guess_type(upload.filename or "")[0]
+    return guessed or upload.mimetype or "application/octet-stream"
+
+
+def attach_documents(expense, uploads, document_type=None):
+    """
+    Guarda los archivos y agrega sus ExpenseDocument a la sesión (sin
+    commit). Un archivo con el mismo contenido que otro documento del
+    gasto no se duplica. Retorna los documentos nuevos.
+    """
+    uploads = [u for u in uploads if u and u.filename]
+    if len(uploads) > MAX_DOCUMENTS_PER_REQUEST:
+        raise DocumentError(f"Máximo {MAX_DOCUMENTS_PER_REQUEST} documentos por request")
+    if document_type is not None and document_type not in DOCUMENT_TYPES:
+        raise DocumentError(f"document_type debe ser uno de: {', '.join(DOCUMENT_TYPES)}")
+
+    existing = {doc.sha256 for doc in expense.documents}
+    documents = []
+    for upload in uploads:
+        sha256, size, relative_path = store_blob(upload.stream)
+        if sha256 in existing:
+            continue
+        existing.add(sha256)
+
+        # Si el contenido ya tiene miniatura (otro gasto), se reutiliza
+        thumbnail_path = _sharded("thumbs", sha256, ".jpg")
+        has_thumbnail = os.path.exists(absolute_path(thumbnail_path))
+
+        documents.append(ExpenseDocument(
+            expense=expense,
+            document_type=document_type,
+            file_path=relative_path,
+            original_name=os.path.basename(upload.filename)[:255],
+            content_type=_content_type(upload)[:100],
+            size=size,
+            sha256=sha256,
+            thumbnail_path=thumbnail_path if has_thumbnail else None,
+            preview_status=READY if has_thumbnail else PENDING,
+        ))
+
+    db.session.add_all(documents)
+    return documents
+
+
+# ============================
+# MINIATURAS
+# ============================
+def _render_image(source, target):
+    if Image is None:
+        return False
+    with Image.open(source) as image:
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((THUMBNAIL_SIZE, THUMBNAIL_SIZE))
+        image.convert("RGB").save(target, "JPEG", quality=80, optimize=True)
+    return True
+
+
+def _render_pdf(source, target):
+    pdftoppm = shutil.which("pdftoppm")
+    if pdftoppm is None:
+        return False
+    prefix = target[:-len(".jpg")]
+    subprocess.run(
+        [pdftoppm, "-f", "1", "-l", "1", "-singlefile", "-jpeg",
+         "-scale-to", str(THUMBNAIL_SIZE), source, prefix],
+        check=True, capture_output=True, timeout=60,
+    )
+    return True
+
+
+def render_thumbnail(source, content_type, target):
+    """Escribe target (JPEG). False si no hay cómo generar este tipo."""
+    if content_type.startswith("image/"):
+        return _render_image(source, target)
+    if content_type == "application/pdf":
+        return _render_pdf(source, target)
+    return False
+
+
+def generate_preview(document):
+    """Genera (o reutiliza) la miniatura del documento y actualiza su estado."""
+    thumbnail_path = _sharded("thumbs", document.sha256, ".jpg")
+    target = absolute_path(thumbnail_path)
+
+    if not os.path.exists(target):
+        _ensure_dir(os.path.dirname(target))
+        partial = f"{target[:-len('.jpg')]}.{os.getpid()}.{threading.get_ident()}.jpg"
+        try:
+            rendered = render_thumbnail(absolute_path(document.file_path), document.content_type or "", partial)
+            if rendered:
+                os.replace(partial, target)
+        except Exception:
+            document.preview_status = FAILED
+            return document.preview_status
+        finally:
+            with suppress(FileNotFoundError):
+                os.unlink(partial)
+
+        if not rendered:
+            document.preview_status = UNSUPPORTED
+            return document.preview_status
+
+    document.thumbnail_path = thumbnail_path
+    document.preview_status = READY
+    return document.preview_status
+
+
+def generate_pending_previews(document_ids=None, statuses=(PENDING,), condominium_id=None):
+    """
+    Procesa los documentos indicados (o todos los pendientes), solo los de
+    gastos de condominium_id si se indica. Hace commit por documento.
+    """
+    query = ExpenseDocument.query.filter(ExpenseDocument.preview_status.in_(statuses))
+    if document_ids is not None:
+        query = query.filter(ExpenseDocument.id.in_(document_ids))
+    if condominium_id is not None:
+        query = query.join(Expense, Expense.id == ExpenseDocument.expense_id).filter(
+            Expense.condominium_id == condominium_id
+        )
+
+    results = []
+    for document in query.order_by(ExpenseDocument.id).all():
+        results.append((document.id, generate_preview(document)))
+        db.session.commit()
+    return results
+
+
+class PreviewWorker:
+    """Pool de threads para miniaturas; se crea con el primer envío (después del fork)."""
+
+    def __init__(self, max_workers=PREVIEW_WORKERS):
+        self.max_workers = max_workers
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def submit(self, app, document_ids):
+        if not document_ids:
+            return None
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="previews"
+                )
+        return self._executor.submit(self._run, app, list(document_ids))
+
+    @staticmethod
+    def _run(app, document_ids):
+        with app.app_context():
+            try:
+                return generate_pending_previews(document_ids)
+            finally:
+                db.session.remove()
+
+
+preview_worker = PreviewWorker()
+
+
+def setup_documents(app):
+    app.request_class = DocumentUploadRequest
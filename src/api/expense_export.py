@@ -0,0 +1,96 @@
+"""
+Export de gastos a CSV / XLSX por chunks, sin armar el archivo completo en
+memoria. Lo usan la descarga en streaming (GET
+/api/expenses/condominium/export) y el job export_expenses.
+"""
+import csv
+import io
+import tempfile
+from api.models import db, Expense, ExpenseCategory, ExpenseStatus, Provider
+
+EXPORT_COLUMNS = [
+    ("id", "ID"),
+    ("expense_date", "Fecha"),
+    ("provider_name", "Proveedor"),
+    ("category_name", "Categoría"),
+    ("status_name", "Estado"),
+    ("amount", "Monto"),
+    ("document_number", "N° Documento"),
+    ("observation", "Observación"),
+]
+EXPORT_YIELD_PER = 1000
+
+# Excel/LibreOffice interpretan como fórmula un texto que empieza con estos
+# caracteres (inyección de fórmulas desde proveedor, observación, etc.)
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def safe_cell(value):
+    """Antepone ' a los textos que una planilla evaluaría como fórmula."""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def _safe_row(row):
+    return [safe_cell(value) for value in row]
+
+
+def export_rows(filters):
+    """Filas (tuplas) del export, leídas en bloques con yield_per."""
+    return (
+        db.session.query(
+            Expense.id,
+            Expense.expense_date,
+            Provider.name,
+            ExpenseCategory.name,
+            ExpenseStatus.name,
+            Expense.amount,
+            Expense.document_number,
+            Expense.observation,
+        )
+        .outerjoin(Provider, Provider.id == Expense.provider_id)
+        .outerjoin(ExpenseCategory, ExpenseCategory.id == Expense.category_id)
+        .outerjoin(ExpenseStatus, ExpenseStatus.id == Expense.expense_status_id)
+        .filter(*filters)
+        .order_by(Expense.expense_date.desc(), Expense.id.desc())
+        .yield_per(EXPORT_YIELD_PER)
+    )
+
+
+def csv_chunks(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # BOM para que Excel abra el CSV con los acentos correctos
+    buffer.write("\ufeff")
+    writer.writerow([label for _, label in EXPORT_COLUMNS])
+
+    for i, row in enumerate(rows, start=1):
+        writer.writerow(_safe_row(row))
+        if i % EXPORT_YIELD_PER == 0:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+
+    yield buffer.getvalue().encode("utf-8")
+
+
+def xlsx_chunks(rows):
+    # openpyxl en modo write_only escribe las filas a disco a medida que llegan
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Gastos")
+    sheet.append([label for _, label in EXPORT_COLUMNS])
+    for row in rows:
+        # openpyxl guarda como fórmula cualquier texto que empiece con =
+        sheet.append(_safe_row(row))
+
+    with tempfile.TemporaryFile() as tmp:
+        workbook.save(tmp)
+        tmp.seek(0)
+        while True:
+            chunk = tmp.read(64 * 1024)
+            if not chunk:
+                break
+            yield chunk
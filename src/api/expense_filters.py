@@ -0,0 +1,52 @@
+"""
+Filtros de gastos compartidos por el listado por condominio, el export,
+la actualización en lote y los jobs en segundo plano.
+"""
+from datetime import datetime
+from api.models import Expense
+
+
+def parse_date_arg(params, name):
+    value = params.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.strptime(str(value), "%Y-%m-%d").date()
+    except ValueError:
+        raise ValueError(f"{name} debe tener formato YYYY-MM-DD")
+
+
+def expense_filters(params):
+    """
+    Construye los filtros del listado a partir de params (query params o un
+    dict del body JSON). Lanza ValueError si algún parámetro no es válido.
+    """
+    condominium_id = str(params.get("condominium_id") or "")
+    if not condominium_id.isdigit():
+        raise ValueError("condominium_id es requerido")
+    filters = [Expense.condominium_id == int(condominium_id)]
+
+    document_number = str(params.get("document_number") or "").strip()
+    if document_number:
+        filters.append(Expense.document_number.ilike(f"%{document_number}%"))
+
+    date_from = parse_date_arg(params, "date_from")
+    if date_from:
+        filters.append(Expense.expense_date >= date_from)
+
+    date_to = parse_date_arg(params, "date_to")
+    if date_to:
+        filters.append(Expense.expense_date <= date_to)
+
+    for arg, column in (
+        ("provider_id", Expense.provider_id),
+        ("category_id", Expense.category_id),
+        ("expense_status_id", Expense.expense_status_id),
+    ):
+        value = params.get(arg)
+        if value:
+            if not str(value).isdigit():
+                raise ValueError(f"{arg} debe ser numérico")
+            filters.append(column == int(value))
+
+    return filters
@@ -0,0 +1,319 @@
+"""
+Importación masiva de gastos desde CSV o XLSX.
+
+El archivo se lee fila a fila (sin cargarlo completo en memoria), los
+nombres de proveedor, categoría y estado se resuelven contra diccionarios
+precargados y los gastos válidos se insertan por lotes con
+bulk_insert_mappings, un commit por lote. Las filas con errores se
+omiten y se informan en el reporte sin detener la carga.
+"""
+import codecs
+import csv
+import io
+import re
+import zipfile
+from collections import defaultdict
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from api.models import db, Condominio, Expense, ExpenseCategory, ExpenseStatus, Provider
+from api.expense_rollups import apply_rollup_delta
+from api.dashboard import dashboard_cache
+
+DEFAULT_BATCH_SIZE = 2000
+MAX_REPORTED_ERRORS = 1000
+MAX_AMOUNT = Decimal("99999999.99")  # Numeric(10, 2)
+READ_CHUNK_SIZE = 64 * 1024
+
+# Encabezados aceptados -> campo interno
+COLUMN_ALIASES = {
+    "expense_date": "expense_date",
+    "fecha": "expense_date",
+    "amount": "amount",
+    "monto": "amount",
+    "provider": "provider",
+    "provider_name": "provider",
+    "proveedor": "provider",
+    "category": "category",
+    "category_name": "category",
+    "categoria": "category",
+    "categoría": "category",
+    "status": "status",
+    "estado": "status",
+    "document_number": "document_number",
+    "documento": "document_number",
+    "n° documento": "document_number",
+    "observation": "observation",
+    "observacion": "observation",
+    "observación": "observation",
+}
+
+REQUIRED_COLUMNS = ("expense_date", "amount", "provider", "category")
+
+THOUSANDS_ONLY = re.compile(r"^\d{1,3}(\.\d{3})+$")
+
+
+class ImportFileError(Exception):
+    """El archivo no se puede leer o le faltan columnas obligatorias."""
+
+
+# ============================
+# LECTURA DEL ARCHIVO
+# ============================
+def _normalize_header(header):
+    mapped = [COLUMN_ALIASES.get(str(h or "").strip().lower()) for h in header]
+    missing = [c for c in REQUIRED_COLUMNS if c not in mapped]
+    if missing:
+        raise ImportFileError(f"Faltan columnas obligatorias: {', '.join(missing)}")
+    return mapped
+
+
+def detect_encoding(stream):
+    """
+    utf-8 si el archivo completo decodifica como tal; si no, cp1252 (lo que
+    guarda Excel en Windows). Se revisa antes de insertar el primer lote,
+    para no dejar una carga a medias por un error de decodificación.
+    """
+    if not stream.seekable():
+        return "utf-8-sig"
+    start = stream.tell()
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    try:
+        for chunk in iter(lambda: stream.read(READ_CHUNK_SIZE), b""):
+            decoder.decode(chunk)
+        decoder.decode(b"", final=True)
+        return "utf-8-sig"
+    except UnicodeDecodeError:
+        return "cp1252"
+    finally:
+        stream.seek(start)
+
+
+def _iter_csv(stream, encoding=None):
+    encoding = encoding or detect_encoding(stream)
+    # cp1252 no define algunos bytes: se reemplazan en vez de fallar
+    errors = "strict" if encoding == "utf-8-sig" else "replace"
+    text = io.TextIOWrapper(stream, encoding=encoding, errors=errors, newline="")
+    try:
+        sample = text.readline()
+        dialect = csv.excel_tab if "\t" in sample else (
+            csv.excel if sample.count(",") >= sample.count(";") else _SemicolonDialect
+        )
+        reader = csv.reader(_prepend(sample, text), dialect)
+        yield from reader
+    except UnicodeDecodeError:
+        raise ImportFileError("El archivo no está en UTF-8 ni en Windows-1252")
+    except csv.Error as e:
+        raise ImportFileError(f"CSV inválido: {e}")
+
+
+class _SemicolonDialect(csv.excel):
+    delimiter = ";"
+
+
+def _prepend(first, lines):
+    yield first
+    yield from lines
+
+
+def _iter_xlsx(stream):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ImportFileError("La importación XLSX requiere el paquete openpyxl")
+
+    from openpyxl.utils.exceptions import InvalidFileException
+
+    try:
+        workbook = load_workbook(stream, read_only=True, data_only=True)
+    except (zipfile.BadZipFile, InvalidFileException, KeyError, OSError):
+        raise ImportFileError("El archivo XLSX está dañado o no es un XLSX")
+    try:
+        yield from workbook.active.iter_rows(values_only=True)
+    except (zipfile.BadZipFile, KeyError, OSError):
+        raise ImportFileError("El archivo XLSX está dañado")
+    finally:
+        workbook.close()
+
+
+def iter_rows(stream, filename, encoding=None):
+    """
+    Genera (número de fila, dict) desde un archivo CSV o XLSX.
+    El número de fila es el del archivo (la fila 1 es el encabezado).
+    encoding aplica a CSV; por defecto se detecta (detect_encoding).
+    """
+    if filename.lower().endswith((".xlsx", ".xlsm")):
+        raw_rows = _iter_xlsx(stream)
+    else:
+        raw_rows = _iter_csv(stream, encoding)
+
+    header = next(raw_rows, None)
+    if header is None:
+        raise ImportFileError("El archivo está vacío")
+    columns = _normalize_header(header)
+
+    for line_number, values in enumerate(raw_rows, start=2):
+        if not any(v not in (None, "") for v in values):
+            continue
+        yield line_number, {
+            column: value
+            for column, value in zip(columns, values)
+            if column is not None
+        }
+
+
+# ============================
+# VALIDACIÓN
+# ============================
+def _parse_amount(value):
+    if isinstance(value, (int, float, Decimal)):
+        amount = Decimal(str(value))
+    else:
+        raw = str(value or "").replace("$", "").replace(" ", "").strip()
+        if "," in raw:
+            raw = raw.replace(".", "").replace(",", ".")
+        elif THOUSANDS_ONLY.match(raw):
+            raw = raw.replace(".", "")
+        amount = Decimal(raw)
+
+    if amount < 0 or amount > MAX_AMOUNT:
+        raise ValueError("monto fuera de rango")
+    return amount.quantize(Decimal("0.01"))
+
+
+def _parse_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    raw = str(value or "").strip()[:10]
+    for fmt in ("%Y-%m-%d", "%d-%m-%Y", "%d/%m/%Y"):
+        try:
+            return datetime.strptime(raw, fmt).date()
+        except ValueError:
+            continue
+    raise ValueError("fecha inválida, usa YYYY-MM-DD o DD-MM-YYYY")
+
+
+def _name_lookup(model):
+    return {name.strip().lower(): id for id, name in db.session.query(model.id, model.name)}
+
+
+class ExpenseRowParser:
+    """Convierte filas del archivo en mappings de Expense usando lookups en memoria."""
+
+    def __init__(self, condominium_id):
+        self.condominium_id = condominium_id
+        self.providers = _name_lookup(Provider)
+        self.providers.update({
+            rut.strip().lower(): id
+            for id, rut in db.session.query(Provider.id, Provider.rut)
+            if rut
+        })
+        self.categories = _name_lookup(ExpenseCategory)
+        self.statuses = _name_lookup(ExpenseStatus)
+
+    def _resolve(self, lookup, value, label):
+        key = str(value or "").strip().lower()
+        if not key:
+            raise ValueError(f"{label} requerido")
+        if key not in lookup:
+            raise ValueError(f"{label} desconocido: {value}")
+        return lookup[key]
+
+    def parse(self, row):
+        """Retorna (mapping, errores)."""
+        errors = []
+        mapping = {
+            "condominium_id": self.condominium_id,
+            "document_number": str(row.get("document_number") or "").strip() or None,
+            "observation": str(row.get("observation") or "").strip() or None,
+        }
+
+        for field, parser in (
+            ("expense_date", _parse_date),
+            ("amount", _parse_amount),
+        ):
+            try:
+                mapping[field] = parser(row.get(field))
+            except (ValueError, InvalidOperation):
+                errors.append(f"{field}: valor inválido ({row.get(field)})")
+
+        for field, column, lookup, label in (
+            ("provider", "provider_id", self.providers, "proveedor"),
+            ("category", "category_id", self.categories, "categoría"),
+        ):
+            try:
+                mapping[column] = self._resolve(lookup, row.get(field), label)
+            except ValueError as e:
+                errors.append(str(e))
+
+        if row.get("status"):
+            try:
+                mapping["expense_status_id"] = self._resolve(self.statuses, row["status"], "estado")
+            except ValueError as e:
+                errors.append(str(e))
+        else:
+            mapping["expense_status_id"] = 1
+
+        return mapping, errors
+
+
+# ============================
+# CARGA POR LOTES
+# ============================
+def _flush_batch(batch):
+    db.session.bulk_insert_mappings(Expense, batch)
+
+    # Un delta de rollup por clave del lote, no por gasto
+    deltas = defaultdict(lambda: [Decimal(0), 0])
+    for m in batch:
+        key = (
+            int(m["condominium_id"]),
+            m["expense_date"].year,
+            m["expense_date"].month,
+            m["category_id"],
+            m["expense_status_id"],
+        )
+        deltas[key][0] += m["amount"]
+        deltas[key][1] += 1
+    for key, (amount, count) in deltas.items():
+        apply_rollup_delta(key, amount, count)
+
+    db.session.commit()
+    # bulk_insert_mappings no pasa por los eventos del ORM que ve api/dashboard.py
+    dashboard_cache.invalidate({key[0] for key in deltas})
+
+
+def import_expenses(rows, condominium_id, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Inserta los gastos válidos de rows [(línea, dict), ...] por lotes.
+    Retorna un reporte {processed, inserted, failed, errors}.
+    """
+    if db.session.get(Condominio, condominium_id) is None:
+        raise ImportFileError(f"El condominio {condominium_id} no existe")
+
+    parser = ExpenseRowParser(condominium_id)
+    report = {"processed": 0, "inserted": 0, "failed": 0, "errors": []}
+    batch = []
+
+    for line_number, row in rows:
+        report["processed"] += 1
+        mapping, errors = parser.parse(row)
+
+        if errors:
+            report["failed"] += 1
+            if len(report["errors"]) < MAX_REPORTED_ERRORS:
+                report["errors"].append({"row": line_number, "errors": errors})
+            continue
+
+        batch.append(mapping)
+        if len(batch) >= batch_size:
+            _flush_batch(batch)
+            report["inserted"] += len(batch)
+            batch = []
+
+    if batch:
+        _flush_batch(batch)
+        report["inserted"] += len(batch)
+
+    return report
@@ -0,0 +1,254 @@
+"""
+Mantenimiento incremental de la tabla expense_monthly_rollups.
+
+Las rutas de gastos llaman a record_expense() antes del commit para que el
+rollup quede en la misma transacción que el gasto. Los comandos de
+api/commands.py usan backfill_rollups() y verify_rollups() para reconstruir
+y auditar la tabla por lotes de condominios.
+"""
+from decimal import Decimal
+from sqlalchemy import extract, func, literal_column
+from api.http_cache import UPSERT_INSERTS
+from api.models import db, Condominio, Expense, ExpenseMonthlyRollup
+
+# Columnas del índice único uq_expense_monthly_rollup_key (gasto sin estado = 0)
+_rollups = ExpenseMonthlyRollup.__table__
+ROLLUP_KEY_COLUMNS = (
+    _rollups.c.condominium_id,
+    _rollups.c.year,
+    _rollups.c.month,
+    _rollups.c.category_id,
+    func.coalesce(_rollups.c.expense_status_id, literal_column("0")),
+)
+
+
+def rollup_key(expense):
+    """(condominium_id, year, month, category_id, expense_status_id) del gasto."""
+    status_id = expense.expense_status_id
+    return (
+        int(expense.condominium_id),
+        expense.expense_date.year,
+        expense.expense_date.month,
+        int(expense.category_id),
+        int(status_id) if status_id is not None else None,
+    )
+
+
+def snapshot(expense):
+    """Clave y monto actuales del gasto, para descontarlos antes de editarlo."""
+    return rollup_key(expense), Decimal(str(expense.amount))
+
+
+def _key_filters(key):
+    condominium_id, year, month, category_id, status_id = key
+    return (
+        ExpenseMonthlyRollup.condominium_id == condominium_id,
+        ExpenseMonthlyRollup.year == year,
+        ExpenseMonthlyRollup.month == month,
+        ExpenseMonthlyRollup.category_id == category_id,
+        ExpenseMonthlyRollup.expense_status_id == status_id,
+    )
+
+
+def apply_rollup_delta(key, amount, count):
+    """
+    Suma amount y count a la fila del rollup, creándola si no existe. En
+    PostgreSQL/SQLite es un solo INSERT ... ON CONFLICT DO UPDATE: dos
+    transacciones que crean la misma clave no chocan con el índice único.
+    """
+    condominium_id, year, month, category_id, status_id = key
+    values = {
+        "condominium_id": condominium_id,
+        "year": year,
+        "month": month,
+        "category_id": category_id,
+        "expense_status_id": status_id,
+        "total_amount": amount,
+        "expense_count": count,
+    }
+
+    dialect = db.session.get_bind().dialect.name
+    if dialect in UPSERT_INSERTS:
+        statement = UPSERT_INSERTS[dialect](_rollups).values(**values)
+        db.session.execute(statement.on_conflict_do_update(
+            index_elements=list(ROLLUP_KEY_COLUMNS),
+            set_={
+                "total_amount": _rollups.c.total_amount + statement.excluded.total_amount,
+                "expense_count": _rollups.c.expense_count + statement.excluded.expense_count,
+            },
+        ))
+        return
+
+    updated = (
+        ExpenseMonthlyRollup.query
+        .filter(*_key_filters(key))
+        .update(
+            {
+                ExpenseMonthlyRollup.total_amount: ExpenseMonthlyRollup.total_amount + amount,
+                ExpenseMonthlyRollup.expense_count: ExpenseMonthlyRollup.expense_count + count,
+            },
+            synchronize_session=False
+        )
+    )
+
+    if not updated:
+        db.session.add(ExpenseMonthlyRollup(**values))
+        db.session.flush()
+
+
+def record_expense(expense, sign=1):
+    """Aplica (sign=1) o revierte (sign=-1) un gasto en el rollup."""
+    key, amount = snapshot(expense)
+    apply_rollup_delta(key, sign * amount, sign)
+
+
+def record_expense_change(previous, expense):
+    """Mueve un gasto editado desde su snapshot anterior a sus valores actuales."""
+    old_key, old_amount = previous
+    new_key, new_amount = snapshot(expense)
+
+    if old_key == new_key:
+        if old_amount != new_amount:
+            apply_rollup_delta(new_key, new_amount - old_amount, 0)
+        return
+
+    apply_rollup_delta(old_key, -old_amount, -1)
+    apply_rollup_delta(new_key, new_amount, 1)
+
+
+def apply_rollup_difference(before, after):
+    """Aplica after - before, ambos en el formato de grouped_expense_totals()."""
+    for key in before.keys() | after.keys():
+        old_total, old_count = before.get(key, (Decimal(0), 0))
+        new_total, new_count = after.get(key, (Decimal(0), 0))
+        if old_total != new_total or old_count != new_count:
+            apply_rollup_delta(key, new_total - old_total, new_count - old_count)
+
+
+def monthly_rollup_summary(condominium_id, year, month):
+    """Total y cantidad del mes leyendo solo el rollup (O(categorías))."""
+    total, count = (
+        db.session.query(
+            func.coalesce(func.sum(ExpenseMonthlyRollup.total_amount), 0),
+            func.coalesce(func.sum(ExpenseMonthlyRollup.expense_count), 0),
+        )
+        .filter(
+            ExpenseMonthlyRollup.condominium_id == condominium_id,
+            ExpenseMonthlyRollup.year == year,
+            ExpenseMonthlyRollup.month == month,
+        )
+        .one()
+    )
+    return {"total_amount": float(total), "count": int(count)}
+
+
+# ============================
+# BACKFILL / VERIFICACIÓN
+# ============================
+def _condominium_id_chunks(chunk_size):
+    ids = [row[0] for row in db.session.query(Condominio.id).order_by(Condominio.id)]
+    for i in range(0, len(ids), chunk_size):
+        yield ids[i:i + chunk_size]
+
+
+def compute_rollups(condominium_ids):
+    """Recalcula desde expenses los rollups de los condominios indicados."""
+    return grouped_expense_totals(Expense.condominium_id.in_(condominium_ids))
+
+
+def grouped_expense_totals(*criteria):
+    """{clave de rollup: (total, count)} de los gastos que cumplen criteria."""
+    year = extract("year", Expense.expense_date)
+    month = extract("month", Expense.expense_date)
+
+    rows = (
+        db.session.query(
+            Expense.condominium_id,
+            year,
+            month,
+            Expense.category_id,
+            Expense.expense_status_id,
+            func.sum(Expense.amount),
+            func.count(Expense.id),
+        )
+        .filter(*criteria)
+        .group_by(
+            Expense.condominium_id,
+            year,
+            month,
+            Expense.category_id,
+            Expense.expense_status_id,
+        )
+    )
+
+    return {
+        (condo_id, int(y), int(m), category_id, status_id): (Decimal(total), count)
+        for condo_id, y, m, category_id, status_id, total, count in rows
+    }
+
+
+def stored_rollups(condominium_ids):
+    rows = (
+        ExpenseMonthlyRollup.query
+        .filter(
+            ExpenseMonthlyRollup.condominium_id.in_(condominium_ids),
+            ExpenseMonthlyRollup.expense_count != 0,
+        )
+    )
+    return {
+        (r.condominium_id, r.year, r.month, r.category_id, r.expense_status_id):
+            (Decimal(r.total_amount), r.expense_count)
+        for r in rows
+    }
+
+
+def backfill_rollups(chunk_size=500, progress=None):
+    """
+    Reconstruye la tabla por lotes de condominios, un commit por lote.
+    Retorna la cantidad de filas de rollup escritas. progress(hechos, total)
+    se llama después de cada lote (lo usa el job backfill_rollups).
+    """
+    written = 0
+    chunks = list(_condominium_id_chunks(chunk_size))
+    for done, ids in enumerate(chunks, start=1):
+        computed = compute_rollups(ids)
+
+        ExpenseMonthlyRollup.query.filter(
+            ExpenseMonthlyRollup.condominium_id.in_(ids)
+        ).delete(synchronize_session=False)
+
+        db.session.bulk_insert_mappings(ExpenseMonthlyRollup, [
+            {
+                "condominium_id": key[0],
+                "year": key[1],
+                "month": key[2],
+                "category_id": key[3],
+                "expense_status_id": key[4],
+                "total_amount": total,
+                "expense_count": count,
+            }
+            for key, (total, count) in computed.items()
+        ])
+        db.session.commit()
+        written += len(computed)
+        if progress:
+            progress(done, len(chunks))
+
+    return written
+
+
+def verify_rollups(chunk_size=500):
+    """
+    Compara el rollup almacenado contra el recalculado.
+    Retorna una lista de (key, esperado, almacenado) con las diferencias.
+    """
+    mismatches = []
+    for ids in _condominium_id_chunks(chunk_size):
+        computed = compute_rollups(ids)
+        stored = stored_rollups(ids)
+        for key in computed.keys() | stored.keys():
+            if computed.get(key) != stored.get(key):
+                mismatches.append((key, computed.get(key), stored.get(key)))
+        db.session.rollback()
+
+    return mismatches
@@ -0,0 +1,125 @@
+"""
+Caché HTTP condicional (ETag / If-None-Match / 304) para datos de referencia.
+
+Cada tabla cacheable tiene un número de versión en table_versions. Un
+listener de SQLAlchemy lo incrementa dentro de la misma transacción que
+inserta, edita o borra filas de esa tabla (rutas de la API o Flask-Admin),
+así la versión es consistente entre todos los workers. Las escrituras que
+no pasan por objetos del ORM (inserts de Core, bulk_*) deben llamar a
+bump_versions() en su transacción.
+"""
+from functools import wraps
+from flask import make_response, request
+from sqlalchemy import event, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from api.models import db, ExpenseCategory, ExpenseStatus, Provider, Role, TableVersion
+
+CACHED_MODELS = (ExpenseCategory, ExpenseStatus, Provider, Role)
+CACHED_TABLES = {model.__tablename__ for model in CACHED_MODELS}
+
+# Dialectos con INSERT ... ON CONFLICT DO UPDATE
+UPSERT_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+# El navegador guarda la respuesta pero la revalida siempre con If-None-Match
+CACHE_CONTROL = "private, no-cache"
+
+
+def get_table_version(table_name):
+    version = db.session.execute(
+        select(TableVersion.version).where(TableVersion.name == table_name)
+    ).scalar()
+    return version or 0
+
+
+def _upsert_version(connection, name):
+    """
+    Incrementa la versión de name creándola si no existe, en una sola
+    sentencia: dos commits concurrentes sobre una tabla sin fila todavía
+    no chocan con la clave primaria.
+    """
+    versions = TableVersion.__table__
+    dialect = connection.dialect.name
+    if dialect in UPSERT_INSERTS:
+        statement = UPSERT_INSERTS[dialect](versions).values(name=name, version=1)
+        connection.execute(statement.on_conflict_do_update(
+            index_elements=[versions.c.name],
+            set_={"version": versions.c.version + 1},
+        ))
+        return
+
+    result = connection.execute(
+        update(versions)
+        .where(versions.c.name == name)
+        .values(version=versions.c.version + 1)
+    )
+    if result.rowcount == 0:
+        connection.execute(insert(versions).values(name=name, version=1))
+
+
+def bump_table_versions(connection, table_names):
+    for name in sorted(table_names):
+        _upsert_version(connection, name)
+
+
+def bump_versions(*models):
+    """
+    Para escrituras que no pasan por objetos del ORM (inserts de Core,
+    bulk_*): el listener de after_flush no las ve y hay que avisar a mano.
+    """
+    names = {model.__tablename__ for model in models} & CACHED_TABLES
+    if names:
+        bump_table_versions(db.session.connection(), names)
+
+
+@event.listens_for(Session, "after_flush")
+def _bump_versions_on_flush(session, flush_context):
+    changed = {
+        obj.__table__.name
+        for obj in (*session.new, *session.deleted)
+        if isinstance(obj, CACHED_MODELS)
+    }
+    changed.update(
+        obj.__table__.name
+        for obj in session.dirty
+        if isinstance(obj, CACHED_MODELS)
+        and session.is_modified(obj, include_collections=False)
+    )
+    if changed:
+        bump_table_versions(session.connection(), changed)
+
+
+def conditional_cache(table_name):
+    """
+    Decorador para rutas GET que solo dependen de table_name. Responde 304
+    si el If-None-Match del cliente coincide con la versión actual, sin
+    ejecutar la consulta ni serializar la respuesta.
+    """
+    if table_name not in CACHED_TABLES:
+        raise ValueError(f"Tabla sin versión para caché: {table_name}")
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            etag = f"{table_name}-{get_table_version(table_name)}"
+
+            if request.if_none_match.contains_weak(etag):
+                response = make_response("", 304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                # Un error (por ejemplo 400 por fields inválido) no se guarda
+                # ni se revalida con la versión de la tabla
+                if response.status_code != 200:
+                    return response
+
+            # Débil: la misma versión vale comprimida o no (ver api/compression.py)
+            response.set_etag(etag, weak=True)
+            response.headers["Cache-Control"] = CACHE_CONTROL
+            return response
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,600 @@
+"""
+Jobs en segundo plano con cola en la base de datos (sin Redis).
+
+Las operaciones pesadas (import, export, reportes, backfill de rollups,
+miniaturas) se encolan con POST /api/jobs y las ejecuta `flask run-jobs`,
+un proceso aparte de gunicorn con un pool de threads de tamaño fijo
+(concurrencia acotada). El estado se consulta con GET /api/jobs/<id>.
+
+- Tomar un job es un UPDATE ... WHERE status = 'queued' que solo un
+  worker gana (rowcount == 1), así varios procesos run-jobs pueden
+  compartir la cola.
+- Cada handler recibe un JobContext para informar progreso (se guarda
+  en una conexión aparte, visible mientras el job corre) y para ubicar
+  sus archivos de resultado en JOBS_RESULT_DIR/<id>/.
+- Si un handler falla se reintenta con backoff exponencial hasta
+  max_attempts; los que no son idempotentes (import) tienen un intento.
+- El worker actualiza heartbeat_at de sus jobs; un job "running" sin
+  heartbeat por JOB_STALE_SECONDS (worker caído) vuelve a la cola.
+- Los params se validan al encolar (POST /api/jobs responde 400), no
+  recién en el worker. El archivo subido para import_expenses se borra
+  cuando el job termina, salvo que otro job o un documento lo use.
+
+Se usan threads y no procesos porque los handlers pasan casi todo el
+tiempo en la base o en disco.
+
+Variables:
+    JOB_CONCURRENCY      jobs simultáneos por proceso run-jobs (default 2; 1 con SQLite)
+    JOB_STALE_SECONDS    segundos sin heartbeat para re-encolar (default 300)
+    JOBS_RESULT_DIR      carpeta de resultados (default UPLOAD_DIR/jobs)
+"""
+import logging
+import os
+import socket
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import OperationalError
+from api.models import db, Job
+from api.expense_documents import UPLOAD_DIR
+
+logger = logging.getLogger(__name__)
+
+JOB_CONCURRENCY = int(os.getenv("JOB_CONCURRENCY", 2))
+JOB_STALE_SECONDS = int(os.getenv("JOB_STALE_SECONDS", 300))
+JOBS_RESULT_DIR = os.path.realpath(os.getenv("JOBS_RESULT_DIR", os.path.join(UPLOAD_DIR, "jobs")))
+
+DEFAULT_MAX_ATTEMPTS = 3
+RETRY_BASE_SECONDS = 30
+HEARTBEAT_SECONDS = 15
+PROGRESS_MIN_INTERVAL = 1.0
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+def utcnow():
+    return datetime.now(timezone.utc)
+
+
+# ============================
+# REGISTRO DE TIPOS DE JOB
+# ============================
+class JobError(ValueError):
+    pass
+
+
+class JobKind:
+    def __init__(self, name, handler, roles, per_condominium, max_attempts, validate=None, cleanup=None):
+        self.name = name
+        self.handler = handler
+        self.roles = roles
+        self.per_condominium = per_condominium
+        self.max_attempts = max_attempts
+        self.validate = validate
+        self.cleanup = cleanup
+
+    def check_params(self, params):
+        """JobError si los params no sirven: se rechazan al encolar, no en el worker."""
+        if self.validate is None:
+            return
+        try:
+            self.validate(params)
+        except ValueError as e:
+            raise JobError(str(e)) from e
+
+
+JOB_KINDS = {}
+
+
+def job_handler(name, roles=("ADMIN", "SUPERADMIN"), per_condominium=True, max_attempts=DEFAULT_MAX_ATTEMPTS,
+                validate=None, cleanup=None):
+    """
+    Registra handler(ctx, params) -> dict con el resultado. per_condominium
+    exige condominium_id en los params (y que el token tenga acceso a él).
+    validate(params) lanza ValueError si los params no son válidos;
+    cleanup(params) se llama cuando el job termina (succeeded o failed).
+    """
+    def decorator(handler):
+        JOB_KINDS[name] = JobKind(name, handler, roles, per_condominium, max_attempts, validate, cleanup)
+        return handler
+    return decorator
+
+
+def enqueue(kind, params=None, condominium_id=None, created_by=None):
+    """Agrega un job a la cola y hace commit. JobError si kind o params no son válidos."""
+    job_kind = JOB_KINDS.get(kind)
+    if job_kind is None:
+        raise JobError(f"kind inválido. Opciones: {', '.join(sorted(JOB_KINDS))}")
+    if job_kind.per_condominium and not condominium_id:
+        raise JobError("condominium_id es requerido")
+    job_kind.check_params(params or {})
+
+    job = Job(
+        kind=kind,
+        params=params or {},
+        status=QUEUED,
+        progress=0,
+        attempts=0,
+        max_attempts=job_kind.max_attempts,
+        condominium_id=condominium_id if job_kind.per_condominium else None,
+        created_by=created_by,
+        run_after=utcnow(),
+    )
+    db.session.add(job)
+    db.session.commit()
+    return job
+
+
+# ============================
+# EJECUCIÓN
+# ============================
+class JobContext:
+    """Lo que recibe un handler: sus params, progreso y carpeta de resultados."""
+
+    def __init__(self, job):
+        self.job_id = job.id
+        self.attempt = job.attempts
+        self._last_report = 0.0
+
+    def progress(self, done, total=None, message=None, force=False):
+        """Guarda el avance (0-100) a lo más una vez por segundo."""
+        now = time.monotonic()
+        if not force and now - self._last_report < PROGRESS_MIN_INTERVAL:
+            return
+        self._last_report = now
+
+        percent = done if total is None else int(done * 100 / total) if total else 100
+        values = {"progress": max(0, min(int(percent), 99)), "heartbeat_at": utcnow()}
+        if message is not None:
+            values["message"] = message[:255]
+
+        # Conexión aparte: el avance se ve aunque el handler no haya hecho commit.
+        # Es informativo: si la base está ocupada (SQLite con una lectura abierta
+        # del handler) se omite este reporte en vez de fallar el job.
+        try:
+            with db.engine.begin() as connection:
+                connection.execute(update(Job.__table__).where(Job.__table__.c.id == self.job_id).values(**values))
+        except OperationalError:
+            # Cada intento espera el busy timeout: no se insiste hasta el final del job
+            logger.warning("job %s: no se pudo guardar el avance", self.job_id)
+            self._last_report = float("inf")
+
+    def result_path(self, filename):
+        directory = os.path.join(JOBS_RESULT_DIR, str(self.job_id))
+        os.makedirs(directory, exist_ok=True)
+        return os.path.join(directory, filename)
+
+    def file_result(self, path, **extra):
+        """Resultado que apunta a un archivo (lo sirve GET /api/jobs/<id>/result)."""
+        return {
+            "file": os.path.relpath(path, JOBS_RESULT_DIR),
+            "filename": os.path.basename(path),
+            "size": os.path.getsize(path),
+            **extra,
+        }
+
+
+def claim_next(worker_id):
+    """Toma el próximo job listo para correr. Retorna su id o None."""
+    jobs = Job.__table__
+    while True:
+        job_id = db.session.execute(
+            select(jobs.c.id)
+            .where(jobs.c.status == QUEUED, jobs.c.run_after <= utcnow())
+            .order_by(jobs.c.run_after, jobs.c.id)
+            .limit(1)
+        ).scalar()
+        if job_id is None:
+            db.session.commit()
+            return None
+
+        now = utcnow()
+        claimed = db.session.execute(
+            update(jobs)
+            .where(jobs.c.id == job_id, jobs.c.status == QUEUED)
+            .values(
+                status=RUNNING,
+                attempts=jobs.c.attempts + 1,
+                locked_by=worker_id,
+                heartbeat_at=now,
+                started_at=now,
+                error=None,
+            )
+        ).rowcount
+        db.session.commit()
+        if claimed == 1:
+            return job_id
+        # Otro worker lo tomó primero: probar con el siguiente
+
+
+def _retry_delay(attempts):
+    return timedelta(seconds=RETRY_BASE_SECONDS * 2 ** (attempts - 1))
+
+
+def _cleanup(job_id, kind, params):
+    """Limpieza del tipo de job al terminar; un error acá no cambia su estado."""
+    job_kind = JOB_KINDS.get(kind)
+    if job_kind is None or job_kind.cleanup is None:
+        return
+    try:
+        job_kind.cleanup(dict(params or {}))
+    except Exception as e:
+        db.session.rollback()
+        logger.warning("job %s: no se pudo limpiar: %s", job_id, e)
+
+
+def run_job(job_id):
+    """Ejecuta un job ya tomado (status running). Requiere app context."""
+    job = db.session.get(Job, job_id)
+    job_kind = JOB_KINDS.get(job.kind)
+
+    try:
+        if job_kind is None:
+            raise JobError(f"No hay handler para {job.kind}")
+        result = job_kind.handler(JobContext(job), dict(job.params or {}))
+    except Exception as e:
+        db.session.rollback()
+        job = db.session.get(Job, job_id)
+        job.error = f"{type(e).__name__}: {e}"[:2000]
+        job.locked_by = None
+        if job_kind is not None and job.attempts < job.max_attempts:
+            job.status = QUEUED
+            job.run_after = utcnow() + _retry_delay(job.attempts)
+            job.message = f"Reintento {job.attempts + 1} de {job.max_attempts}"
+        else:
+            job.status = FAILED
+            job.finished_at = utcnow()
+        db.session.commit()
+        logger.warning("job %s (%s) falló: %s\n%s", job_id, job.kind, e, traceback.format_exc())
+        if job.status == FAILED:
+            _cleanup(job_id, job.kind, job.params)
+        return job.status
+
+    job = db.session.get(Job, job_id)
+    job.status = SUCCEEDED
+    job.progress = 100
+    job.result = result
+    job.locked_by = None
+    job.finished_at = utcnow()
+    db.session.commit()
+    _cleanup(job_id, job.kind, job.params)
+    return job.status
+
+
+def requeue_stale(stale_seconds=JOB_STALE_SECONDS):
+    """Devuelve a la cola los jobs running sin heartbeat (worker caído)."""
+    jobs = Job.__table__
+    limit = utcnow() - timedelta(seconds=stale_seconds)
+    stale = (jobs.c.status == RUNNING) & (jobs.c.heartbeat_at < limit)
+
+    exhausted = db.session.execute(
+        select(jobs.c.id, jobs.c.kind, jobs.c.params)
+        .where(stale, jobs.c.attempts >= jobs.c.max_attempts)
+    ).all()
+    failed = 0
+    if exhausted:
+        failed = db.session.execute(
+            update(jobs)
+            .where(stale, jobs.c.id.in_([row.id for row in exhausted]))
+            .values(status=FAILED, locked_by=None, finished_at=utcnow(),
+                    error="El worker dejó de responder")
+        ).rowcount
+    requeued = db.session.execute(
+        update(jobs)
+        .where(stale)
+        .values(status=QUEUED, locked_by=None, run_after=utcnow(),
+                message="Re-encolado: el worker dejó de responder")
+    ).rowcount
+    db.session.commit()
+
+    for job_id, kind, params in exhausted:
+        _cleanup(job_id, kind, params)
+    return requeued, failed
+
+
+class JobWorker:
+    """
+    Loop de `flask run-jobs`: toma jobs mientras haya threads libres,
+    mantiene el heartbeat de los que corren y re-encola los abandonados.
+    """
+
+    def __init__(self, app, concurrency=JOB_CONCURRENCY, poll_interval=1.0, log=print):
+        self.app = app
+        # SQLite admite un solo escritor: con varios threads los jobs se bloquean entre sí
+        if app.config.get("SQLALCHEMY_DATABASE_URI", "").startswith("sqlite"):
+            concurrency = 1
+        self.concurrency = max(1, concurrency)
+        self.poll_interval = poll_interval
+        self.log = log
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"[:100]
+        self.stopping = threading.Event()
+
+    def _execute(self, job_id):
+        with self.app.app_context():
+            try:
+                return job_id, run_job(job_id)
+            except OperationalError as e:
+                # No se pudo guardar el estado: queda running y requeue_stale lo recupera
+                db.session.rollback()
+                logger.warning("job %s: error de base al guardar el estado: %s", job_id, e)
+                return job_id, "error de base"
+            finally:
+                db.session.remove()
+
+    def _heartbeat(self, job_ids):
+        if not job_ids:
+            return
+        db.session.execute(
+            update(Job.__table__)
+            .where(Job.__table__.c.id.in_(job_ids), Job.__table__.c.locked_by == self.worker_id)
+            .values(heartbeat_at=utcnow())
+        )
+        db.session.commit()
+
+    def _database_error(self, action, error):
+        # Base ocupada (SQLite) o conexión caída: se reintenta en la próxima vuelta
+        db.session.rollback()
+        logger.warning("run-jobs: no se pudo %s: %s", action, error)
+        self.log(f"error de base al {action}; se reintenta")
+
+    def _maintenance(self, job_ids):
+        try:
+            self._heartbeat(job_ids)
+            requeued, failed = requeue_stale()
+        except OperationalError as e:
+            self._database_error("actualizar heartbeats", e)
+            return
+        if requeued or failed:
+            self.log(f"jobs abandonados: {requeued} re-encolados, {failed} fallidos")
+
+    def run(self, once=False):
+        """once=True procesa hasta vaciar la cola y termina."""
+        running = {}
+        last_maintenance = 0.0
+
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="jobs") as executor:
+            while not self.stopping.is_set():
+                for future in [f for f in running if f.done()]:
+                    job_id, status = future.result()
+                    running.pop(future)
+                    self.log(f"job {job_id}: {status}")
+
+                if time.monotonic() - last_maintenance >= HEARTBEAT_SECONDS:
+                    last_maintenance = time.monotonic()
+                    self._maintenance(list(running.values()))
+
+                claimed = None
+                if len(running) < self.concurrency:
+                    try:
+                        claimed = claim_next(self.worker_id)
+                    except OperationalError as e:
+                        self._database_error("tomar un job", e)
+                    if claimed is not None:
+                        running[executor.submit(self._execute, claimed)] = claimed
+                        continue
+
+                if once and not running and claimed is None:
+                    break
+                self.stopping.wait(self.poll_interval)
+
+            for future in running:
+                job_id, status = future.result()
+                self.log(f"job {job_id}: {status}")
+
+    def stop(self):
+        self.stopping.set()
+
+
+def queue_summary():
+    """{status: cantidad} de la tabla jobs."""
+    rows = db.session.execute(select(Job.status, func.count()).group_by(Job.status)).all()
+    return {status: count for status, count in rows}
+
+
+# ============================
+# HANDLERS
+# ============================
+@job_handler("backfill_rollups", roles=("SUPERADMIN",), per_condominium=False)
+def _backfill_rollups(ctx, params):
+    from api.expense_rollups import backfill_rollups
+
+    written = backfill_rollups(progress=lambda done, total: ctx.progress(done, total))
+    return {"rollup_rows": written}
+
+
+def _export_format(params):
+    export_format = str(params.get("format", "csv")).lower()
+    if export_format not in ("csv", "xlsx"):
+        raise JobError("format debe ser csv o xlsx")
+    return export_format
+
+
+def _validate_export(params):
+    from api.expense_filters import expense_filters
+
+    _export_format(params)
+    expense_filters(params)
+
+
+@job_handler("export_expenses", validate=_validate_export)
+def _export_expenses(ctx, params):
+    """Mismos params que GET /api/expenses/condominium/export (más format)."""
+    from api.expense_export import csv_chunks, export_rows, xlsx_chunks
+    from api.expense_filters import expense_filters
+    from api.models import Expense
+
+    export_format = _export_format(params)
+    filters = expense_filters(params)
+    total = db.session.query(func.count(Expense.id)).filter(*filters).scalar()
+
+    exported = 0
+
+    def counted(rows):
+        nonlocal exported
+        for row in rows:
+            exported += 1
+            if exported % 1000 == 0:
+                ctx.progress(exported, total, f"{exported} de {total} gastos")
+            yield row
+
+    rows = counted(export_rows(filters))
+    chunks = xlsx_chunks(rows) if export_format == "xlsx" else csv_chunks(rows)
+
+    path = ctx.result_path(f"gastos_condominio_{params['condominium_id']}.{export_format}")
+    with open(path, "wb") as f:
+        for chunk in chunks:
+            f.write(chunk)
+
+    return ctx.file_result(path, rows=exported)
+
+
+class _ProgressReader:
+    """Stream de lectura que informa el avance por bytes leídos."""
+
+    def __init__(self, stream, size, ctx):
+        self.stream = stream
+        self.size = size
+        self.ctx = ctx
+
+    def _report(self):
+        self.ctx.progress(self.stream.tell(), self.size)
+
+    def read(self, *args):
+        data = self.stream.read(*args)
+        self._report()
+        return data
+
+    def readline(self, *args):
+        line = self.stream.readline(*args)
+        self._report()
+        return line
+
+    def __iter__(self):
+        for line in self.stream:
+            self._report()
+            yield line
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+def _import_batch_size(params):
+    from api.expense_import import DEFAULT_BATCH_SIZE
+
+    batch_size = params.get("batch_size") or DEFAULT_BATCH_SIZE
+    if not str(batch_size).isdigit():
+        raise JobError("batch_size debe ser numérico")
+    return max(1, min(int(batch_size), 10000))
+
+
+def _release_import_file(params):
+    """Borra el blob del import, salvo que otro job en cola o un documento lo use."""
+    from api.expense_documents import release_blob
+
+    if not params.get("file"):
+        return
+    active = db.session.execute(
+        select(Job.params).where(Job.kind == "import_expenses", Job.status.in_((QUEUED, RUNNING)))
+    ).scalars()
+    if any((other or {}).get("file") == params["file"] for other in active):
+        return
+    release_blob(params["file"])
+
+
+# Un import que falla a la mitad ya insertó lotes: no se reintenta
+@job_handler("import_expenses", max_attempts=1, validate=_import_batch_size, cleanup=_release_import_file)
+def _import_expenses(ctx, params):
+    """params: condominium_id, file (blob subido con el job), filename, batch_size."""
+    from api.expense_documents import absolute_path
+    from api.expense_import import detect_encoding, import_expenses, iter_rows
+
+    path = absolute_path(params["file"])
+    batch_size = _import_batch_size(params)
+
+    with open(path, "rb") as f:
+        # La detección recorre el archivo: se hace antes de medir el avance
+        encoding = detect_encoding(f)
+        stream = _ProgressReader(f, os.path.getsize(path), ctx)
+        return import_expenses(
+            iter_rows(stream, params.get("filename") or "import.csv", encoding),
+            int(params["condominium_id"]),
+            batch_size,
+        )
+
+
+def _report_params(params):
+    """(group_by, start, end, currency) del reporte. ValueError si no son válidos."""
+    from api.expense_aggregates import GROUP_DIMENSIONS, month_bounds, parse_month
+    from api.uf_history import parse_currency
+
+    group_by = params.get("group_by") or []
+    if isinstance(group_by, str):
+        group_by = [g.strip() for g in group_by.split(",") if g.strip()]
+    if not isinstance(group_by, list):
+        raise ValueError("group_by debe ser una lista")
+    unknown = [str(g) for g in group_by if g not in GROUP_DIMENSIONS]
+    if unknown:
+        raise ValueError(
+            f"group_by inválido: {', '.join(unknown)}. "
+            f"Opciones: {', '.join(GROUP_DIMENSIONS)}"
+        )
+
+    start_year, start_month = parse_month(params.get("start_month"))
+    end_year, end_month = parse_month(params.get("end_month"))
+    start, _ = month_bounds(start_year, start_month)
+    _, end = month_bounds(end_year, end_month)
+    if start >= end:
+        raise ValueError("start_month debe ser anterior o igual a end_month")
+    currency = parse_currency(params.get("currency"))
+    return group_by, start, end, currency
+
+
+@job_handler("expense_report", validate=_report_params)
+def _expense_report(ctx, params):
+    """Totales de GET /api/expenses/aggregate para un rango largo, a un archivo JSON."""
+    from api.expense_aggregates import aggregate_expenses
+    from api.serializers import dumps
+
+    group_by, start, end, currency = _report_params(params)
+
+    results = aggregate_expenses(int(params["condominium_id"]), start, end, group_by, currency=currency)
+    report = {
+        "condominium_id": int(params["condominium_id"]),
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "group_by": group_by,
+        "currency": currency,
+        "total_amount": sum(r["total_amount"] for r in results),
+        "count": sum(r["count"] for r in results),
+        "results": results,
+    }
+
+    path = ctx.result_path(f"reporte_gastos_{params['condominium_id']}.json")
+    with open(path, "wb") as f:
+        f.write(dumps(report))
+
+    return ctx.file_result(path, total_amount=report["total_amount"], count=report["count"])
+
+
+def _validate_previews(params):
+    document_ids = params.get("document_ids")
+    if document_ids is not None and (
+        not isinstance(document_ids, list) or not all(str(i).isdigit() for i in document_ids)
+    ):
+        raise ValueError("document_ids debe ser una lista de ids")
+
+
+@job_handler("generate_previews", validate=_validate_previews)
+def _generate_previews(ctx, params):
+    """params: condominium_id y document_ids opcional; solo documentos de ese condominio."""
+    from api.expense_documents import generate_pending_previews
+
+    document_ids = params.get("document_ids")
+    results = generate_pending_previews(document_ids, condominium_id=int(params["condominium_id"]))
+    return {"documents": len(results), "statuses": dict(results)}
@@ -0,0 +1,216 @@
+"""
+Métricas de la API en formato de texto de Prometheus, servidas en /api/_metrics
+(con JWT de SUPERADMIN o METRICS_TOKEN, ver api/routesMetrics.py).
+
+- Latencia y tamaño de respuesta por ruta (histogramas).
+- Cantidad y tiempo de sentencias SQL por request, medidos con los eventos
+  before/after_cursor_execute de SQLAlchemy.
+- Estado del pool de conexiones (ver api/db_pool.py).
+
+Los valores viven en memoria del proceso: con varios workers de gunicorn
+cada uno expone los suyos y Prometheus los distingue por instancia.
+"""
+import threading
+import time
+from bisect import bisect_left
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in (*zip(names, values), *extra)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels=(), amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(
+                    f"{self.name}{_format_labels(self.labelnames, labels)} {_format_number(value)}"
+                )
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels, value):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for labels, (counts, total, count) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip((*self.buckets, float("inf")), counts):
+                    cumulative += bucket_count
+                    le = _format_number(float(bound)) if bound != float("inf") else "+Inf"
+                    lines.append(
+                        f"{self.name}_bucket"
+                        f"{_format_labels(self.labelnames, labels, [('le', le)])} {cumulative}"
+                    )
+                label_str = _format_labels(self.labelnames, labels)
+                lines.append(f"{self.name}_sum{label_str} {_format_number(total)}")
+                lines.append(f"{self.name}_count{label_str} {count}")
+        return lines
+
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Latencia de las requests por ruta.",
+    ("method", "route", "status"),
+)
+RESPONSE_SIZE = Histogram(
+    "http_response_size_bytes",
+    "Tamaño del cuerpo de respuesta por ruta.",
+    ("method", "route"),
+    SIZE_BUCKETS,
+)
+SQL_STATEMENTS_PER_REQUEST = Histogram(
+    "db_statements_per_request",
+    "Sentencias SQL ejecutadas por request.",
+    ("method", "route"),
+    QUERY_COUNT_BUCKETS,
+)
+SQL_TIME_PER_REQUEST = Histogram(
+    "db_time_per_request_seconds",
+    "Tiempo total en SQL por request.",
+    ("method", "route"),
+)
+SQL_STATEMENTS_TOTAL = Counter(
+    "db_statements_total",
+    "Sentencias SQL ejecutadas (incluye comandos y tareas fuera de requests).",
+)
+
+# clave de pool_status() -> (nombre, tipo, ayuda)
+POOL_METRICS = (
+    ("in_use", "db_pool_in_use", "gauge", "Conexiones del pool en uso."),
+    ("idle", "db_pool_idle", "gauge", "Conexiones del pool libres."),
+    ("overflow", "db_pool_overflow", "gauge", "Conexiones de overflow abiertas."),
+    ("checkouts", "db_pool_checkouts_total", "counter", "Checkouts de conexiones del pool."),
+    ("checkout_timeouts", "db_pool_checkout_timeouts_total", "counter", "Checkouts que agotaron pool_timeout."),
+    ("checkout_wait_seconds_total", "db_pool_checkout_wait_seconds_total", "counter", "Tiempo total esperando una conexión."),
+    ("checkout_wait_seconds_max", "db_pool_checkout_wait_seconds_max", "gauge", "Mayor espera por una conexión."),
+)
+
+REGISTRY = [
+    REQUEST_LATENCY,
+    RESPONSE_SIZE,
+    SQL_STATEMENTS_PER_REQUEST,
+    SQL_TIME_PER_REQUEST,
+    SQL_STATEMENTS_TOTAL,
+]
+
+
+# ============================
+# HOOKS DE SQLALCHEMY
+# ============================
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("metrics_query_start")
+    elapsed = time.perf_counter() - starts.pop() if starts else 0.0
+    SQL_STATEMENTS_TOTAL.inc()
+
+    if has_request_context() and "metrics_sql_count" in g:
+        g.metrics_sql_count += 1
+        g.metrics_sql_time += elapsed
+
+
+# ============================
+# HOOKS DE FLASK
+# ============================
+def _route_label():
+    rule = request.url_rule
+    return rule.rule if rule is not None else "unmatched"
+
+
+def _before_request():
+    g.metrics_start = time.perf_counter()
+    g.metrics_sql_count = 0
+    g.metrics_sql_time = 0.0
+
+
+def _after_request(response):
+    start = g.pop("metrics_start", None)
+    if start is None or request.path == "/api/_metrics":
+        return response
+
+    method, route = request.method, _route_label()
+    REQUEST_LATENCY.observe((method, route, str(response.status_code)), time.perf_counter() - start)
+
+    # Las respuestas en streaming no tienen tamaño conocido de antemano
+    if response.content_length is not None:
+        RESPONSE_SIZE.observe((method, route), response.content_length)
+
+    SQL_STATEMENTS_PER_REQUEST.observe((method, route), g.get("metrics_sql_count", 0))
+    SQL_TIME_PER_REQUEST.observe((method, route), g.get("metrics_sql_time", 0.0))
+    return response
+
+
+def setup_metrics(app):
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+
+
+def render_metrics(pool=None):
+    """Texto en formato Prometheus. pool es el dict de api.db_pool.pool_status()."""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+
+    if pool:
+        for key, name, kind, help in POOL_METRICS:
+            if key in pool:
+                lines += [
+                    f"# HELP {name} {help}",
+                    f"# TYPE {name} {kind}",
+                    f"{name} {_format_number(pool[key])}",
+                ]
+
+    return "\n".join(lines) + "\n"
@@ -53,7 +53,8 @@ class User(db.Model):
     condominio_id = db.Column(
         Integer,
         ForeignKey("condominios.id"),
-        nullable=True
+        nullable=True,
+        index=True
     )
 
     condominio = relationship(
@@ -201,6 +202,13 @@ class ExpenseCategory(db.Model):
 
 class Expense(db.Model):
     __tablename__ = "expenses"
+    __table_args__ = (
+        # Listado por cursor y rangos de fecha por condominio
+        db.Index("ix_expenses_condominium_date", "condominium_id", "expense_date", "id"),
+        db.Index("ix_expenses_expense_status_id", "expense_status_id"),
+        db.Index("ix_expenses_provider_id", "provider_id"),
+        db.Index("ix_expenses_category_id", "category_id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
 
@@ -237,6 +245,9 @@ class Expense(db.Model):
     document_number = db.Column(db.String(100))
     is_recurring = db.Column(db.Boolean, default=False)
 
+    # Versión de la fila: se incrementa en cada edición (bloqueo optimista)
+    version = db.Column(db.Integer, nullable=False, default=1, server_default="1")
+
     created_at = db.Column(db.DateTime, server_default=db.func.now())
     updated_at = db.Column(
         db.DateTime,
@@ -244,6 +255,8 @@ class Expense(db.Model):
         onupdate=db.func.now()
     )
 
+    __mapper_args__ = {"version_id_col": version}
+
     # Relaciones (Joins)
     provider = db.relationship("Provider")
     category = db.relationship("ExpenseCategory")
@@ -252,6 +265,14 @@ class Expense(db.Model):
     # Relación con el estado
     status = db.relationship("ExpenseStatus")
 
+    # Documentos adjuntos (ver api/expense_documents.py)
+    documents = db.relationship(
+        "ExpenseDocument",
+        back_populates="expense",
+        cascade="all, delete-orphan",
+        order_by="ExpenseDocument.id"
+    )
+
 
 
 class ExpenseDocument(db.Model):
@@ -262,15 +283,26 @@ class ExpenseDocument(db.Model):
     expense_id = db.Column(
         db.Integer,
         db.ForeignKey("expenses.id"),
-        nullable=False
+        nullable=False,
+        index=True
     )
 
     document_type = db.Column(db.String(50))  # invoice, receipt, quote
+    # Blob por contenido: blobs/<ab>/<sha256>, compartido entre documentos iguales
     file_path = db.Column(db.String(255), nullable=False)
 
+    original_name = db.Column(db.String(255))
+    content_type = db.Column(db.String(100))
+    size = db.Column(db.Integer)
+    sha256 = db.Column(db.String(64), index=True)
+
+    # Miniatura generada en segundo plano: pending | ready | unsupported | failed
+    thumbnail_path = db.Column(db.String(255))
+    preview_status = db.Column(db.String(20), nullable=False, default="pending", server_default="pending")
+
     created_at = db.Column(db.DateTime, server_default=db.func.now())
 
-    expense = db.relationship("Expense")
+    expense = db.relationship("Expense", back_populates="documents")
 
 
 class ExpenseStatus(db.Model):
@@ -296,3 +328,150 @@ class AuditLog(db.Model):
     entity_id = db.Column(db.Integer, nullable=False)
 
     created_at = db.Column(db.DateTime, server_default=db.func.now())
+
+
+# =====================================================
+# ROLLUP MENSUAL DE GASTOS
+# Totales acumulados por condominio / mes / categoría / estado.
+# Se mantiene en la misma transacción que crea, edita o borra gastos
+# (ver api/expense_rollups.py).
+# =====================================================
+class ExpenseMonthlyRollup(db.Model):
+    __tablename__ = "expense_monthly_rollups"
+    # Índice único sobre coalesce(): un UniqueConstraint no compara los NULL
+    # de expense_status_id y permitiría filas duplicadas para "sin estado"
+    __table_args__ = (
+        db.Index(
+            "uq_expense_monthly_rollup_key",
+            "condominium_id",
+            "year",
+            "month",
+            "category_id",
+            db.text("coalesce(expense_status_id, 0)"),
+            unique=True
+        ),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+
+    condominium_id = db.Column(
+        db.Integer,
+        db.ForeignKey("condominios.id"),
+        nullable=False
+    )
+    year = db.Column(db.Integer, nullable=False)
+    month = db.Column(db.Integer, nullable=False)
+
+    category_id = db.Column(
+        db.Integer,
+        db.ForeignKey("expense_categories.id"),
+        nullable=False
+    )
+    expense_status_id = db.Column(
+        db.Integer,
+        db.ForeignKey("expense_statuses.id"),
+        nullable=True
+    )
+
+    total_amount = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    expense_count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<ExpenseMonthlyRollup {self.condominium_id} {self.year}-{self.month}>"
+
+
+# =====================================================
+# HISTÓRICO UF
+# Un valor por día, cargado con `flask import-uf`.
+# =====================================================
+class UFValue(db.Model):
+    __tablename__ = "uf_values"
+
+    id = db.Column(db.Integer, primary_key=True)
+    date = db.Column(db.Date, unique=True, nullable=False)
+    value = db.Column(db.Numeric(12, 2), nullable=False)
+
+    created_at = db.Column(db.DateTime, server_default=db.func.now())
+
+    def __repr__(self):
+        return f"<UFValue {self.date} {self.value}>"
+
+
+# =====================================================
+# VERSIONES DE TABLAS
+# Contador por tabla que se incrementa en cada commit que la modifica.
+# Lo usa api/http_cache.py para generar los ETag de datos de referencia.
+# =====================================================
+class TableVersion(db.Model):
+    __tablename__ = "table_versions"
+
+    name = db.Column(db.String(64), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<TableVersion {self.name} {self.version}>"
+
+
+# =====================================================
+# TOKENS REVOCADOS
+# Un jti (logout) o un usuario completo (tokens emitidos antes de
+# revoked_before, cuando cambian sus roles o se desactiva). Las filas se
+# borran al expirar el último token afectado (ver api/auth.py).
+# =====================================================
+class RevokedToken(db.Model):
+    __tablename__ = "revoked_tokens"
+
+    id = db.Column(db.Integer, primary_key=True)
+    jti = db.Column(db.String(36), unique=True, nullable=True)
+    user_id = db.Column(db.Integer, nullable=True, index=True)
+    revoked_before = db.Column(db.DateTime(timezone=True), nullable=True)
+    expires_at = db.Column(db.DateTime(timezone=True), nullable=False, index=True)
+
+    created_at = db.Column(db.DateTime, server_default=db.func.now())
+
+    def __repr__(self):
+        return f"<RevokedToken {self.jti or self.user_id}>"
+
+
+# =====================================================
+# JOBS EN SEGUNDO PLANO
+# Cola en la base (sin Redis) que procesa `flask run-jobs`.
+# status: queued | running | succeeded | failed (ver api/jobs.py)
+# =====================================================
+class Job(db.Model):
+    __tablename__ = "jobs"
+    __table_args__ = (
+        db.Index("ix_jobs_status_run_after", "status", "run_after", "id"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    params = db.Column(db.JSON, nullable=False, default=dict)
+
+    status = db.Column(db.String(20), nullable=False, default="queued")
+    progress = db.Column(db.Integer, nullable=False, default=0)
+    message = db.Column(db.String(255))
+    result = db.Column(db.JSON)
+    error = db.Column(db.Text)
+
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=3)
+
+    condominium_id = db.Column(
+        db.Integer,
+        db.ForeignKey("condominios.id"),
+        nullable=True,
+        index=True
+    )
+    created_by = db.Column(db.Integer, nullable=True)
+
+    run_after = db.Column(db.DateTime(timezone=True), nullable=False)
+    locked_by = db.Column(db.String(100))
+    heartbeat_at = db.Column(db.DateTime(timezone=True))
+
+    created_at = db.Column(db.DateTime(timezone=True), server_default=db.func.now())
+    started_at = db.Column(db.DateTime(timezone=True))
+    finished_at = db.Column(db.DateTime(timezone=True))
+
+    def __repr__(self):
+        return f"<Job {self.id} {self.kind} {self.status}>"
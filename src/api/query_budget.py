@@ -0,0 +1,132 @@
+"""
+Presupuesto de sentencias SQL por endpoint, para detectar N+1.
+
+check_query_budgets() crea un set de datos de prueba dentro de una
+transacción (sin commit), llama cada endpoint con el test client de Flask
+contando las sentencias SQL y luego hace rollback. Como hay varias filas
+por tabla, un lazy load por fila aparece como sentencias extra y supera
+el presupuesto. Se usa desde `flask check-query-budgets`.
+"""
+from contextlib import contextmanager
+from datetime import date, timedelta
+from sqlalchemy import event
+from api.models import (
+    db,
+    Condominio,
+    Expense,
+    ExpenseCategory,
+    ExpenseStatus,
+    Provider,
+    Role,
+    User,
+)
+
+FIXTURE_ROWS = 5
+
+# (ruta, sentencias SQL máximas). {condominium_id} se completa con el fixture.
+BUDGETS = [
+    ("/api/users", 2),
+    ("/api/condominios", 1),
+    ("/api/roles", 2),
+    ("/api/providers", 2),
+    ("/api/expenses", 1),
+    ("/api/expenses/category", 2),
+    ("/api/expenses/status", 2),
+    ("/api/expenses/condominium?condominium_id={condominium_id}", 2),
+    ("/api/expenses/monthly?condominium_id={condominium_id}", 2),
+    ("/api/expenses/aggregate?condominium_id={condominium_id}&group_by=category,status", 1),
+    ("/api/condominios/{condominium_id}/dashboard", 4),
+]
+
+
+@contextmanager
+def count_statements(engine):
+    """
+    Registra las sentencias ejecutadas en engine dentro del bloque, como
+    (sql, parámetros del driver). api/query_plans.py les hace EXPLAIN.
+    """
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def create_fixture():
+    roles = [Role(name=f"budget-role-{i}") for i in range(2)]
+    statuses = [ExpenseStatus(name=f"budget-status-{i}") for i in range(2)]
+    categories = [ExpenseCategory(name=f"budget-category-{i}") for i in range(2)]
+    providers = [Provider(name=f"budget-provider-{i}", service_type="test") for i in range(2)]
+    db.session.add_all(roles + statuses + categories + providers)
+
+    users = [
+        User(
+            first_name="Budget",
+            last_name=str(i),
+            email=f"budget-user-{i}@example.com",
+            password="x",
+            roles=roles,
+        )
+        for i in range(FIXTURE_ROWS)
+    ]
+    db.session.add_all(users)
+    db.session.flush()
+
+    condominios = [
+        Condominio(
+            administrador_id=users[i].id,
+            nombre=f"Budget {i}",
+            comuna="Test",
+            direccion="Test",
+            total_unidades=10,
+        )
+        for i in range(FIXTURE_ROWS)
+    ]
+    db.session.add_all(condominios)
+    db.session.flush()
+
+    today = date.today()
+    db.session.add_all([
+        Expense(
+            provider_id=providers[i % 2].id,
+            condominium_id=condominios[0].id,
+            category_id=categories[i % 2].id,
+            expense_status_id=statuses[i % 2].id,
+            expense_date=today - timedelta(days=i),
+            amount=1000 + i,
+            document_number=f"B-{i}",
+        )
+        for i in range(FIXTURE_ROWS)
+    ])
+    db.session.flush()
+
+    # Se limpia el estado para que los endpoints no reutilicen objetos cargados
+    db.session.expire_all()
+    return condominios[0].id
+
+
+def check_query_budgets(app):
+    """
+    Retorna [(ruta, sentencias, presupuesto, status_code)]. Debe llamarse
+    dentro de un app context; los requests del test client reutilizan su
+    sesión y por eso ven el fixture sin commit.
+    """
+    results = []
+    try:
+        condominium_id = create_fixture()
+        client = app.test_client()
+
+        for path, budget in BUDGETS:
+            url = path.format(condominium_id=condominium_id)
+            with count_statements(db.engine) as statements:
+                response = client.get(url)
+            results.append((url, len(statements), budget, response.status_code))
+    finally:
+        db.session.rollback()
+
+    return results
@@ -0,0 +1,124 @@
+"""
+Chequeo de planes de ejecución para las consultas calientes de los blueprints.
+
+Llama las rutas con el test client sobre el fixture de api/query_budget.py
+(dentro de una transacción que termina en rollback), captura el SQL que
+emiten y ejecuta EXPLAIN sobre cada sentencia en la base configurada
+(SQLite o PostgreSQL). Así se revisan las consultas reales, con sus
+joinedload, filtros y GROUP BY, y no copias escritas a mano. Reporta las
+que recorren completas las tablas grandes. Se usa desde el comando
+`flask check-query-plans`.
+"""
+import json
+import re
+from api.models import db
+from api.query_budget import FIXTURE_ROWS, count_statements, create_fixture
+
+# Tablas que crecen con el uso; las de referencia (roles, categorías,
+# estados) son pequeñas y un scan completo sobre ellas es esperado.
+HOT_TABLES = ("expenses", "users", "expense_monthly_rollups")
+
+SQLITE_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)")
+
+# (método, ruta, body JSON) de las rutas con filtros sobre tablas calientes.
+# {condominium_id} se completa con el fixture.
+PLAN_ROUTES = [
+    ("GET", "/api/expenses/condominium?condominium_id={condominium_id}"
+            "&fields=id,amount,provider_name,category_name,status", None),
+    ("GET", "/api/expenses/condominium?condominium_id={condominium_id}"
+            "&document_number=B&expense_status_id=1&date_from=2020-01-01", None),
+    ("GET", "/api/expenses/condominium/export?condominium_id={condominium_id}", None),
+    ("GET", "/api/expenses/monthly?condominium_id={condominium_id}", None),
+    ("GET", "/api/expenses/aggregate?condominium_id={condominium_id}"
+            "&group_by=category,status,provider", None),
+    ("GET", "/api/expenses/aggregate?condominium_id={condominium_id}&group_by=month", None),
+    ("GET", "/api/condominios/{condominium_id}/dashboard", None),
+    ("POST", "/api/login", {"email": f"budget-user-{FIXTURE_ROWS - 1}@example.com", "password": "x"}),
+]
+
+
+def route_statements(app):
+    """
+    [(nombre, sql, parámetros)] de los SELECT que emiten PLAN_ROUTES. Debe
+    llamarse dentro de un app context y de la transacción del fixture.
+    """
+    from api.dashboard import dashboard_cache
+
+    condominium_id = create_fixture()
+    client = app.test_client()
+    dashboard_cache.invalidate({condominium_id})
+
+    captured = []
+    seen = set()
+    for method, path, body in PLAN_ROUTES:
+        url = path.format(condominium_id=condominium_id)
+        with count_statements(db.engine) as statements:
+            client.open(url, method=method, json=body)
+
+        selects = [
+            (sql, parameters) for sql, parameters in statements
+            if sql.lstrip().upper().startswith("SELECT") and sql not in seen
+        ]
+        for i, (sql, parameters) in enumerate(selects, start=1):
+            seen.add(sql)
+            name = f"{method} {url}" + (f" #{i}" if len(selects) > 1 else "")
+            captured.append((name, sql, parameters))
+
+    return captured
+
+
+def _explain(sql, parameters):
+    return db.session.connection().exec_driver_sql(sql, parameters)
+
+
+def _explain_sqlite(sql, parameters):
+    rows = _explain("EXPLAIN QUERY PLAN " + sql, parameters).fetchall()
+    plan = [row[-1] for row in rows]
+    # "SEARCH t USING INDEX" usa el índice; "SCAN t" recorre la tabla o el índice completo
+    scans = [
+        line for line in plan
+        if (match := SQLITE_SCAN.match(line)) and match.group(1) in HOT_TABLES
+    ]
+    return plan, scans
+
+
+def _walk_pg_plan(node):
+    yield node
+    for child in node.get("Plans", []):
+        yield from _walk_pg_plan(child)
+
+
+def _explain_postgres(sql, parameters):
+    # Con enable_seqscan=off el planner solo elige Seq Scan si no hay índice usable,
+    # así el resultado no depende del volumen de datos de la base local.
+    db.session.connection().exec_driver_sql("SET LOCAL enable_seqscan = off")
+    raw = _explain("EXPLAIN (FORMAT JSON) " + sql, parameters).scalar()
+    root = (raw if isinstance(raw, list) else json.loads(raw))[0]["Plan"]
+    nodes = list(_walk_pg_plan(root))
+    plan = [
+        f"{n['Node Type']} {n.get('Relation Name', '')} {n.get('Index Name', '')}".strip()
+        for n in nodes
+    ]
+    scans = [
+        line for n, line in zip(nodes, plan)
+        if n["Node Type"] == "Seq Scan" and n.get("Relation Name") in HOT_TABLES
+    ]
+    return plan, scans
+
+
+def check_query_plans(app):
+    """
+    Retorna una lista de dicts {name, sql, plan, scans}; scans no vacío
+    indica que la consulta recorre completa alguna tabla caliente.
+    """
+    explain = _explain_postgres if db.engine.dialect.name == "postgresql" else _explain_sqlite
+
+    results = []
+    try:
+        for name, sql, parameters in route_statements(app):
+            plan, scans = explain(sql, parameters)
+            results.append({"name": name, "sql": sql, "plan": plan, "scans": scans})
+    finally:
+        db.session.rollback()
+
+    return results
@@ -1,32 +1,52 @@
 from flask import Blueprint, request, jsonify
+from sqlalchemy.orm import joinedload
 from api.models import db, Condominio, User
+from api.serializers import CONDOMINIO, json_response, list_options
+from api.dashboard import (
+    DEFAULT_TOP_PROVIDERS,
+    MAX_TOP_PROVIDERS,
+    cached_condominium_dashboard,
+)
 
 condominios_bp = Blueprint("condominios", __name__)
 
 
 @condominios_bp.route("/condominios", methods=["GET"])
 def get_condominios():
-    condominios = Condominio.query.order_by(Condominio.created_at.desc()).all()
-
-    return jsonify([
-        {
-            "id": c.id,
-            "nombre": c.nombre,
-            "comuna": c.comuna,
-            "direccion": c.direccion,
-            "total_unidades": c.total_unidades,
-            "email_contacto": c.email_contacto,
-            "telefono_contacto": c.telefono_contacto,
-            "estado": c.estado,
-            "created_at": c.created_at.isoformat(),
-            "administrador_id": c.administrador_id,
-            "administrador_nombre": (
-                f"{c.administrador.first_name} {c.administrador.last_name}"
-                if c.administrador else "Sin asignar"
-            )
-        }
-        for c in condominios
-    ]), 200
+    """Acepta fields=a,b,c y format=rows|columnar (ver api/serializers.py)."""
+    try:
+        spec, columnar = list_options(CONDOMINIO, request.args)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
+    query = Condominio.query
+    if "administrador_nombre" in spec.fields:
+        query = query.options(joinedload(Condominio.administrador))
+
+    condominios = query.order_by(Condominio.created_at.desc()).all()
+
+    return json_response(spec.render(condominios, columnar))
+
+# ============================
+# DASHBOARD
+# ============================
+@condominios_bp.route("/condominios/<int:id>/dashboard", methods=["GET"])
+def get_condominio_dashboard(id):
+    """
+    Totales del mes actual vs el anterior, desglose por categoría y estado,
+    top proveedores del mes (top=N, default 5) y gastos pendientes, en una
+    sola respuesta con caché de pocos segundos (ver api/dashboard.py).
+    """
+    top = request.args.get("top", DEFAULT_TOP_PROVIDERS, type=int)
+    if not 1 <= top <= MAX_TOP_PROVIDERS:
+        return jsonify({"message": f"top debe estar entre 1 y {MAX_TOP_PROVIDERS}"}), 400
+
+    if not db.session.get(Condominio, id):
+        return jsonify({"msg": "Condominio no encontrado"}), 404
+
+    response = json_response(cached_condominium_dashboard(id, top))
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
 
 # ============================
 # UPDATE CONDOMINIO
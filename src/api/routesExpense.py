@@ -1,8 +1,49 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
 from werkzeug.security import generate_password_hash
 from api.models import db, User, Role, ExpenseCategory, Expense, ExpenseStatus
 from datetime import date, datetime
+from sqlalchemy import and_, func, or_
+from sqlalchemy.exc import DataError, IntegrityError
 from sqlalchemy.orm import joinedload
+from api.expense_aggregates import aggregate_expenses, month_bounds, parse_month
+from api.uf_history import UFConverter, parse_currency
+from api.http_cache import conditional_cache
+from api.serializers import (
+    EXPENSE,
+    EXPENSE_CATEGORY,
+    EXPENSE_CREATED,
+    EXPENSE_DOCUMENT,
+    EXPENSE_ITEM,
+    EXPENSE_MONTHLY,
+    EXPENSE_STATUS,
+    EXPENSE_UPDATED,
+    add_field,
+    json_response,
+    list_options,
+)
+from api.expense_filters import expense_filters
+from api.expense_export import csv_chunks, export_rows, xlsx_chunks
+from api.expense_import import (
+    DEFAULT_BATCH_SIZE,
+    ImportFileError,
+    import_expenses,
+    iter_rows,
+)
+from api.expense_batch import (
+    BatchUpdateError,
+    apply_batch_updates,
+    apply_filter_update,
+)
+from api.expense_documents import DocumentError, attach_documents, preview_worker
+from api.expense_rollups import (
+    monthly_rollup_summary,
+    record_expense,
+    record_expense_change,
+    snapshot,
+)
+import base64
+import binascii
+import zlib
 
 expenses_bp = Blueprint("expenses_bp", __name__)
 
@@ -11,41 +52,30 @@ expenses_bp = Blueprint("expenses_bp", __name__)
 # GET ALL EXPENSES CATEGORY
 # ============================
 @expenses_bp.route("/expenses/category", methods=["GET"])
+@conditional_cache("expense_categories")
 def get_expenses_category():
     categories = ExpenseCategory.query.all()
 
-    return jsonify([
-        {
-            "id": c.id,
-            "name": c.name,
-            "description": c.description,
-            "is_active": c.is_active
-        }
-        for c in categories
-    ]), 200
+    return json_response(EXPENSE_CATEGORY.many(categories))
 
 # ============================
 # GET ALL EXPENSES
 # ============================
 @expenses_bp.route("/expenses", methods=["GET"])
 def get_expenses():
-    expenses = Expense.query.order_by(Expense.expense_date.desc()).all()
-
-    return jsonify([
-        {   
-            "id": e.id,
-            "provider_id": e.provider_id,
-            "category_id": e.category_id,
-            "condominium_id": e.condominium_id,
-            "amount": e.amount,
-            "description": e.observation,
-            "date": e.expense_date,
-            "document_number": e.document_number,
-            "status": e.status.name if e.status else "Pendiente",
-            "created_at": e.created_at.isoformat() if e.created_at else None,
-        }
-        for e in expenses
-    ]), 200
+    """Todos los gastos. Acepta fields=a,b,c y format=rows|columnar."""
+    try:
+        spec, columnar = list_options(EXPENSE, request.args)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
+    query = Expense.query
+    if "status" in spec.fields:
+        query = query.options(joinedload(Expense.status))
+
+    expenses = query.order_by(Expense.expense_date.desc()).all()
+
+    return json_response(spec.render(expenses, columnar))
 
 # ============================
 # GET ALL EXPENSES MONTHLY
@@ -55,6 +85,12 @@ def get_expenses_monthly():
     condominium_id = request.args.get("condominium_id", type=int)
     month = request.args.get("month", type=int)
     year = request.args.get("year", type=int)
+    include_expenses = request.args.get("include_expenses", "1").lower() not in ("0", "false")
+
+    try:
+        currency = parse_currency(request.args.get("currency"))
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
 
     today = date.today()
 
@@ -63,40 +99,88 @@ def get_expenses_monthly():
     if not year:
         year = today.year
 
-    start = date(year, month, 1)
+    start, end = month_bounds(year, month)
 
-    if month == 12:
-        end = date(year + 1, 1, 1)
-    else:
-        end = date(year, month + 1, 1)
+    # Totales desde el rollup mensual, sin recorrer los gastos
+    summary = monthly_rollup_summary(condominium_id, year, month)
 
-    print("START:", start)
-    print("END:", end)
+    expenses = []
+    if include_expenses:
+        expenses = Expense.query.filter(
+            Expense.condominium_id == condominium_id,
+            Expense.expense_date >= start,
+            Expense.expense_date < end
+        ).all()
 
-    expenses = Expense.query.filter(
-        Expense.condominium_id == condominium_id,
-        Expense.expense_date >= start,
-        Expense.expense_date < end
-    ).all()
-
-    return jsonify({
+    response = {
     "month": month,
     "year": year,
-    "total_amount": sum(e.amount for e in expenses),
-    "count": len(expenses),
-    "expenses": [
-        {
-            "id": e.id,
-            "expense_date": e.expense_date.isoformat(),
-            "amount": e.amount,
-            "category_id": e.category_id,
-            "provider_id": e.provider_id,
-            "document_number": e.document_number,
-            "observation": e.observation,
-        }
-        for e in expenses
+    "currency": currency,
+    "total_amount": summary["total_amount"],
+    "count": summary["count"],
+    "expenses": EXPENSE_MONTHLY.many(expenses),
+}
+
+    if currency == "UF":
+        uf_totals = aggregate_expenses(condominium_id, start, end, currency="UF")
+        response["total_amount_uf"] = uf_totals[0]["total_amount_uf"] if uf_totals else 0.0
+        _add_uf_amounts(response["expenses"], expenses, start, end)
+
+    return json_response(response)
+
+
+# ============================
+# AGGREGATE EXPENSES
+# ============================
+@expenses_bp.route("/expenses/aggregate", methods=["GET"])
+def get_expenses_aggregate():
+    """
+    Totales por rango de meses agrupados en la base de datos.
+    Parámetros: condominium_id, start_month y end_month (YYYY-MM, inclusivos,
+    por defecto el mes actual) y group_by (lista separada por comas de
+    month, category, provider, status).
+    """
+    condominium_id = request.args.get("condominium_id", type=int)
+
+    if not condominium_id:
+        return jsonify({"message": "condominium_id es requerido"}), 400
+
+    today = date.today()
+    current_month = f"{today.year}-{today.month:02d}"
+    group_by = [
+        g.strip() for g in request.args.get("group_by", "").split(",") if g.strip()
     ]
-}), 200
+
+    try:
+        currency = parse_currency(request.args.get("currency"))
+        start_year, start_month = parse_month(request.args.get("start_month", current_month))
+        end_year, end_month = parse_month(request.args.get("end_month", current_month))
+        start, _ = month_bounds(start_year, start_month)
+        _, end = month_bounds(end_year, end_month)
+        if start >= end:
+            raise ValueError("start_month debe ser anterior o igual a end_month")
+        results = aggregate_expenses(condominium_id, start, end, group_by, currency=currency)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
+    response = {
+        "condominium_id": condominium_id,
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "group_by": group_by,
+        "currency": currency,
+        "total_amount": sum(r["total_amount"] for r in results),
+        "count": sum(r["count"] for r in results),
+        "results": results,
+    }
+
+    if currency == "UF":
+        uf_values = [r["total_amount_uf"] for r in results]
+        response["total_amount_uf"] = (
+            None if None in uf_values else round(sum(uf_values), 4)
+        )
+
+    return json_response(response)
 
 
 # ============================
@@ -141,56 +225,256 @@ def create_expense():
     )
 
     db.session.add(new_expense)
+    record_expense(new_expense)
+
+    # Facturas / boletas adjuntas (files), ya escritas a disco por chunks
+    try:
+        documents = attach_documents(
+            new_expense,
+            request.files.getlist("files"),
+            data.get("document_type") or None
+        )
+    except DocumentError as e:
+        db.session.rollback()
+        return jsonify({"message": str(e)}), 400
+
     db.session.commit()
+    preview_worker.submit(
+        current_app._get_current_object(),
+        [d.id for d in documents if d.preview_status == "pending"]
+    )
+
+    created = EXPENSE_CREATED.one(new_expense)
+    created["documents"] = EXPENSE_DOCUMENT.many(documents)
+    return json_response(created, 201)
+
+
+# ============================
+# BULK IMPORT (CSV / XLSX)
+# ============================
+@expenses_bp.route("/expenses/import", methods=["POST"])
+def import_expenses_file():
+    """
+    Carga masiva de gastos. multipart/form-data con file (CSV o XLSX) y
+    condominium_id. Las filas inválidas se informan en errors y no
+    detienen la carga.
+    """
+    upload = request.files.get("file")
+    condominium_id = request.form.get("condominium_id", type=int)
+
+    if not upload or not upload.filename:
+        return jsonify({"message": "Campo requerido: file"}), 400
+    if not condominium_id:
+        return jsonify({"message": "Campo requerido: condominium_id"}), 400
+
+    batch_size = request.form.get("batch_size", DEFAULT_BATCH_SIZE, type=int)
+    batch_size = max(1, min(batch_size, 10000))
+
+    try:
+        report = import_expenses(
+            iter_rows(upload.stream, upload.filename),
+            condominium_id,
+            batch_size
+        )
+    except ImportFileError as e:
+        db.session.rollback()
+        return jsonify({"message": str(e)}), 400
+
+    return jsonify(report), 200
+
+
+# ============================
+# HELPERS LISTADO POR CONDOMINIO
+# ============================
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def _encode_cursor(expense):
+    raw = f"{expense.expense_date.isoformat()}|{expense.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        cursor_date, cursor_id = raw.split("|")
+        return datetime.strptime(cursor_date, "%Y-%m-%d").date(), int(cursor_id)
+    except (ValueError, UnicodeDecodeError, binascii.Error):
+        raise ValueError("cursor inválido")
+
 
-    return jsonify({
-        "id": new_expense.id,
-        "provider_id": new_expense.provider_id,
-        "category_id": new_expense.category_id,
-        "amount": float(new_expense.amount),
-        "observation": new_expense.observation,
-        "document_number": new_expense.document_number,
-        "expense_date": new_expense.expense_date.isoformat(),
-        "status": new_expense.status.name if new_expense.status else "Pendiente",
-    }), 201
+def _expense_filters_from_args():
+    return expense_filters(request.args)
+
+
+def _add_uf_amounts(items, expenses, start, end):
+    """Agrega amount_uf a cada item usando la UF vigente en su expense_date."""
+    converter = UFConverter.for_range(start, end)
+    amounts_uf = converter.convert(
+        [e.amount for e in expenses],
+        [e.expense_date for e in expenses]
+    )
+    add_field(items, "amount_uf", amounts_uf)
+
+
+# ============================
+# GET EXPENSES BY CONDOMINIUM (KEYSET)
+# ============================
+EXPENSE_ITEM_RELATIONS = {
+    "provider_name": Expense.provider,
+    "category_name": Expense.category,
+    "status": Expense.status,
+}
 
 
 @expenses_bp.route("/expenses/condominium", methods=["GET"])
 def get_expenses_by_condominium():
-    condominium_id = request.args.get("condominium_id")
+    """
+    Lista paginada por cursor sobre (expense_date, id), ordenada de más
+    reciente a más antiguo. Parámetros opcionales: limit, cursor,
+    document_number, date_from, date_to, provider_id, category_id,
+    expense_status_id, include_total (0 para omitir el conteo), fields y
+    format (rows|columnar, ver api/serializers.py).
+    """
+    condominium_id = request.args.get("condominium_id", type=int)
 
     if not condominium_id:
         return jsonify({"message": "condominium_id es requerido"}), 400
 
-    expenses = (
+    limit = request.args.get("limit", DEFAULT_PAGE_SIZE, type=int)
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    cursor = request.args.get("cursor")
+    include_total = request.args.get("include_total", "1").lower() not in ("0", "false")
+
+    try:
+        currency = parse_currency(request.args.get("currency"))
+        filters = _expense_filters_from_args()
+        cursor_values = _decode_cursor(cursor) if cursor else None
+        spec, columnar = list_options(EXPENSE_ITEM, request.args)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
+    # Solo se cargan las relaciones de los campos pedidos
+    query = (
         Expense.query
-        .options(
-            joinedload(Expense.provider),
-            joinedload(Expense.category),
-            joinedload(Expense.status)
-        )
-        .filter_by(condominium_id=condominium_id)
-        .order_by(Expense.expense_date.desc())
+        .options(*[
+            joinedload(relation)
+            for field, relation in EXPENSE_ITEM_RELATIONS.items()
+            if field in spec.fields
+        ])
+        .filter(*filters)
+    )
+
+    if cursor_values:
+        cursor_date, cursor_id = cursor_values
+        query = query.filter(or_(
+            Expense.expense_date < cursor_date,
+            and_(Expense.expense_date == cursor_date, Expense.id < cursor_id)
+        ))
+
+    # Se pide una fila extra para saber si hay página siguiente
+    expenses = (
+        query
+        .order_by(Expense.expense_date.desc(), Expense.id.desc())
+        .limit(limit + 1)
         .all()
     )
 
-    return jsonify([
-        {
-            "id": e.id,
-            "provider_id": e.provider_id,
-            "provider_name": e.provider.name if e.provider else None,
-            "category_id": e.category_id,
-            "category_name": e.category.name if e.category else None,
-            "condominium_id": e.condominium_id,
-            "amount": float(e.amount),
-            "observation": e.observation,
-            "document_number": e.document_number,
-            "expense_date": e.expense_date.isoformat(),
-            "status": e.status.name if e.status else "Pendiente",
-            "expense_status_id": e.expense_status_id, # return ID for editing
-        }
-        for e in expenses
-    ]), 200
+    has_more = len(expenses) > limit
+    expenses = expenses[:limit]
+
+    total = None
+    if include_total:
+        total = (
+            db.session.query(func.count(Expense.id))
+            .filter(*filters)
+            .scalar()
+        )
+
+    items = spec.render(expenses, columnar)
+
+    if currency == "UF" and expenses:
+        _add_uf_amounts(
+            items,
+            expenses,
+            expenses[-1].expense_date,
+            expenses[0].expense_date
+        )
+
+    return json_response({
+        "items": items,
+        "currency": currency,
+        "limit": limit,
+        "has_more": has_more,
+        "next_cursor": _encode_cursor(expenses[-1]) if has_more else None,
+        "total": total,
+    })
+
+# ============================
+# EXPORT EXPENSES BY CONDOMINIUM (STREAMING)
+# ============================
+def _gzip_chunks(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+@expenses_bp.route("/expenses/condominium/export", methods=["GET"])
+def export_expenses_by_condominium():
+    """
+    Descarga en streaming los gastos de un condominio (format=csv|xlsx) con
+    los mismos filtros del listado. gzip=1 comprime la transferencia si el
+    cliente acepta gzip.
+    """
+    condominium_id = request.args.get("condominium_id", type=int)
+
+    if not condominium_id:
+        return jsonify({"message": "condominium_id es requerido"}), 400
+
+    export_format = request.args.get("format", "csv").lower()
+    if export_format not in ("csv", "xlsx"):
+        return jsonify({"message": "format debe ser csv o xlsx"}), 400
+
+    if export_format == "xlsx":
+        try:
+            import openpyxl  # noqa: F401
+        except ImportError:
+            return jsonify({"message": "La exportación XLSX requiere el paquete openpyxl"}), 400
+
+    try:
+        filters = _expense_filters_from_args()
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
+    rows = export_rows(filters)
+    if export_format == "xlsx":
+        chunks = xlsx_chunks(rows)
+        mimetype = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    else:
+        chunks = csv_chunks(rows)
+        mimetype = "text/csv"
+
+    headers = {
+        "Content-Disposition": (
+            f"attachment; filename=gastos_condominio_{condominium_id}.{export_format}"
+        )
+    }
+
+    use_gzip = (
+        request.args.get("gzip", "0").lower() in ("1", "true")
+        and "gzip" in request.accept_encodings
+    )
+    if use_gzip:
+        chunks = _gzip_chunks(chunks)
+        headers["Content-Encoding"] = "gzip"
+        headers["Vary"] = "Accept-Encoding"
+
+    return Response(stream_with_context(chunks), mimetype=mimetype, headers=headers)
+
 
 # ============================
 # UPDATE EXPENSE (PUT)
@@ -205,7 +489,10 @@ def update_expense(expense_id):
     expense = Expense.query.get(expense_id)
     if not expense:
         return jsonify({"message": "Gasto no encontrado"}), 404
-    
+
+    # Valores previos para mover el gasto dentro del rollup mensual
+    previous = snapshot(expense)
+
     # Actualización de campos
     expense.provider_id = data.get("provider_id", expense.provider_id)
     expense.category_id = data.get("category_id", expense.category_id)
@@ -223,30 +510,58 @@ def update_expense(expense_id):
     if "amount" in data:
         expense.amount = data["amount"] # SQLAlchemy se encarga de convertir a Decimal al guardar
         
-    # ... lógica de fecha ...
+    if isinstance(expense.expense_date, str):
+        try:
+            expense.expense_date = datetime.strptime(
+                expense.expense_date.split("T")[0], "%Y-%m-%d"
+            ).date()
+        except ValueError:
+            db.session.rollback()
+            return jsonify({"message": "expense_date debe tener formato YYYY-MM-DD"}), 400
 
     try:
+        record_expense_change(previous, expense)
         db.session.commit() # <--- AQUÍ SE GUARDA EL DATO. SI PASA ESTO, EL DATO ESTÁ SALVADO.
     except Exception as e:
         db.session.rollback()
         return jsonify({"message": str(e)}), 500
 
-    # ==============================================================
-    # AQUÍ ES DONDE SUELE DAR EL ERROR 500 DE SERIALIZACIÓN
-    # ==============================================================
-    return jsonify({
-        "id": expense.id,
-        "provider_id": expense.provider_id,
-        "category_id": expense.category_id,
-        # IMPORTANTE: Convertir Decimal a float
-        "amount": float(expense.amount) if expense.amount else 0.0, 
-        "observation": expense.observation,
-        "document_number": expense.document_number,
-        "status": expense.status.name if expense.status else None,
-        "expense_status_id": expense.expense_status_id,
-        # IMPORTANTE: Convertir fecha a string ISO
-        "expense_date": expense.expense_date.isoformat() if expense.expense_date else None 
-    }), 200
+    return json_response(EXPENSE_UPDATED.one(expense))
+
+# ============================
+# BATCH UPDATE (PATCH)
+# ============================
+@expenses_bp.route("/expenses/batch", methods=["PATCH"])
+def batch_update_expenses():
+    """
+    Actualiza varios gastos en una transacción. Body JSON, una de dos formas:
+      {"condominium_id": 1, "updates": [{"id": 10, "version": 3, "expense_status_id": 2}, ...]}
+      {"filter": {"condominium_id": 1, "expense_status_id": 1, ...}, "changes": {"expense_status_id": 2}}
+    Retorna solo los ids cambiados con su nueva versión.
+    """
+    data = request.get_json(silent=True)
+
+    if not isinstance(data, dict):
+        return jsonify({"message": "Invalid request"}), 400
+
+    try:
+        if "updates" in data:
+            condominium_id = data.get("condominium_id")
+            if not str(condominium_id or "").isdigit():
+                return jsonify({"message": "condominium_id es requerido"}), 400
+            result = apply_batch_updates(int(condominium_id), data["updates"])
+        elif isinstance(data.get("filter"), dict) and isinstance(data.get("changes"), dict):
+            filters = expense_filters(data["filter"])
+            result = apply_filter_update(filters, data["changes"])
+        else:
+            return jsonify({"message": "Se requiere updates o filter + changes"}), 400
+    except (BatchUpdateError, ValueError) as e:
+        return jsonify({"message": str(e)}), 400
+    except (IntegrityError, DataError) as e:
+        # _apply_groups ya hizo rollback; valor que la base rechaza (FK, rango)
+        return jsonify({"message": f"Cambios inválidos: {e.orig}"}), 400
+
+    return jsonify(result), 200
 
 @expenses_bp.route("/expenses/<int:expense_id>", methods=["DELETE"])
 def delete_expense(expense_id):
@@ -254,20 +569,15 @@ def delete_expense(expense_id):
     if not expense:
         return jsonify({"message": "Gasto no encontrado"}), 404
     
+    record_expense(expense, sign=-1)
     db.session.delete(expense)
     db.session.commit()
     
     return jsonify({"message": "Gasto eliminado exitosamente"}), 200
 
 @expenses_bp.route("/expenses/status", methods=["GET"])
+@conditional_cache("expense_statuses")
 def get_expenses_status():
     statuses = ExpenseStatus.query.filter_by(is_active=True).all()
-    return jsonify([
-        {
-            "id": s.id,
-            "name": s.name,
-            "description": s.description
-        } 
-        for s in statuses
-    ]), 200
+    return json_response(EXPENSE_STATUS.many(statuses))
     
\ No newline at end of file
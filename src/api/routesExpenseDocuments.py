@@ -0,0 +1,102 @@
+from flask import Blueprint, abort, current_app, request, jsonify, send_file
+from api.models import db, Expense, ExpenseDocument
+from api.expense_documents import (
+    DocumentError,
+    absolute_path,
+    attach_documents,
+    preview_worker,
+)
+from api.serializers import EXPENSE_DOCUMENT, json_response
+
+expense_documents_bp = Blueprint("expense_documents_bp", __name__)
+
+# Tipos que el navegador puede mostrar en línea; el resto se descarga
+INLINE_TYPES = ("image/jpeg", "image/png", "image/gif", "image/webp", "application/pdf")
+
+# Un documento nunca cambia de contenido (el blob es por hash)
+DOCUMENT_CACHE = "private, max-age=31536000, immutable"
+
+
+# ============================
+# LISTAR DOCUMENTOS DE UN GASTO
+# ============================
+@expense_documents_bp.route("/expenses/<int:expense_id>/documents", methods=["GET"])
+def get_expense_documents(expense_id):
+    documents = (
+        ExpenseDocument.query
+        .filter_by(expense_id=expense_id)
+        .order_by(ExpenseDocument.id)
+        .all()
+    )
+    return json_response(EXPENSE_DOCUMENT.many(documents))
+
+
+# ============================
+# SUBIR DOCUMENTOS
+# ============================
+@expense_documents_bp.route("/expenses/<int:expense_id>/documents", methods=["POST"])
+def upload_expense_documents(expense_id):
+    """
+    multipart/form-data con uno o más files y document_type opcional
+    (invoice, receipt, quote). Los archivos se escriben a disco por chunks
+    mientras llegan; las miniaturas se generan en segundo plano.
+    """
+    expense = Expense.query.get(expense_id)
+    if not expense:
+        return jsonify({"message": "Gasto no encontrado"}), 404
+
+    uploads = request.files.getlist("files")
+    if not any(u.filename for u in uploads):
+        return jsonify({"message": "Campo requerido: files"}), 400
+
+    try:
+        documents = attach_documents(expense, uploads, request.form.get("document_type") or None)
+    except DocumentError as e:
+        db.session.rollback()
+        return jsonify({"message": str(e)}), 400
+
+    db.session.commit()
+    preview_worker.submit(
+        current_app._get_current_object(),
+        [d.id for d in documents if d.preview_status == "pending"],
+    )
+
+    return json_response(EXPENSE_DOCUMENT.many(documents), 201)
+
+
+# ============================
+# DESCARGA / MINIATURA
+# ============================
+def _send_document_file(relative_path, mimetype, download_name=None):
+    response = send_file(
+        absolute_path(relative_path),
+        mimetype=mimetype,
+        as_attachment=mimetype not in INLINE_TYPES,
+        download_name=download_name,
+        conditional=True,
+    )
+    response.headers["Cache-Control"] = DOCUMENT_CACHE
+    response.headers["X-Content-Type-Options"] = "nosniff"
+    return response
+
+
+@expense_documents_bp.route("/expenses/documents/<int:document_id>/file", methods=["GET"])
+def get_expense_document_file(document_id):
+    document = db.session.get(ExpenseDocument, document_id)
+    if not document:
+        abort(404)
+
+    return _send_document_file(
+        document.file_path,
+        document.content_type or "application/octet-stream",
+        document.original_name,
+    )
+
+
+@expense_documents_bp.route("/expenses/documents/<int:document_id>/thumbnail", methods=["GET"])
+def get_expense_document_thumbnail(document_id):
+    document = db.session.get(ExpenseDocument, document_id)
+    if not document or not document.thumbnail_path:
+        abort(404)
+
+    return _send_document_file(document.thumbnail_path, "image/jpeg")
@@ -0,0 +1,112 @@
+import os
+from flask import Blueprint, abort, request, jsonify, send_file
+from flask_jwt_extended import get_jwt
+from api.models import db, Job
+from api.auth import claims_allow, claims_required
+from api.jobs import JOB_KINDS, JOBS_RESULT_DIR, JobError, enqueue
+from api.serializers import JOB, json_response
+
+jobs_bp = Blueprint("jobs_bp", __name__)
+
+
+def _job_or_404(job_id):
+    job = db.session.get(Job, job_id)
+    if not job:
+        abort(404)
+    job_kind = JOB_KINDS.get(job.kind)
+    roles = job_kind.roles if job_kind else ()
+    scoped = job_kind.per_condominium if job_kind else True
+    if not claims_allow(get_jwt(), roles, job.condominium_id, scoped=scoped):
+        abort(403)
+    return job
+
+
+# ============================
+# ENCOLAR JOB
+# ============================
+@jobs_bp.route("/jobs", methods=["POST"])
+@claims_required()
+def create_job():
+    """
+    JSON {"kind": ..., "params": {...}} o, para import_expenses,
+    multipart/form-data con kind, condominium_id, file y batch_size.
+    Responde 202 con el job; el avance se consulta en GET /api/jobs/<id>.
+    """
+    if request.mimetype == "multipart/form-data":
+        kind = request.form.get("kind")
+        params = {k: v for k, v in request.form.items() if k != "kind"}
+    else:
+        data = request.get_json(silent=True) or {}
+        kind = data.get("kind")
+        params = data.get("params") or {}
+        if not isinstance(params, dict):
+            return jsonify({"message": "params debe ser un objeto"}), 400
+
+    job_kind = JOB_KINDS.get(kind)
+    if job_kind is None:
+        return jsonify({"message": f"kind inválido. Opciones: {', '.join(sorted(JOB_KINDS))}"}), 400
+
+    claims = get_jwt()
+    condominium_id = params.get("condominium_id") if job_kind.per_condominium else None
+    if job_kind.per_condominium and condominium_id is None:
+        return jsonify({"message": "condominium_id es requerido"}), 400
+    if condominium_id is not None and not str(condominium_id).isdigit():
+        return jsonify({"message": "condominium_id debe ser numérico"}), 400
+    if not claims_allow(claims, job_kind.roles, condominium_id, scoped=job_kind.per_condominium):
+        return jsonify({"message": "No autorizado para este job"}), 403
+
+    # enqueue vuelve a validar; acá se hace antes de guardar el archivo subido
+    try:
+        job_kind.check_params(params)
+    except JobError as e:
+        return jsonify({"message": str(e)}), 400
+
+    if kind == "import_expenses":
+        from api.expense_documents import store_blob
+
+        upload = request.files.get("file")
+        if not upload or not upload.filename:
+            return jsonify({"message": "Campo requerido: file"}), 400
+        _, _, params["file"] = store_blob(upload.stream)
+        params["filename"] = os.path.basename(upload.filename)
+
+    try:
+        job = enqueue(
+            kind,
+            params,
+            condominium_id=int(condominium_id) if condominium_id else None,
+            created_by=int(claims["sub"]) if str(claims.get("sub", "")).isdigit() else None,
+        )
+    except JobError as e:
+        return jsonify({"message": str(e)}), 400
+
+    response = json_response(JOB.one(job), 202)
+    response.headers["Location"] = f"/api/jobs/{job.id}"
+    return response
+
+
+# ============================
+# ESTADO / RESULTADO
+# ============================
+@jobs_bp.route("/jobs/<int:job_id>", methods=["GET"])
+@claims_required()
+def get_job(job_id):
+    job = _job_or_404(job_id)
+    response = json_response(JOB.one(job))
+    # El cliente hace polling: nunca desde caché
+    response.headers["Cache-Control"] = "no-store"
+    return response
+
+
+@jobs_bp.route("/jobs/<int:job_id>/result", methods=["GET"])
+@claims_required()
+def get_job_result(job_id):
+    job = _job_or_404(job_id)
+    if job.status != "succeeded" or not (job.result or {}).get("file"):
+        return jsonify({"message": "El job no tiene un archivo de resultado"}), 404
+
+    path = os.path.realpath(os.path.join(JOBS_RESULT_DIR, job.result["file"]))
+    if not path.startswith(JOBS_RESULT_DIR + os.sep) or not os.path.exists(path):
+        abort(404)
+
+    return send_file(path, as_attachment=True, download_name=job.result.get("filename"))
@@ -0,0 +1,54 @@
+"""
+Estado del pool y métricas de Prometheus, solo para operación.
+
+Requieren un JWT de SUPERADMIN o, para el scraper de Prometheus, el header
+Authorization: Bearer <METRICS_TOKEN>.
+
+Variables:
+    METRICS_TOKEN   token fijo para /api/_metrics y /api/_pool (sin definir, solo JWT)
+"""
+import hmac
+import os
+from functools import wraps
+from flask import Blueprint, Response, jsonify, request
+from api.models import db
+from api.auth import SUPERADMIN, claims_required
+from api.db_pool import pool_status
+from api.metrics import render_metrics
+
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+metrics_bp = Blueprint("metrics_bp", __name__)
+
+
+def metrics_auth(view):
+    superadmin_view = claims_required(SUPERADMIN)(view)
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        authorization = request.headers.get("Authorization", "")
+        if METRICS_TOKEN and hmac.compare_digest(authorization, f"Bearer {METRICS_TOKEN}"):
+            return view(*args, **kwargs)
+        return superadmin_view(*args, **kwargs)
+    return wrapper
+
+
+# ============================
+# POOL DE CONEXIONES
+# ============================
+@metrics_bp.route("/_pool", methods=["GET"])
+@metrics_auth
+def get_pool_status():
+    return jsonify(pool_status(db.engine)), 200
+
+
+# ============================
+# PROMETHEUS
+# ============================
+@metrics_bp.route("/_metrics", methods=["GET"])
+@metrics_auth
+def get_metrics():
+    return Response(
+        render_metrics(pool_status(db.engine)),
+        mimetype="text/plain; version=0.0.4"
+    )
@@ -1,27 +1,23 @@
 from flask import Blueprint, request, jsonify
 from api.models import db, Condominio, User , Provider
+from api.http_cache import conditional_cache
+from api.serializers import PROVIDER, json_response, list_options
 
 providers_bp = Blueprint("providers", __name__)
 
 
 @providers_bp.route("/providers", methods=["GET"])
+@conditional_cache("providers")
 def get_providers():
+    """Acepta fields=a,b,c y format=rows|columnar (ver api/serializers.py)."""
+    try:
+        spec, columnar = list_options(PROVIDER, request.args)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
     providers = Provider.query.order_by(Provider.created_at.desc()).all()
 
-    return jsonify([
-        {
-            "id": c.id,
-            "name": c.name,
-            "service_type": c.service_type,
-            "rut": c.rut,
-            "email": c.email,
-            "phone": c.phone,
-            "address": c.address,
-            "is_active": c.is_active,
-            "created_at": c.created_at.isoformat(),
-        }
-        for c in providers
-    ]), 200
+    return json_response(spec.render(providers, columnar))
 
 # ============================
 # UPDATE PROVIDER
@@ -1,16 +1,13 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint
 from api.models import Role
+from api.http_cache import conditional_cache
+from api.serializers import ROLE, json_response
 
 roles_bp = Blueprint("roles_bp", __name__)
 
 @roles_bp.route("/roles", methods=["GET"])
+@conditional_cache("roles")
 def get_roles():
     roles = Role.query.order_by(Role.name.asc()).all()
 
-    return jsonify([
-        {
-            "id": role.id,
-            "name": role.name
-        }
-        for role in roles
-    ])
+    return json_response(ROLE.many(roles))
@@ -1,19 +1,14 @@
 """
 This module takes care of starting the API Server, Loading the DB and Adding the endpoints
 """
-from flask import Flask, request, jsonify, url_for, Blueprint
-from flask_cors import CORS
-from base64 import b64encode
-from werkzeug.security import generate_password_hash, check_password_hash
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
-import os
-import cloudinary.uploader as uploader
-from api.models import db, User
+from flask import request, jsonify, Blueprint
 from werkzeug.security import check_password_hash
+from flask_jwt_extended import get_jwt
+from api.models import User
+from api.auth import claims_required, issue_token, revoke_token
 
+# CORS de /api/* se configura una sola vez en app.py
 signin_api = Blueprint("signin_api", __name__)
-# Allow CORS requests to this API
-CORS(signin_api)
 
 @signin_api.route("/login", methods=["POST"])
 def login():
@@ -30,7 +25,8 @@ def login():
     if not user or not check_password_hash(user.password, password):
         return jsonify({"message": "Credenciales inválidas"}), 401
 
-    token = create_access_token(identity=str(user.id))
+    # Roles y condominio van firmados en el token (ver api/auth.py)
+    token = issue_token(user)
 
     return jsonify({
         "access_token": token,
@@ -41,3 +37,10 @@ def login():
             "roles": [r.name for r in user.roles]
         }
     }), 200
+
+
+@signin_api.route("/logout", methods=["POST"])
+@claims_required()
+def logout():
+    revoke_token(get_jwt())
+    return jsonify({"message": "Sesión cerrada"}), 200
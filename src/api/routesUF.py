@@ -1,24 +1,20 @@
 from flask import Blueprint, jsonify
-import requests
+from api.uf_service import UFUnavailable, uf_service
 
 uf_bp = Blueprint("uf", __name__)
 
 @uf_bp.route("/uf", methods=["GET"])
 def get_uf():
     try:
-        resp = requests.get("https://mindicador.cl/api", timeout=5)
-        data = resp.json()
-
-        if "uf" not in data:
-            return jsonify({"msg": "Valor UF no disponible"}), 404
-
-        return jsonify({
-            "fecha": data["uf"]["fecha"],
-            "valorUF": data["uf"]["valor"]
-        }), 200
-
-    except Exception as e:
+        uf, stale = uf_service.get_current()
+    except UFUnavailable as e:
         return jsonify({
             "msg": "Error al obtener UF",
             "error": str(e)
-        }), 500
+        }), 503
+
+    return jsonify({
+        "fecha": uf["fecha"],
+        "valorUF": uf["valor"],
+        "stale": stale
+    }), 200
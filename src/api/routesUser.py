@@ -1,6 +1,9 @@
 from flask import Blueprint, request, jsonify
 from werkzeug.security import generate_password_hash
+from sqlalchemy.orm import selectinload
 from api.models import db, User, Role
+from api.serializers import USER, json_response, list_options
+from api.auth import revoke_user_tokens
 
 users_bp = Blueprint("users_bp", __name__)
 
@@ -9,21 +12,19 @@ users_bp = Blueprint("users_bp", __name__)
 # ============================
 @users_bp.route("/users", methods=["GET"])
 def get_users():
-    users = User.query.order_by(User.created_at.desc()).all()
-
-    return jsonify([
-        {
-            "id": u.id,
-            "first_name": u.first_name,
-            "last_name": u.last_name,
-            "email": u.email,
-            "is_active": u.is_active,
-            "condominio_id": u.condominio_id,
-            "created_at": u.created_at.isoformat() if u.created_at else None,
-            "roles": [r.name for r in u.roles],
-        }
-        for u in users
-    ]), 200
+    """Acepta fields=a,b,c y format=rows|columnar (ver api/serializers.py)."""
+    try:
+        spec, columnar = list_options(USER, request.args)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
+    query = User.query
+    if "roles" in spec.fields:
+        query = query.options(selectinload(User.roles))
+
+    users = query.order_by(User.created_at.desc()).all()
+
+    return json_response(spec.render(users, columnar))
 
 
 # ============================
@@ -62,15 +63,7 @@ def create_user():
     db.session.add(new_user)
     db.session.commit()
 
-    return jsonify({
-        "id": new_user.id,
-        "first_name": new_user.first_name,
-        "last_name": new_user.last_name,
-        "email": new_user.email,
-        "is_active": new_user.is_active,
-        "condominio_id": new_user.condominio_id,
-        "roles": [r.name for r in new_user.roles],
-    }), 201
+    return json_response(USER.one(new_user), 201)
 
 
 # ============================
@@ -93,6 +86,15 @@ def update_user(id):
     user.first_name = data.get("first_name", user.first_name)
     user.last_name = data.get("last_name", user.last_name)
     user.email = data.get("email", user.email)
+    # Los tokens llevan roles y condominio: si cambian, o el usuario se
+    # desactiva o cambia su password, se revocan los tokens emitidos
+    revoke_tokens = (
+        ("roles" in data and sorted(data["roles"] or []) != sorted(r.name for r in user.roles))
+        or ("condominio_id" in data and data["condominio_id"] != user.condominio_id)
+        or ("is_active" in data and not data["is_active"] and user.is_active)
+        or bool(data.get("password"))
+    )
+
     user.is_active = data.get("is_active", user.is_active)
 
     # actualizar condominio
@@ -108,6 +110,9 @@ def update_user(id):
         roles = Role.query.filter(Role.name.in_(data["roles"])).all()
         user.roles = roles
 
+    if revoke_tokens:
+        revoke_user_tokens(user.id)
+
     db.session.commit()
 
     return jsonify({"msg": "Usuario actualizado correctamente"}), 200
@@ -123,6 +128,7 @@ def delete_user(id):
     if not user:
         return jsonify({"msg": "Usuario no encontrado"}), 404
 
+    revoke_user_tokens(user.id)
     db.session.delete(user)
     db.session.commit()
 
@@ -0,0 +1,326 @@
+"""
+Serialización de las respuestas JSON de la API.
+
+Cada modelo tiene un ModelSpec con sus campos de salida (nombre -> atributo
+o función). Las rutas arman los dicts con el spec y responden con
+json_response(), que codifica una sola vez a bytes:
+
+    return json_response(PROVIDER.many(providers))
+
+Los listados aceptan ?fields=a,b,c (solo esos campos; id siempre va) y
+?format=columnar, que responde un arreglo por campo en vez de un objeto
+por fila. En formato columnar los campos declarados en dictionary_fields
+(nombres de proveedor, categoría, estado) se codifican como índices a una
+lista de valores distintos en "dictionaries":
+
+    {"count": 2,
+     "columns": {"id": [7, 6], "provider_name": [0, 0]},
+     "dictionaries": {"provider_name": ["Aseo Ltda"]}}
+
+El encoder trata Decimal como número y date/datetime como ISO 8601, igual
+en todas las rutas. Si orjson está instalado se usa (mucho más rápido en
+listas grandes); si no, se usa json de la librería estándar con el mismo
+resultado.
+"""
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from operator import attrgetter
+from flask import Response
+
+try:
+    import orjson
+except ImportError:  # dependencia opcional
+    orjson = None
+
+
+# ============================
+# ENCODER
+# ============================
+def _default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"Tipo no serializable a JSON: {type(value).__name__}")
+
+
+if orjson is not None:
+    def dumps(payload):
+        """payload -> bytes JSON en UTF-8."""
+        return orjson.dumps(payload, default=_default, option=orjson.OPT_NON_STR_KEYS)
+else:
+    _encoder = json.JSONEncoder(default=_default, ensure_ascii=False, separators=(",", ":"))
+
+    def dumps(payload):
+        """payload -> bytes JSON en UTF-8."""
+        return _encoder.encode(payload).encode("utf-8")
+
+
+def json_response(payload, status=200):
+    """Response con el JSON ya codificado (sin pasar por jsonify)."""
+    return Response(dumps(payload), status=status, mimetype="application/json")
+
+
+# ============================
+# SPECS POR MODELO
+# ============================
+LIST_FORMATS = ("rows", "columnar")
+
+
+class ModelSpec:
+    """
+    Campos de salida de un modelo. Cada campo es un nombre de atributo
+    (admite rutas con punto, ej. "provider.name") o una función obj -> valor.
+    dictionary_fields son los campos con pocos valores distintos que el
+    formato columnar codifica como índices.
+    """
+
+    def __init__(self, dictionary_fields=(), **fields):
+        self.fields = {
+            name: attrgetter(source) if isinstance(source, str) else source
+            for name, source in fields.items()
+        }
+        self.dictionary_fields = tuple(f for f in dictionary_fields if f in self.fields)
+        self._items = tuple(self.fields.items())
+
+    def one(self, obj):
+        return {name: get(obj) for name, get in self._items}
+
+    def many(self, objs):
+        items = self._items
+        return [{name: get(obj) for name, get in items} for obj in objs]
+
+    def only(self, names):
+        """Spec con solo los campos pedidos (más id). ValueError si alguno no existe."""
+        unknown = [name for name in names if name not in self.fields]
+        if unknown:
+            raise ValueError(
+                f"fields inválido: {', '.join(unknown)}. Opciones: {', '.join(self.fields)}"
+            )
+
+        return ModelSpec(
+            dictionary_fields=self.dictionary_fields,
+            **{name: get for name, get in self._items if name == "id" or name in names},
+        )
+
+    def columns(self, objs):
+        """Formato columnar: un arreglo por campo y diccionarios de valores."""
+        objs = list(objs)
+        columns = {name: [get(obj) for obj in objs] for name, get in self._items}
+
+        dictionaries = {}
+        for name in self.dictionary_fields:
+            codes = {}
+            values = columns[name]
+            columns[name] = [
+                None if value is None else codes.setdefault(value, len(codes))
+                for value in values
+            ]
+            dictionaries[name] = list(codes)
+
+        return {"count": len(objs), "columns": columns, "dictionaries": dictionaries}
+
+    def render(self, objs, columnar=False):
+        return self.columns(objs) if columnar else self.many(objs)
+
+
+def list_options(spec, args):
+    """
+    Lee ?fields= y ?format= de los query params. Retorna (spec, columnar);
+    lanza ValueError si algún valor no es válido.
+    """
+    fields = [f.strip() for f in args.get("fields", "").split(",") if f.strip()]
+    if fields:
+        spec = spec.only(fields)
+
+    list_format = args.get("format", "rows").lower()
+    if list_format not in LIST_FORMATS:
+        raise ValueError(f"format debe ser uno de: {', '.join(LIST_FORMATS)}")
+
+    return spec, list_format == "columnar"
+
+
+def add_field(rendered, name, values):
+    """Agrega un campo calculado aparte (ej. amount_uf) a filas o columnas."""
+    if isinstance(rendered, dict):
+        rendered["columns"][name] = list(values)
+    else:
+        for item, value in zip(rendered, values):
+            item[name] = value
+
+
+def _status_name(expense):
+    return expense.status.name if expense.status else "Pendiente"
+
+
+def _related_name(relation):
+    get = attrgetter(relation)
+
+    def name(obj):
+        related = get(obj)
+        return related.name if related else None
+
+    return name
+
+
+def _administrador_nombre(condominio):
+    admin = condominio.administrador
+    return f"{admin.first_name} {admin.last_name}" if admin else "Sin asignar"
+
+
+ROLE = ModelSpec(id="id", name="name")
+
+USER = ModelSpec(
+    id="id",
+    first_name="first_name",
+    last_name="last_name",
+    email="email",
+    is_active="is_active",
+    condominio_id="condominio_id",
+    created_at="created_at",
+    roles=lambda u: [r.name for r in u.roles],
+)
+
+CONDOMINIO = ModelSpec(
+    dictionary_fields=("comuna", "administrador_nombre"),
+    id="id",
+    nombre="nombre",
+    comuna="comuna",
+    direccion="direccion",
+    total_unidades="total_unidades",
+    email_contacto="email_contacto",
+    telefono_contacto="telefono_contacto",
+    estado="estado",
+    created_at="created_at",
+    administrador_id="administrador_id",
+    administrador_nombre=_administrador_nombre,
+)
+
+PROVIDER = ModelSpec(
+    dictionary_fields=("service_type",),
+    id="id",
+    name="name",
+    service_type="service_type",
+    rut="rut",
+    email="email",
+    phone="phone",
+    address="address",
+    is_active="is_active",
+    created_at="created_at",
+)
+
+EXPENSE_CATEGORY = ModelSpec(
+    id="id",
+    name="name",
+    description="description",
+    is_active="is_active",
+)
+
+EXPENSE_STATUS = ModelSpec(id="id", name="name", description="description")
+
+# GET /api/expenses (mantiene los nombres históricos description y date)
+EXPENSE = ModelSpec(
+    dictionary_fields=("status",),
+    id="id",
+    provider_id="provider_id",
+    category_id="category_id",
+    condominium_id="condominium_id",
+    amount="amount",
+    description="observation",
+    date="expense_date",
+    document_number="document_number",
+    status=_status_name,
+    created_at="created_at",
+)
+
+# GET /api/expenses/condominium
+EXPENSE_ITEM = ModelSpec(
+    dictionary_fields=("provider_name", "category_name", "status"),
+    id="id",
+    provider_id="provider_id",
+    provider_name=_related_name("provider"),
+    category_id="category_id",
+    category_name=_related_name("category"),
+    condominium_id="condominium_id",
+    amount="amount",
+    observation="observation",
+    document_number="document_number",
+    expense_date="expense_date",
+    status=_status_name,
+    expense_status_id="expense_status_id",
+    version="version",
+)
+
+# GET /api/expenses/monthly
+EXPENSE_MONTHLY = ModelSpec(
+    id="id",
+    expense_date="expense_date",
+    amount="amount",
+    category_id="category_id",
+    provider_id="provider_id",
+    document_number="document_number",
+    observation="observation",
+)
+
+# POST /api/expenses
+EXPENSE_CREATED = ModelSpec(
+    id="id",
+    provider_id="provider_id",
+    category_id="category_id",
+    amount="amount",
+    observation="observation",
+    document_number="document_number",
+    expense_date="expense_date",
+    status=_status_name,
+)
+
+# PUT /api/expenses/<id>
+EXPENSE_UPDATED = ModelSpec(
+    id="id",
+    provider_id="provider_id",
+    category_id="category_id",
+    amount="amount",
+    observation="observation",
+    document_number="document_number",
+    status=lambda e: e.status.name if e.status else None,
+    expense_status_id="expense_status_id",
+    version="version",
+    expense_date="expense_date",
+)
+
+
+# GET /api/expenses/<id>/documents
+EXPENSE_DOCUMENT = ModelSpec(
+    id="id",
+    expense_id="expense_id",
+    document_type="document_type",
+    original_name="original_name",
+    content_type="content_type",
+    size="size",
+    sha256="sha256",
+    preview_status="preview_status",
+    created_at="created_at",
+    url=lambda d: f"/api/expenses/documents/{d.id}/file",
+    thumbnail_url=lambda d: f"/api/expenses/documents/{d.id}/thumbnail" if d.thumbnail_path else None,
+)
+
+# GET /api/jobs/<id>
+JOB = ModelSpec(
+    id="id",
+    kind="kind",
+    status="status",
+    progress="progress",
+    message="message",
+    attempts="attempts",
+    max_attempts="max_attempts",
+    condominium_id="condominium_id",
+    params="params",
+    result="result",
+    error="error",
+    run_after="run_after",
+    created_at="created_at",
+    started_at="started_at",
+    finished_at="finished_at",
+    result_url=lambda j: f"/api/jobs/{j.id}/result" if j.result and j.result.get("file") else None,
+)
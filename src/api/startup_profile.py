@@ -0,0 +1,89 @@
+"""
+Perfil del tiempo de import de app.py (arranque en frío del servidor).
+
+Importa la app en un intérprete nuevo con `python -X importtime`, tal como
+la carga gunicorn, y resume el resultado: tiempo total del import de app,
+los imports directos de app.py y los paquetes que más tiempo propio
+suman. Se usa desde `flask profile-startup`, que además falla si el
+import supera un presupuesto en milisegundos.
+"""
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_MODULE = "app"
+DEFAULT_BUDGET_MS = float(os.getenv("STARTUP_BUDGET_MS", 700))
+
+
+def parse_importtime(output):
+    """
+    Líneas de -X importtime -> [(módulo, profundidad, propio_us, acumulado_us)].
+    Profundidad 1 son los imports hechos directamente por el script.
+    """
+    rows = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        if not self_us.strip().isdigit():
+            continue  # encabezado
+        indent = len(name) - len(name.lstrip(" ")) - 1
+        rows.append((name.strip(), indent // 2 + 1, int(self_us), int(cumulative_us)))
+    return rows
+
+
+def _import_once(module):
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=SRC_DIR,
+        capture_output=True,
+        text=True,
+    )
+    wall = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(f"No se pudo importar {module}:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr), wall
+
+
+def profile_startup(runs=5, module=APP_MODULE, top=15):
+    """
+    Importa module `runs` veces (más una de calentamiento que compila los
+    .pyc) y retorna un dict con medianas en ms y el detalle de la corrida
+    más cercana a la mediana.
+    """
+    _import_once(module)
+
+    samples = []
+    for _ in range(runs):
+        rows, wall = _import_once(module)
+        total = next(cum for name, depth, _, cum in rows if name == module and depth == 1)
+        samples.append((total, wall, rows))
+
+    import_ms = statistics.median(total for total, _, _ in samples) / 1000
+    wall_ms = statistics.median(wall for _, wall, _ in samples) * 1000
+    _, _, rows = min(samples, key=lambda s: abs(s[0] / 1000 - import_ms))
+
+    # Imports de app.py: los hijos directos (profundidad 2) del módulo
+    direct = sorted(
+        ((name, cum / 1000) for name, depth, _, cum in rows if depth == 2),
+        key=lambda r: r[1],
+        reverse=True,
+    )
+
+    packages = {}
+    for name, _, self_us, _ in rows:
+        package = name.split(".")[0]
+        packages[package] = packages.get(package, 0) + self_us / 1000
+    heaviest = sorted(packages.items(), key=lambda r: r[1], reverse=True)
+
+    return {
+        "import_ms": round(import_ms, 1),
+        "wall_ms": round(wall_ms, 1),
+        "runs": runs,
+        "direct_imports": [(name, round(ms, 1)) for name, ms in direct[:top]],
+        "packages": [(name, round(ms, 1)) for name, ms in heaviest[:top]],
+    }
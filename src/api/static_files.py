@@ -0,0 +1,149 @@
+"""
+Índice en memoria de los estáticos del SPA (dist/).
+
+Se construye una vez al iniciar la app: por cada archivo guarda mimetype,
+tamaño, fecha, ETag (hash del contenido) y sus variantes .br / .gz
+generadas por `flask precompress-static`. Con el índice, servir un archivo
+o responder el fallback del SPA (index.html) no requiere consultar el
+disco en cada request; los archivos chicos se mantienen en memoria.
+
+Caché en el navegador:
+- Archivos con hash en el nombre (assets/index-Bx3kP9aQ.js, los genera
+  Vite): un año e immutable, porque un cambio de contenido cambia el nombre.
+- index.html y el resto: no-cache, el navegador revalida con el ETag.
+
+El índice refleja dist/ al momento de iniciar; después de `npm run build`
+hay que reiniciar el servidor (en producción el deploy ya lo hace).
+"""
+import hashlib
+import mimetypes
+import os
+import re
+from datetime import datetime, timezone
+from flask import Response, abort, request, send_file
+from api.compression import STATIC_ENCODINGS
+
+INDEX_FILE = "index.html"
+MAX_IN_MEMORY = 1024 * 1024
+
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE = "no-cache"
+
+# Nombre con hash de Vite: "-" + 8 caracteres [A-Za-z0-9_-] con al menos
+# una mayúscula o dígito, antes de la extensión
+HASHED_NAME = re.compile(r"-(?=[A-Za-z0-9_-]{0,7}[A-Z0-9])[A-Za-z0-9_-]{8}\.[A-Za-z0-9]+$")
+
+
+def is_hashed_asset(path):
+    return path.startswith("assets/") and HASHED_NAME.search(path) is not None
+
+
+class StaticFile:
+    """Una representación (original o precomprimida) de un archivo de dist/."""
+
+    __slots__ = ("full_path", "size", "etag", "data")
+
+    def __init__(self, full_path, data, etag):
+        self.full_path = full_path
+        self.size = len(data)
+        self.etag = etag
+        self.data = data if self.size <= MAX_IN_MEMORY else None
+
+
+class StaticEntry:
+    __slots__ = ("path", "mimetype", "last_modified", "cache_control", "variants")
+
+    def __init__(self, path, mimetype, last_modified, cache_control):
+        self.path = path
+        self.mimetype = mimetype
+        self.last_modified = last_modified
+        self.cache_control = cache_control
+        # encoding (None = sin comprimir) -> StaticFile
+        self.variants = {}
+
+
+class StaticIndex:
+    def __init__(self, directory):
+        self.directory = os.path.realpath(directory)
+        self.entries = {}
+        self.build()
+
+    def build(self):
+        entries = {}
+        sibling_extensions = tuple(extension for _, extension in STATIC_ENCODINGS)
+
+        for root, _, files in os.walk(self.directory):
+            names = set(files)
+            for name in files:
+                # Las variantes .br/.gz se registran junto a su original
+                if name.endswith(sibling_extensions) and os.path.splitext(name)[0] in names:
+                    continue
+
+                full_path = os.path.join(root, name)
+                path = os.path.relpath(full_path, self.directory).replace(os.sep, "/")
+                stat = os.stat(full_path)
+
+                entry = StaticEntry(
+                    path,
+                    mimetypes.guess_type(name)[0] or "application/octet-stream",
+                    datetime.fromtimestamp(stat.st_mtime, timezone.utc),
+                    IMMUTABLE_CACHE if is_hashed_asset(path) else REVALIDATE_CACHE,
+                )
+                entry.variants[None] = self._load(full_path)
+
+                for encoding, extension in STATIC_ENCODINGS:
+                    sibling = full_path + extension
+                    # Solo variantes generadas a partir de esta versión del archivo
+                    if name + extension in names and os.stat(sibling).st_mtime >= stat.st_mtime:
+                        variant = self._load(sibling)
+                        variant.etag = f"{entry.variants[None].etag}-{encoding}"
+                        entry.variants[encoding] = variant
+
+                entries[path] = entry
+
+        self.entries = entries
+
+    @staticmethod
+    def _load(full_path):
+        with open(full_path, "rb") as f:
+            data = f.read()
+        return StaticFile(full_path, data, hashlib.sha1(data).hexdigest()[:20])
+
+    def lookup(self, path):
+        """Entrada de path, o index.html para las rutas del SPA."""
+        return self.entries.get(path) or self.entries.get(INDEX_FILE)
+
+    def response(self, path):
+        entry = self.lookup(path)
+        if entry is None:
+            abort(404)
+
+        encoding = None
+        for candidate, _ in STATIC_ENCODINGS:
+            if candidate in entry.variants and request.accept_encodings[candidate] > 0:
+                encoding = candidate
+                break
+        variant = entry.variants[encoding]
+
+        if variant.data is not None:
+            response = Response(variant.data, mimetype=entry.mimetype)
+            response.set_etag(variant.etag)
+            response.last_modified = entry.last_modified
+            response = response.make_conditional(
+                request, accept_ranges=True, complete_length=variant.size
+            )
+        else:
+            response = send_file(
+                variant.full_path,
+                mimetype=entry.mimetype,
+                etag=variant.etag,
+                last_modified=entry.last_modified,
+            )
+
+        response.headers["Cache-Control"] = entry.cache_control
+        if encoding:
+            response.headers["Content-Encoding"] = encoding
+        if len(entry.variants) > 1:
+            response.vary.add("Accept-Encoding")
+
+        return response
@@ -0,0 +1,303 @@
+"""
+Generación de datos sintéticos reproducibles para benchmarks, pruebas de
+carga y demos.
+
+Los datos de referencia (roles, estados, categorías, proveedores,
+condominios con su administrador) se crean con el ORM. Los residentes y
+los gastos se insertan por lotes con inserts de Core (executemany), y en
+PostgreSQL los gastos se cargan con COPY, de modo que un millón de filas
+toma segundos. El mismo seed produce siempre los mismos datos.
+"""
+import csv
+import io
+import random
+from datetime import date, timedelta
+from sqlalchemy import insert
+from werkzeug.security import generate_password_hash
+from api.http_cache import bump_versions
+from api.models import (
+    db,
+    user_roles,
+    Condominio,
+    Expense,
+    ExpenseCategory,
+    ExpenseStatus,
+    Provider,
+    Role,
+    User,
+)
+
+ROLE_NAMES = ["SUPERADMIN", "ADMIN", "USER"]
+STATUS_NAMES = ["Pendiente", "Pagado", "Anulado"]
+
+# categoría -> (monto mínimo, monto máximo, observaciones típicas)
+CATEGORIES = {
+    "Mantención": (80000, 1500000, ["Mantención ascensores", "Mantención bombas de agua", "Revisión portón eléctrico"]),
+    "Aseo": (50000, 900000, ["Servicio de aseo mensual", "Insumos de aseo", "Limpieza de vidrios"]),
+    "Seguridad": (300000, 4000000, ["Servicio de conserjería", "Mantención cámaras CCTV", "Guardia nocturno"]),
+    "Electricidad": (100000, 2500000, ["Consumo eléctrico áreas comunes", "Cambio de luminarias"]),
+    "Agua": (80000, 1800000, ["Consumo de agua áreas comunes", "Riego jardines"]),
+    "Gas": (30000, 600000, ["Gas caldera central", "Revisión de red de gas"]),
+    "Jardinería": (60000, 700000, ["Mantención de jardines", "Poda de árboles"]),
+    "Administración": (200000, 2000000, ["Honorarios administración", "Gastos de oficina"]),
+    "Reparaciones": (20000, 3000000, ["Reparación filtración", "Pintura pasillos", "Cambio de cerradura"]),
+    "Seguros": (150000, 2500000, ["Prima seguro incendio", "Seguro de responsabilidad civil"]),
+}
+CATEGORY_NAMES = list(CATEGORIES)
+
+SERVICE_TYPES = ["Mantención", "Aseo", "Seguridad", "Servicios básicos", "Jardinería", "Construcción"]
+PROVIDER_WORDS = ["Servicios", "Comercial", "Ingeniería", "Soluciones", "Inversiones", "Mantenciones"]
+FIRST_NAMES = [
+    "Camila", "Valentina", "Francisca", "Javiera", "Catalina", "Constanza", "Fernanda", "Daniela",
+    "Matías", "Benjamín", "Sebastián", "Vicente", "Diego", "Nicolás", "Felipe", "Tomás",
+]
+LAST_NAMES = [
+    "González", "Muñoz", "Rojas", "Díaz", "Pérez", "Soto", "Contreras", "Silva",
+    "Martínez", "Sepúlveda", "Morales", "Rodríguez", "López", "Fuentes", "Hernández", "Torres",
+]
+COMUNAS = ["Santiago", "Providencia", "Las Condes", "Ñuñoa", "Maipú", "La Florida", "Viña del Mar", "Concepción"]
+STREETS = ["Av. Providencia", "Av. Apoquindo", "Los Leones", "Irarrázaval", "Pajaritos", "Av. Libertad", "Vicuña Mackenna"]
+
+EXPENSE_BATCH_SIZE = 10000
+EXPENSE_COLUMNS = [
+    "condominium_id",
+    "provider_id",
+    "category_id",
+    "expense_status_id",
+    "expense_date",
+    "amount",
+    "document_number",
+    "observation",
+    "version",
+]
+DEMO_PASSWORD = "demo1234"
+
+
+def rut_with_dv(number):
+    """RUT chileno con su dígito verificador (módulo 11)."""
+    total, factor = 0, 2
+    for digit in reversed(str(number)):
+        total += int(digit) * factor
+        factor = 2 if factor == 7 else factor + 1
+    dv = 11 - total % 11
+    return f"{number}-{'0' if dv == 11 else 'K' if dv == 10 else dv}"
+
+
+def _get_or_create(model, name, **fields):
+    obj = model.query.filter_by(name=name).first()
+    if obj is None:
+        obj = model(name=name, **fields)
+        db.session.add(obj)
+    return obj
+
+
+def _person(rng):
+    return rng.choice(FIRST_NAMES), f"{rng.choice(LAST_NAMES)} {rng.choice(LAST_NAMES)}"
+
+
+def ensure_catalogs():
+    """Roles, estados y categorías; reutiliza los que ya existen por nombre."""
+    roles = {name: _get_or_create(Role, name) for name in ROLE_NAMES}
+    statuses = [_get_or_create(ExpenseStatus, name) for name in STATUS_NAMES]
+    categories = [_get_or_create(ExpenseCategory, name) for name in CATEGORY_NAMES]
+    db.session.flush()
+    return roles, statuses, categories
+
+
+def seed_reference_data(condominiums=10, providers=50, residents_per_condominium=0, seed=42):
+    """
+    Crea roles, estados, categorías, proveedores, un SUPERADMIN y
+    condominios con su administrador (y residentes con rol USER si se
+    piden). Los emails llevan el seed, por lo que repetir el mismo seed
+    sobre la misma base falla por email duplicado.
+    Retorna un dict con las listas de ids creados.
+    """
+    rng = random.Random(seed)
+    password = generate_password_hash(DEMO_PASSWORD)
+    roles, statuses, categories = ensure_catalogs()
+
+    provider_objs = []
+    for i in range(providers):
+        service_type = rng.choice(SERVICE_TYPES)
+        last_name = rng.choice(LAST_NAMES)
+        provider_objs.append(Provider(
+            name=f"{rng.choice(PROVIDER_WORDS)} {last_name} {service_type} {seed}-{i}",
+            service_type=service_type,
+            rut=rut_with_dv(76000000 + seed * 10000 + i),
+            email=f"contacto{seed}-{i}@{last_name.lower()}.example.com",
+            phone=f"+569{rng.randint(10000000, 99999999)}",
+            address=f"{rng.choice(STREETS)} {rng.randint(100, 9999)}, {rng.choice(COMUNAS)}",
+        ))
+    db.session.add_all(provider_objs)
+
+    superadmin = User(
+        first_name="Super",
+        last_name="Admin",
+        email=f"superadmin{seed}@example.com",
+        password=password,
+        roles=[roles["SUPERADMIN"]],
+    )
+    admins = []
+    for i in range(condominiums):
+        first_name, last_name = _person(rng)
+        admins.append(User(
+            first_name=first_name,
+            last_name=last_name,
+            email=f"admin{seed}-{i}@example.com",
+            password=password,
+            roles=[roles["ADMIN"]],
+        ))
+    db.session.add_all([superadmin, *admins])
+    db.session.flush()
+
+    condominio_objs = []
+    for i, admin in enumerate(admins):
+        comuna = rng.choice(COMUNAS)
+        condominio_objs.append(Condominio(
+            administrador_id=admin.id,
+            nombre=f"Condominio {rng.choice(LAST_NAMES)} {comuna} {seed}-{i}",
+            comuna=comuna,
+            direccion=f"{rng.choice(STREETS)} {rng.randint(100, 9999)}",
+            total_unidades=rng.randint(20, 400),
+        ))
+    db.session.add_all(condominio_objs)
+    db.session.flush()
+
+    for admin, condominio in zip(admins, condominio_objs):
+        admin.condominio_id = condominio.id
+    db.session.commit()
+
+    condominium_ids = [c.id for c in condominio_objs]
+    resident_ids = insert_residents(
+        condominium_ids, residents_per_condominium, roles["USER"].id, password, rng, seed
+    )
+
+    return {
+        "condominium_ids": condominium_ids,
+        "provider_ids": [p.id for p in provider_objs],
+        "category_ids": [c.id for c in categories],
+        "status_ids": [s.id for s in statuses],
+        "user_ids": [superadmin.id] + [u.id for u in admins] + resident_ids,
+    }
+
+
+def insert_residents(condominium_ids, per_condominium, role_id, password, rng, seed):
+    """Usuarios con rol USER por condominio, insertados en bloque."""
+    if not per_condominium:
+        return []
+
+    email_prefix = f"residente{seed}-"
+    rows = []
+    for condominium_id in condominium_ids:
+        for i in range(per_condominium):
+            first_name, last_name = _person(rng)
+            rows.append({
+                "first_name": first_name,
+                "last_name": last_name,
+                "email": f"{email_prefix}{condominium_id}-{i}@example.com",
+                "password": password,
+                "is_active": rng.random() > 0.05,
+                "condominio_id": condominium_id,
+            })
+
+    db.session.execute(insert(User.__table__), rows)
+    user_ids = [
+        user_id for (user_id,) in db.session.query(User.id)
+        .filter(User.email.like(f"{email_prefix}%"))
+        .order_by(User.id)
+    ]
+    db.session.execute(
+        insert(user_roles),
+        [{"user_id": user_id, "role_id": role_id} for user_id in user_ids],
+    )
+    # Inserts de Core: el listener de api/http_cache.py no los ve
+    bump_versions(User, Role)
+    db.session.commit()
+    return user_ids
+
+
+def generate_expenses(count, reference, seed=42, days=5 * 365, start_index=0):
+    """
+    Genera mappings de Expense reproducibles (mismo seed, mismas filas).
+    El monto depende de la categoría y los gastos recientes quedan más
+    seguido como pendientes.
+    """
+    rng = random.Random(f"{seed}-{start_index}")
+    today = date.today()
+    condominium_ids = reference["condominium_ids"]
+    provider_ids = reference["provider_ids"]
+    category_ids = reference["category_ids"]
+    categories = [CATEGORIES[name] for name in CATEGORY_NAMES[:len(category_ids)]]
+    pending, paid, cancelled = reference["status_ids"][:3]
+
+    for i in range(start_index, start_index + count):
+        category = rng.randrange(len(category_ids))
+        low, high, observations = categories[category]
+        age = rng.randint(0, days)
+
+        roll = rng.random()
+        if roll < 0.03:
+            status_id = cancelled
+        elif roll < (0.7 if age < 45 else 0.05):
+            status_id = pending
+        else:
+            status_id = paid
+
+        yield {
+            "condominium_id": rng.choice(condominium_ids),
+            "provider_id": rng.choice(provider_ids),
+            "category_id": category_ids[category],
+            "expense_status_id": status_id,
+            "expense_date": today - timedelta(days=age),
+            "amount": rng.randint(low // 100, high // 100) * 100,
+            "document_number": f"F-{seed}-{i:08d}",
+            "observation": rng.choice(observations),
+            "version": 1,
+        }
+
+
+def _insert_batch(batch):
+    db.session.execute(insert(Expense.__table__), batch)
+    db.session.commit()
+
+
+def _copy_batch(batch):
+    """COPY ... FROM STDIN de psycopg2: la vía más rápida en PostgreSQL."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in batch:
+        writer.writerow([row[column] for column in EXPENSE_COLUMNS])
+    buffer.seek(0)
+
+    connection = db.session.connection().connection
+    with connection.cursor() as cursor:
+        cursor.copy_expert(
+            f"COPY expenses ({', '.join(EXPENSE_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+            buffer,
+        )
+    db.session.commit()
+
+
+def insert_expenses(mappings, batch_size=EXPENSE_BATCH_SIZE, use_copy=None):
+    """
+    Inserta los mappings por lotes, un commit por lote. Retorna el total.
+    use_copy=None usa COPY solo si la base es PostgreSQL.
+    """
+    if use_copy is None:
+        use_copy = db.engine.dialect.name == "postgresql"
+    write_batch = _copy_batch if use_copy else _insert_batch
+
+    inserted = 0
+    batch = []
+    for mapping in mappings:
+        batch.append(mapping)
+        if len(batch) >= batch_size:
+            write_batch(batch)
+            inserted += len(batch)
+            batch = []
+
+    if batch:
+        write_batch(batch)
+        inserted += len(batch)
+
+    return inserted
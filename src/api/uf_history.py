@@ -0,0 +1,122 @@
+"""
+Histórico diario de la UF y conversión CLP -> UF de listados de gastos.
+
+La conversión carga una sola vez los valores UF del rango pedido en dos
+listas ordenadas (fechas y valores) y resuelve cada monto con búsqueda
+binaria (bisect), sin una consulta por fila.
+"""
+import csv
+import json
+from bisect import bisect_right
+from datetime import datetime, timedelta
+from decimal import Decimal, InvalidOperation
+from api.models import db, UFValue
+
+# Días hacia atrás para encontrar la última UF publicada antes del rango
+UF_LOOKBACK_DAYS = 31
+
+CURRENCIES = ("CLP", "UF")
+
+
+def parse_currency(value):
+    currency = (value or "CLP").upper()
+    if currency not in CURRENCIES:
+        raise ValueError(f"currency debe ser uno de: {', '.join(CURRENCIES)}")
+    return currency
+
+
+class UFConverter:
+    """Convierte montos CLP a UF usando la UF vigente en cada fecha."""
+
+    def __init__(self, dates, values):
+        self.dates = dates
+        self.values = values
+
+    @classmethod
+    def for_range(cls, start, end):
+        rows = (
+            db.session.query(UFValue.date, UFValue.value)
+            .filter(
+                UFValue.date >= start - timedelta(days=UF_LOOKBACK_DAYS),
+                UFValue.date <= end,
+            )
+            .order_by(UFValue.date)
+            .all()
+        )
+        return cls([r[0] for r in rows], [Decimal(r[1]) for r in rows])
+
+    def rate_for(self, day):
+        """UF del día o, si no hay dato, la última anterior. None si no existe."""
+        i = bisect_right(self.dates, day) - 1
+        return self.values[i] if i >= 0 else None
+
+    def convert(self, amounts, days):
+        """Lista de montos en UF (float, 4 decimales) en el orden recibido."""
+        converted = []
+        for amount, day in zip(amounts, days):
+            rate = self.rate_for(day)
+            if rate is None or amount is None:
+                converted.append(None)
+            else:
+                converted.append(float(round(Decimal(amount) / rate, 4)))
+        return converted
+
+
+# ============================
+# IMPORTACIÓN
+# ============================
+def _parse_uf_number(value):
+    if isinstance(value, (int, float, Decimal)):
+        return Decimal(str(value))
+    value = str(value).strip()
+    # Formato chileno: 39.123,45
+    if "," in value:
+        value = value.replace(".", "").replace(",", ".")
+    return Decimal(value)
+
+
+def _parse_uf_row(row):
+    raw_date = row.get("fecha") or row.get("date")
+    raw_value = row.get("valor") or row.get("value")
+    if not raw_date or raw_value in (None, ""):
+        raise ValueError(f"Fila UF incompleta: {row}")
+    try:
+        day = datetime.strptime(str(raw_date)[:10], "%Y-%m-%d").date()
+        return day, _parse_uf_number(raw_value)
+    except (ValueError, InvalidOperation):
+        raise ValueError(f"Fila UF inválida: {row}")
+
+
+def read_uf_file(path):
+    """
+    Lee un CSV (columnas fecha,valor o date,value) o un JSON (lista de
+    {"fecha", "valor"} o el formato {"serie": [...]} de mindicador).
+    """
+    if path.lower().endswith(".json"):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        rows = data.get("serie", []) if isinstance(data, dict) else data
+    else:
+        with open(path, newline="", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+
+    return [_parse_uf_row(row) for row in rows]
+
+
+def import_uf_values(values, chunk_size=1000):
+    """
+    Inserta o reemplaza valores UF [(date, value), ...] por lotes.
+    Retorna la cantidad de días guardados.
+    """
+    by_date = dict(values)
+    days = sorted(by_date)
+
+    for i in range(0, len(days), chunk_size):
+        chunk = days[i:i + chunk_size]
+        UFValue.query.filter(UFValue.date.in_(chunk)).delete(synchronize_session=False)
+        db.session.bulk_insert_mappings(UFValue, [
+            {"date": day, "value": by_date[day]} for day in chunk
+        ])
+        db.session.commit()
+
+    return len(days)
@@ -0,0 +1,181 @@
+"""
+Servicio del valor UF con caché diaria.
+
+- Una sola requests.Session con pool de conexiones para todo el proceso.
+- El valor se cachea por día: si el dato es de un día anterior se entrega
+  igual (stale) mientras un hilo en segundo plano lo refresca.
+- Un circuit breaker deja de llamar a la API externa tras varios errores
+  seguidos, durante un tiempo de enfriamiento.
+- El fetcher es intercambiable (set_fetcher) para apuntar a un servidor
+  local en pruebas; la URL también se puede cambiar con UF_API_URL.
+"""
+import os
+import threading
+import time
+from datetime import date
+import requests
+from requests.adapters import HTTPAdapter
+
+UF_API_URL = os.getenv("UF_API_URL", "https://mindicador.cl/api")
+UF_CONNECT_TIMEOUT = float(os.getenv("UF_CONNECT_TIMEOUT", 2))
+UF_READ_TIMEOUT = float(os.getenv("UF_READ_TIMEOUT", 3))
+UF_FAILURE_THRESHOLD = int(os.getenv("UF_FAILURE_THRESHOLD", 3))
+UF_COOLDOWN_SECONDS = float(os.getenv("UF_COOLDOWN_SECONDS", 60))
+
+
+class UFUnavailable(Exception):
+    """No hay valor UF en caché y la API externa no respondió."""
+
+
+class HttpUFFetcher:
+    """Obtiene la UF del día desde mindicador.cl (o una API compatible)."""
+
+    def __init__(self, url=UF_API_URL, session=None,
+                 timeout=(UF_CONNECT_TIMEOUT, UF_READ_TIMEOUT)):
+        self.url = url
+        self.timeout = timeout
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+        self.session = session
+
+    def __call__(self):
+        resp = self.session.get(self.url, timeout=self.timeout)
+        resp.raise_for_status()
+        data = resp.json()
+
+        if "uf" not in data:
+            raise UFUnavailable("Valor UF no disponible")
+
+        return {
+            "fecha": data["uf"]["fecha"],
+            "valor": data["uf"]["valor"],
+        }
+
+    def history(self, year):
+        """Serie diaria del año como lista de {"fecha", "valor"}."""
+        resp = self.session.get(f"{self.url.rstrip('/')}/uf/{year}", timeout=self.timeout)
+        resp.raise_for_status()
+        return resp.json().get("serie", [])
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold=UF_FAILURE_THRESHOLD,
+                 cooldown=UF_COOLDOWN_SECONDS, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.clock = clock
+        self.failures = 0
+        self.opened_at = None
+
+    @property
+    def is_open(self):
+        if self.opened_at is None:
+            return False
+        if self.clock() - self.opened_at >= self.cooldown:
+            # half-open: se permite un intento más
+            return False
+        return True
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self.failures >= self.failure_threshold:
+            self.opened_at = self.clock()
+
+
+class UFService:
+    def __init__(self, fetcher=None, breaker=None, today=date.today):
+        self.fetcher = fetcher or HttpUFFetcher()
+        self.breaker = breaker or CircuitBreaker()
+        self.today = today
+        self._value = None
+        self._cached_on = None
+        self._lock = threading.Lock()
+        self._refreshing = False
+
+    def set_fetcher(self, fetcher):
+        with self._lock:
+            self.fetcher = fetcher
+            self._value = None
+            self._cached_on = None
+            self.breaker.record_success()
+
+    def _fetch(self):
+        if self.breaker.is_open:
+            raise UFUnavailable("API de indicadores temporalmente deshabilitada")
+        try:
+            value = self.fetcher()
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        self.breaker.record_success()
+        with self._lock:
+            self._value = value
+            self._cached_on = self.today()
+        return value
+
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def run():
+            try:
+                self._fetch()
+            except Exception:
+                pass
+            finally:
+                with self._lock:
+                    self._refreshing = False
+
+        threading.Thread(target=run, name="uf-refresh", daemon=True).start()
+
+    def after_fork(self):
+        """
+        Estado propio para un worker recién creado por fork: no se comparten
+        el lock ni las conexiones HTTP de la Session heredadas del master.
+        """
+        self._lock = threading.Lock()
+        self._refreshing = False
+        if isinstance(self.fetcher, HttpUFFetcher):
+            self.fetcher = HttpUFFetcher(self.fetcher.url, timeout=self.fetcher.timeout)
+
+    def warm(self):
+        """Carga la UF del día en segundo plano si todavía no está en caché."""
+        with self._lock:
+            fresh = self._value is not None and self._cached_on == self.today()
+        if not fresh:
+            self._refresh_in_background()
+
+    def get_current(self):
+        """
+        Retorna (valor, stale). stale=True indica que el dato es de un día
+        anterior y ya hay un refresco en curso. Lanza UFUnavailable si no
+        hay nada en caché y la API falla.
+        """
+        with self._lock:
+            value, cached_on = self._value, self._cached_on
+
+        if value is not None and cached_on == self.today():
+            return value, False
+
+        if value is not None:
+            self._refresh_in_background()
+            return value, True
+
+        try:
+            return self._fetch(), False
+        except UFUnavailable:
+            raise
+        except Exception as e:
+            raise UFUnavailable(str(e))
+
+
+uf_service = UFService()
@@ -0,0 +1,58 @@
+"""
+Preparación de cada worker de gunicorn (ver gunicorn.conf.py en la raíz del repositorio).
+
+Con preload_app la app se importa una vez en el master y los workers la
+heredan por fork. Tras el fork cada worker:
+- descarta las conexiones del pool heredadas (no se pueden compartir
+  entre procesos) y reinicia las métricas del pool;
+- recrea la Session HTTP del servicio UF;
+- calienta cachés: configura los mappers, pide la UF del día en segundo
+  plano y llama una vez a las rutas de datos de referencia, así la primera
+  request real no paga la conexión a la base ni la compilación de consultas.
+
+Variables:
+    WARMUP_PATHS  rutas GET separadas por coma (vacío desactiva el warmup)
+"""
+import logging
+import os
+import time
+from sqlalchemy.orm import configure_mappers
+from api.models import db
+from api.db_pool import pool_metrics
+from api.uf_service import uf_service
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WARMUP_PATHS = "/api/expenses/category,/api/expenses/status,/api/roles,/api/providers"
+WARMUP_PATHS = [
+    path.strip()
+    for path in os.getenv("WARMUP_PATHS", DEFAULT_WARMUP_PATHS).split(",")
+    if path.strip()
+]
+
+
+def reset_after_fork(app):
+    with app.app_context():
+        # close=False: no cierra los sockets del master, solo los olvida
+        db.engine.dispose(close=False)
+    pool_metrics.reset()
+    uf_service.after_fork()
+
+
+def warm_caches(app, paths=None):
+    """Retorna [(ruta, status_code o None, segundos)]. Nunca lanza."""
+    configure_mappers()
+    uf_service.warm()
+
+    results = []
+    client = app.test_client()
+    for path in WARMUP_PATHS if paths is None else paths:
+        start = time.perf_counter()
+        try:
+            status_code = client.get(path).status_code
+        except Exception:
+            logger.exception("Warmup de %s falló", path)
+            status_code = None
+        results.append((path, status_code, time.perf_counter() - start))
+
+    return results
@@ -2,14 +2,15 @@
 This module takes care of starting the API Server, Loading the DB and Adding the endpoints
 """
 import os
-from flask import Flask, jsonify, send_from_directory
-from flask_migrate import Migrate
+import click
+from flask import Flask, jsonify
 from flask_cors import CORS
 from api.utils import APIException, generate_sitemap
 from api.models import db
 from api.routesSign import signin_api
 from api.routesCondominio import condominios_bp
 from api.admin import setup_admin
+from api.auth import setup_auth
 from api.commands import setup_commands
 from api.routesUser import users_bp
 from api.routesUF import uf_bp
@@ -17,16 +18,27 @@ from flask_jwt_extended import JWTManager
 from api.routesRoles import roles_bp
 from api.routesProviders import providers_bp
 from api.routesExpense import expenses_bp
+from api.routesExpenseDocuments import expense_documents_bp
+from api.routesJobs import jobs_bp
+from api.routesMetrics import metrics_bp
+from api.db_pool import engine_options_from_env
+from api.metrics import setup_metrics
+from api.compression import setup_compression
+from api.expense_documents import setup_documents
+from api.static_files import StaticIndex
 
 ENV = "development" if os.getenv("FLASK_DEBUG") == "1" else "production"
 
 static_file_dir = os.path.join(
     os.path.dirname(os.path.realpath(__file__)), "../dist/"
 )
+# Índice de dist/ con ETags y variantes .br/.gz, armado una vez al iniciar
+static_index = StaticIndex(static_file_dir)
 
 app = Flask(__name__)
 app.url_map.strict_slashes = False
 jwt = JWTManager(app)
+setup_auth(jwt)
 
 # --------------------
 # Database config
@@ -41,8 +53,16 @@ else:
     app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:////tmp/test.db"
 
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options_from_env(
+    app.config["SQLALCHEMY_DATABASE_URI"]
+)
 
-Migrate(app, db, compare_type=True)
+# flask_migrate carga alembic (el import más pesado de la app) y solo se
+# usa en `flask db ...`: se registra cuando la app se carga desde el CLI
+# de flask, no al servir requests con gunicorn
+if click.get_current_context(silent=True) is not None:
+    from flask_migrate import Migrate
+    Migrate(app, db, compare_type=True)
 db.init_app(app)
 
 # --------------------
@@ -50,6 +70,9 @@ db.init_app(app)
 # --------------------
 setup_admin(app)
 setup_commands(app)
+setup_metrics(app)
+setup_compression(app)
+setup_documents(app)
 
 # --------------------
 # CORS
@@ -77,6 +100,9 @@ app.register_blueprint(roles_bp, url_prefix="/api")
 app.register_blueprint(uf_bp, url_prefix="/api")
 app.register_blueprint(providers_bp, url_prefix="/api")
 app.register_blueprint(expenses_bp, url_prefix="/api")
+app.register_blueprint(expense_documents_bp, url_prefix="/api")
+app.register_blueprint(jobs_bp, url_prefix="/api")
+app.register_blueprint(metrics_bp, url_prefix="/api")
 
 # --------------------
 # Error handling
@@ -92,19 +118,15 @@ def handle_invalid_usage(error):
 def sitemap():
     if ENV == "development":
         return generate_sitemap(app)
-    return send_from_directory(static_file_dir, "index.html")
+    return static_index.response("index.html")
 
 # --------------------
 # Static files
 # --------------------
 @app.route("/<path:path>", methods=["GET"])
 def serve_any_other_file(path):
-    if not os.path.isfile(os.path.join(static_file_dir, path)):
-        path = "index.html"
-
-    response = send_from_directory(static_file_dir, path)
-    response.cache_control.max_age = 0
-    return response
+    # Las rutas que no son archivos de dist/ son rutas del SPA: index.html
+    return static_index.response(path)
 
 # --------------------
 # Run server
@@ -23,6 +23,14 @@ export default function Header() {
     const [uf, setUf] = useState(null)
     const navigate = useNavigate()
     const handleLogout = () => {
+        const token = localStorage.getItem("token")
+        if (token) {
+            // Revoca el token en el servidor; la sesión local se cierra igual
+            fetch(`${backendUrl}/api/logout`, {
+                method: "POST",
+                headers: { Authorization: `Bearer ${token}` }
+            }).catch(() => {})
+        }
         localStorage.removeItem("token")
         localStorage.removeItem("user")
         navigate("/signin")
@@ -54,6 +54,12 @@ const EXPENSE_COLUMNS = [
     { key: "status", label: "Estado" },
 ];
 
+// Campos que usan la tabla, la edición en línea y el detalle
+const EXPENSE_FIELDS = [
+    "provider_id", "provider_name", "category_id", "category_name", "amount", "observation",
+    "document_number", "expense_date", "status", "expense_status_id",
+].join(",");
+
 /* =============================
    EXPENSE / GASTOS
 ============================= */
@@ -81,26 +87,21 @@ const Maintenance = () => {
     const previousMonth = month === 1 ? 12 : month - 1;
     const previousYear = month === 1 ? year - 1 : year;
 
-    // --- Pagination State ---
+    // --- Pagination State (cursor del servidor) ---
     const ITEMS_PER_PAGE = 6;
     const [currentPage, setCurrentPage] = useState(1);
+    const [cursors, setCursors] = useState([null]);
+    const [hasMore, setHasMore] = useState(false);
+    const [totalExpenses, setTotalExpenses] = useState(0);
 
-    // Calculate filtered expenses first
-    const filteredExpenses = expenses.filter((e) =>
-        e.document_number?.toLowerCase().includes(search.toLowerCase())
-    );
-
-    const totalPages = Math.ceil(filteredExpenses.length / ITEMS_PER_PAGE);
+    const totalPages = Math.ceil(totalExpenses / ITEMS_PER_PAGE);
 
     // Reset to page 1 when search changes
-    useEffect(() => {
+    const handleSearchChange = (value) => {
+        setSearch(value);
         setCurrentPage(1);
-    }, [search]);
-
-    const paginatedExpenses = filteredExpenses.slice(
-        (currentPage - 1) * ITEMS_PER_PAGE,
-        currentPage * ITEMS_PER_PAGE
-    );
+        setCursors([null]);
+    };
 
     // --- Inline Editing State ---
     const [editingId, setEditingId] = useState(null);
@@ -175,6 +176,7 @@ const Maintenance = () => {
             formData.append("observation", observation)
             formData.append("amount", amount)
             formData.append("document_number", documentNumber)
+            files.forEach((file) => formData.append("files", file))
 
             await axios.post(
                 `${backendUrl}/api/expenses`,
@@ -215,6 +217,15 @@ const Maintenance = () => {
     const handleShowDetail = (expense) => {
         setSelectedExpense(expense);
         setIsDetailOpen(true);
+
+        fetch(`${backendUrl}/api/expenses/${expense.id}/documents`)
+            .then(res => res.json())
+            .then(documents => {
+                setSelectedExpense((current) =>
+                    current && current.id === expense.id ? { ...current, documents } : current
+                );
+            })
+            .catch(err => console.error("Error cargando documentos", err));
     };
 
     const formatCLP = (value) => {
@@ -258,10 +269,45 @@ const Maintenance = () => {
 
     useEffect(() => {
         if (!user?.condominium_id) return;
-        fetch(`${backendUrl}/api/expenses/condominium?condominium_id=${user.condominium_id}`)
+        let cancelled = false;
+        const params = new URLSearchParams({
+            condominium_id: user.condominium_id,
+            limit: ITEMS_PER_PAGE,
+            fields: EXPENSE_FIELDS,
+        });
+        if (search) params.append("document_number", search);
+        const cursor = cursors[currentPage - 1];
+        if (cursor) params.append("cursor", cursor);
+
+        fetch(`${backendUrl}/api/expenses/condominium?${params}`)
             .then(res => res.json())
-            .then(data => { setExpenses(data); })
+            .then(data => {
+                if (cancelled) return;
+                setExpenses(data.items);
+                setHasMore(data.has_more);
+                setTotalExpenses(data.total ?? 0);
+                if (data.next_cursor) {
+                    setCursors((prev) => {
+                        const next = prev.slice(0, currentPage);
+                        next[currentPage] = data.next_cursor;
+                        return next;
+                    });
+                }
+            })
             .catch(err => console.error(err));
+        return () => { cancelled = true; };
+    }, [user?.condominium_id, refreshExpenses, search, currentPage]);
+
+    // Totales del mes actual y anterior desde el dashboard (rollups en el backend)
+    useEffect(() => {
+        if (!user?.condominium_id) return;
+        fetch(`${backendUrl}/api/condominios/${user.condominium_id}/dashboard`)
+            .then(res => res.json())
+            .then(data => {
+                setCurrentMonthTotal(data.current_month?.total_amount ?? 0);
+                setPreviousMonthTotal(data.previous_month?.total_amount ?? 0);
+            })
+            .catch(err => console.error("Error cargando dashboard", err));
     }, [user?.condominium_id, refreshExpenses]);
 
     return (
@@ -378,8 +424,13 @@ const Maintenance = () => {
                     <div className="p-6 h-full flex flex-col overflow-hidden">
                         <div className="w-full rounded-md border bg-background overflow-hidden flex flex-col flex-1 shadow-sm">
                             <div className="flex items-center justify-between gap-4 border-b p-4" >
-                                <h3 className="text-xl font-bold whitespace-nowrap">Historial de Gastos</h3>
-                                <Input className="w-[180px] text-sm" placeholder="Buscar…" value={search} onChange={(e) => setSearch(e.target.value)} />
+                                <div>
+                                    <h3 className="text-xl font-bold whitespace-nowrap">Historial de Gastos</h3>
+                                    <p className="text-xs text-slate-500">
+                                        Mes actual {formatCLP(currentMonthTotal)} · Mes anterior {formatCLP(previousMonthTotal)}
+                                    </p>
+                                </div>
+                                <Input className="w-[180px] text-sm" placeholder="Buscar…" value={search} onChange={(e) => handleSearchChange(e.target.value)} />
                             </div>
 
                             <div className="flex-1 overflow-auto">
@@ -394,12 +445,12 @@ const Maintenance = () => {
                                     </TableHeader>
 
                                     <TableBody>
-                                        {paginatedExpenses.length === 0 ? (
+                                        {expenses.length === 0 ? (
                                             <TableRow>
                                                 <TableCell colSpan={EXPENSE_COLUMNS.length + 1} className="text-center h-24 text-muted-foreground">Sin datos</TableCell>
                                             </TableRow>
                                         ) : (
-                                            paginatedExpenses.map((expense) => {
+                                            expenses.map((expense) => {
                                                 const isEditing = editingId === expense.id;
                                                 return (
                                                     <TableRow key={expense.id}>
@@ -506,8 +557,8 @@ const Maintenance = () => {
                                     variant="outline"
                                     size="sm"
                                     className=""
-                                    onClick={() => setCurrentPage((prev) => Math.min(prev + 1, totalPages))}
-                                    disabled={currentPage === totalPages || totalPages === 0}
+                                    onClick={() => setCurrentPage((prev) => prev + 1)}
+                                    disabled={!hasMore}
                                 >
                                     Siguiente
                                 </Button>
@@ -552,13 +603,13 @@ const Maintenance = () => {
                                         {selectedExpense.documents && selectedExpense.documents.length > 0 ? (
                                             selectedExpense.documents.map((doc, index) => (
                                                 <div key={index} className="group relative rounded-lg border border-slate-200 overflow-hidden bg-slate-50 hover:shadow-md transition-all">
-                                                    {doc.url.match(/\.(jpeg|jpg|png|gif|webp)$/i) ? (
-                                                        <a href={doc.url} target="_blank" rel="noopener noreferrer">
-                                                            <img src={doc.url} alt="Comprobante" className="w-full h-48 object-cover group-hover:scale-105 transition-transform duration-300" />
+                                                    {doc.content_type?.startsWith("image/") ? (
+                                                        <a href={`${backendUrl}${doc.url}`} target="_blank" rel="noopener noreferrer">
+                                                            <img src={`${backendUrl}${doc.thumbnail_url || doc.url}`} alt="Comprobante" className="w-full h-48 object-cover group-hover:scale-105 transition-transform duration-300" />
                                                             <div className="absolute inset-0 bg-black/0 group-hover:bg-black/10 transition-colors flex items-center justify-center opacity-0 group-hover:opacity-100"><span className="bg-white/90 text-xs py-1 px-3 rounded-full shadow-sm font-medium">Ver Pantalla Completa</span></div>
                                                         </a>
                                                     ) : (
-                                                        <div className="p-6 flex flex-col items-center justify-center text-slate-400"><FileText className="h-12 w-12 mb-2" /><a href={doc.url} target="_blank" rel="noopener noreferrer" className="text-blue-600 hover:underline text-sm font-medium">Ver Documento ({doc.type || 'Archivo'})</a></div>
+                                                        <div className="p-6 flex flex-col items-center justify-center text-slate-400">{!doc.thumbnail_url && <FileText className="h-12 w-12 mb-2" />}{doc.thumbnail_url && <img src={`${backendUrl}${doc.thumbnail_url}`} alt="Vista previa" className="h-32 mb-2 object-contain" />}<a href={`${backendUrl}${doc.url}`} target="_blank" rel="noopener noreferrer" className="text-blue-600 hover:underline text-sm font-medium">Ver Documento ({doc.original_name || 'Archivo'})</a></div>
                                                     )}
                                                 </div>
                                             ))